@@ -1,23 +1,34 @@
+import hashlib
 import os
 import uuid
 from datetime import datetime
 
-import markdown
-from flask import Flask, render_template, request, jsonify, url_for, Response, stream_with_context
+from flask import Flask, render_template, request, jsonify, url_for, Response, stream_with_context, session, make_response
 
 from config import config
-from services.models import db, NormalizedArticle, SourceArticle, PublishArticle
+from services.models import db, NormalizedArticle, PublishArticle
+from services.render import render_cache, render_article_html, render_markdown
+from services.preview import preview_store, PreviewConflict, InvalidChanges
+from services.pagination import keyset_page, serialize_columns
+from services.stats import stats_cache, ping_db
+from services.jobs import job_manager, Job, JobError
+from services.conditional import make_etag, not_modified_response, add_validators
+from services.uploads import UploadError
+from services.image_store import store_image, sync_refs, collect_garbage
+from services.wechat_html import wechat_html_cache
+from services.cookie_state import cookie_validity, refresh_state, cookie_key, DEFAULT_KEY
 
 app = Flask(__name__)
 
-# 加载配置
-app.config.from_object(config['development'])
+# 加载配置（FLASK_CONFIG 选择 development/production/testing，默认 development）
+app.config.from_object(config[os.getenv('FLASK_CONFIG', 'development')])
 
 # 配置上传
 UPLOAD_FOLDER = 'static/images'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 限制16MB
+app.config['UPLOAD_DISPLAY_WIDTHS'] = (1080,)  # 超过该宽度的图片生成缩小的展示版本
 
 def allowed_file(filename):
     """检查文件扩展名是否允许"""
@@ -26,118 +37,242 @@ def allowed_file(filename):
 # 初始化数据库
 db.init_app(app)
 
+# 列表页只加载的列（content/content_html 等大字段延迟加载）
+CRAWLER_LIST_COLUMNS = [
+    NormalizedArticle.nid, NormalizedArticle.title, NormalizedArticle.author_name,
+    NormalizedArticle.cover_url, NormalizedArticle.source_url, NormalizedArticle.source_type,
+    NormalizedArticle.process_status, NormalizedArticle.created_at, NormalizedArticle.updated_at
+]
+PUBLISH_LIST_COLUMNS = [
+    PublishArticle.pid, PublishArticle.nid, PublishArticle.title, PublishArticle.cover_url,
+    PublishArticle.source_url, PublishArticle.target_platform, PublishArticle.publish_status,
+    PublishArticle.platform_article_id, PublishArticle.created_at, PublishArticle.updated_at
+]
+
+def parse_id_list(values):
+    """解析请求中的ID列表（整数或数字字符串），格式不正确时抛出 ValueError"""
+    if not isinstance(values, list):
+        raise ValueError('ID列表格式不正确')
+    ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit():
+            raise ValueError(f'无效的ID: {value}')
+        ids.append(int(value))
+    return ids
+
+def get_page_args():
+    """读取分页参数：cursor 和 limit（limit 不超过100）"""
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', app.config['LIST_PAGE_SIZE'], type=int)
+    return cursor, max(1, min(limit, 100))
+
+def query_crawler_page(cursor, limit):
+    """查询一页爬虫文章(TEJIAN类型，排除已舍弃的文章)"""
+    query = NormalizedArticle.query.filter_by(source_type='TEJIAN').filter(NormalizedArticle.process_status != 4)
+    return keyset_page(query, NormalizedArticle.created_at, NormalizedArticle.nid,
+                       CRAWLER_LIST_COLUMNS, cursor=cursor, limit=limit)
+
+def query_publish_page(cursor, limit):
+    """查询一页发布文章"""
+    return keyset_page(PublishArticle.query, PublishArticle.created_at, PublishArticle.pid,
+                       PUBLISH_LIST_COLUMNS, cursor=cursor, limit=limit)
+
+# 初始化文章渲染缓存和编辑器预览缓存
+render_cache.init_app(app)
+preview_store.init_app(app)
+
+# 初始化统计缓存
+stats_cache.init_app(app)
+
+# 初始化微信HTML转换缓存
+wechat_html_cache.init_app(app)
+
+# 初始化Cookie有效性缓存和刷新状态
+cookie_validity.init_app(app)
+refresh_state.init_app(app)
+
+# 初始化后台任务
+job_manager.init_app(app)
+
+@app.after_request
+def cache_image_store(response):
+    """图片库文件以内容哈希命名，内容不会变化，允许浏览器和CDN长期缓存"""
+    if request.path.startswith('/static/images/cas/') and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+def job_submitted_response(job, created, message):
+    """任务提交后的统一响应（202），重复提交时返回已有任务"""
+    return jsonify({
+        'status': 'success',
+        'message': message if created else '已有相同任务正在执行',
+        'job_id': job.job_id,
+        'job_status_url': url_for('get_job', job_id=job.job_id),
+        'deduplicated': not created,
+        'job': job.to_dict()
+    }), 202
+
+def latest_articles_etag(page):
+    """首页最新N篇文章的 ETag（只查询主键和更新时间）
+    
+    列表不返回 Last-Modified：文章被舍弃或删除、较早更新的文章进入列表时最大更新时间不变，
+    且 DATETIME 只精确到秒，同一秒内的多次修改无法区分；ETag 包含每篇文章的主键和更新时间。
+    """
+    rows = db.session.query(NormalizedArticle.nid, NormalizedArticle.updated_at).filter(
+        NormalizedArticle.source_type == 'WUHU',
+        NormalizedArticle.process_status != 4
+    ).order_by(NormalizedArticle.created_at.desc()).limit(app.config['ARTICLES_PER_PAGE']).all()
+    
+    return make_etag(page, *(f'{nid}:{updated_at}' for nid, updated_at in rows))
+
+def record_validators(column, pk_column, pk, page):
+    """单条记录页面的 ETag / Last-Modified，记录不存在时返回 (None, None)"""
+    updated_at = db.session.query(column).filter(pk_column == pk).scalar()
+    if updated_at is None:
+        return None, None
+    return make_etag(page, pk, updated_at), updated_at
+
 @app.route('/')
 def index():
+    # 文章列表未变化时直接返回304
+    etag = latest_articles_etag('index')
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+    
     # 查询最新N篇文章，按创建时间降序排列（只显示WUHU类型，排除已舍弃的文章）
     articles = NormalizedArticle.query.filter_by(source_type='WUHU').filter(NormalizedArticle.process_status != 4).order_by(NormalizedArticle.created_at.desc()).limit(app.config['ARTICLES_PER_PAGE']).all()
-    return render_template('index.html', articles=articles)
+    return add_validators(make_response(render_template('index.html', articles=articles)), etag)
 
 @app.route('/article/<int:article_id>')
 def article_detail(article_id):
     """文章详情页(normalized_articles表,nid为主键)"""
+    # 文章未更新时直接返回304
+    etag, last_modified = record_validators(NormalizedArticle.updated_at, NormalizedArticle.nid, article_id, 'article')
+    if etag:
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified:
+            return not_modified
+    
     article = NormalizedArticle.query.get_or_404(article_id)
     
-    # 将 Markdown 内容转换为 HTML
-    if article.content:
-        # 使用 markdown 库，启用额外的扩展功能
-        html_content = markdown.markdown(
-            article.content,
-            extensions=['extra', 'codehilite', 'tables', 'fenced_code', 'nl2br']
-        )
-        
-        # 修复图片路径：如果 src 以 static/ 开头但没有 /，则补全 /
-        import re
-        html_content = re.sub(
-            r'<img ([^>]*?)src="(static/[^"]+)"',
-            r'<img \1src="/\2"',
-            html_content
-        )
-    else:
-        html_content = '<p class="text-gray-500">暂无内容</p>'
+    # 将 Markdown 内容转换为 HTML（按 nid + updated_at 缓存渲染结果）
+    html_content = render_article_html(article)
     
     # 传递文章类型和返回路径
-    return render_template('article_detail.html', 
+    response = make_response(render_template('article_detail.html', 
                          article=article, 
                          html_content=html_content,
                          article_type='article',
-                         back_url='/')
+                         back_url='/'))
+    return add_validators(response, etag, last_modified)
 
 @app.route('/crawler')
 def crawler_index():
     """爬虫文章列表页(只显示TEJIAN类型，排除已舍弃的文章)"""
-    # 查询所有爬虫文章，按创建时间降序排列，排除 process_status=4 的文章
-    articles = NormalizedArticle.query.filter_by(source_type='TEJIAN').filter(NormalizedArticle.process_status != 4).order_by(NormalizedArticle.created_at.desc()).all()
-    return render_template('crawler_index.html', articles=articles)
+    # 按创建时间降序游标分页，只加载列表需要的列
+    cursor, limit = get_page_args()
+    try:
+        articles, next_cursor = query_crawler_page(cursor, limit)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': '无效的分页游标'}), 400
+    return render_template('crawler_index.html', articles=articles, next_cursor=next_cursor, cursor=cursor)
 
 @app.route('/raw-article/<int:article_id>')
 def raw_article_detail(article_id):
     """爬虫文章详情页(normalized_articles表,nid为主键)"""
+    # 文章未更新时直接返回304
+    etag, last_modified = record_validators(NormalizedArticle.updated_at, NormalizedArticle.nid, article_id, 'raw-article')
+    if etag:
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified:
+            return not_modified
+    
     article = NormalizedArticle.query.get_or_404(article_id)
     
-    # 将 Markdown 内容转换为 HTML
-    if article.content:
-        # 使用 markdown 库，启用额外的扩展功能
-        html_content = markdown.markdown(
-            article.content,
-            extensions=['extra', 'codehilite', 'tables', 'fenced_code', 'nl2br']
-        )
-        
-        # 修复图片路径：如果 src 以 static/ 开头但没有 /，则补全 /
-        import re
-        html_content = re.sub(
-            r'<img ([^>]*?)src="(static/[^"]+)"',
-            r'<img \1src="/\2"',
-            html_content
-        )
-    else:
-        html_content = '<p class="text-gray-500">暂无内容</p>'
+    # 将 Markdown 内容转换为 HTML（按 nid + updated_at 缓存渲染结果）
+    html_content = render_article_html(article)
     
     # 复用同一个模板，传递文章类型和返回路径
-    return render_template('article_detail.html', 
+    response = make_response(render_template('article_detail.html', 
                          article=article, 
                          html_content=html_content,
                          article_type='raw-article',
-                         back_url='/crawler')
+                         back_url='/crawler'))
+    return add_validators(response, etag, last_modified)
 
 @app.route('/publish')
 def publish_index():
     """发布文章列表页(publish_articles表)"""
-    # 查询所有发布文章，按创建时间降序排列
-    articles = PublishArticle.query.order_by(PublishArticle.created_at.desc()).all()
-    return render_template('publish_index.html', articles=articles)
+    # 按创建时间降序游标分页，只加载列表需要的列
+    cursor, limit = get_page_args()
+    try:
+        articles, next_cursor = query_publish_page(cursor, limit)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': '无效的分页游标'}), 400
+    return render_template('publish_index.html', articles=articles, next_cursor=next_cursor, cursor=cursor)
 
 @app.route('/publish-article/<int:article_id>')
 def publish_article_detail(article_id):
     """发布文章详情页(publish_articles表,pid为主键)"""
+    # 文章未更新时直接返回304
+    etag, last_modified = record_validators(PublishArticle.updated_at, PublishArticle.pid, article_id, 'publish-article')
+    if etag:
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified:
+            return not_modified
+    
     article = PublishArticle.query.get_or_404(article_id)
     
     # 使用已转换的HTML内容
     content_html = article.content_html if article.content_html else '<p class="text-gray-500">暂无内容</p>'
     
-    return render_template('publish_article_detail.html', 
+    response = make_response(render_template('publish_article_detail.html', 
                          article=article, 
-                         content_html=content_html)
+                         content_html=content_html))
+    return add_validators(response, etag, last_modified)
 
 @app.route('/api/crawl', methods=['POST'])
 def crawl_articles():
-    """API接口: 手动触发爬取"""
+    """API接口: 手动触发爬取（后台执行，返回任务ID）"""
     try:
-        from services.crawler import CaseiCrawler
-        
-        # 创建爬虫实例
-        crawler = CaseiCrawler(app=app)
-        
-        # 爬取所有文章
-        stats = crawler.crawl_and_save_all(delay=1, skip_existing=True)
+        def crawl_job(ctx):
+            import inspect
+            from services.crawler import CaseiCrawler
+            
+            # 创建爬虫实例
+            crawler = CaseiCrawler(app=app)
+            
+            def on_progress(stats):
+                """每篇文章处理后的回调：上报进度计数"""
+                ctx.update(**{key: stats[key] for key in ('total', 'success', 'skipped', 'failed') if key in stats})
+            
+            # 爬虫支持回调时逐篇上报进度，并在文章之间检查取消请求（should_stop 返回 True 时停止并返回已完成的统计）
+            options = {}
+            parameters = inspect.signature(crawler.crawl_and_save_all).parameters
+            if 'progress_callback' in parameters:
+                options['progress_callback'] = on_progress
+            if 'should_stop' in parameters:
+                options['should_stop'] = ctx.is_cancelled
+            
+            # 爬取所有文章
+            stats = crawler.crawl_and_save_all(delay=1, skip_existing=True, **options)
+            ctx.update(total=stats['total'], success=stats['success'], skipped=stats['skipped'], failed=stats['failed'])
+            ctx.check_cancelled()
+            
+            return {
+                'message': f'爬取完成，成功 {stats["success"]} 篇，跳过 {stats["skipped"]} 篇，失败 {stats["failed"]} 篇',
+                'total': stats['total'],
+                'success': stats['success'],
+                'skipped': stats['skipped'],
+                'failed': stats['failed']
+            }
         
-        return jsonify({
-            'status': 'success',
-            'message': f'爬取完成，成功 {stats["success"]} 篇，跳过 {stats["skipped"]} 篇，失败 {stats["failed"]} 篇',
-            'total': stats['total'],
-            'success': stats['success'],
-            'skipped': stats['skipped'],
-            'failed': stats['failed']
-        })
+        job, created = job_manager.submit('crawl', crawl_job)
+        return job_submitted_response(job, created, '已提交爬取任务')
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -168,9 +303,14 @@ def update_article(article_id):
         article.title = data['title']
         article.content = data['content']
         article.updated_at = datetime.now()
+        # 按新内容更新图片引用，删掉的图片之后由垃圾回收清理
+        sync_refs(article.nid, article.content)
         
         db.session.commit()
         
+        # 内容已变化，清除旧的渲染缓存
+        render_cache.invalidate(article.nid)
+        
         return jsonify({
             'status': 'success',
             'message': '文章更新成功'
@@ -206,9 +346,14 @@ def update_raw_article(article_id):
         article.title = data['title']
         article.content = data['content']
         article.updated_at = datetime.now()
+        # 按新内容更新图片引用，删掉的图片之后由垃圾回收清理
+        sync_refs(article.nid, article.content)
         
         db.session.commit()
         
+        # 内容已变化，清除旧的渲染缓存
+        render_cache.invalidate(article.nid)
+        
         return jsonify({
             'status': 'success',
             'message': '爬虫文章更新成功'
@@ -222,7 +367,7 @@ def update_raw_article(article_id):
 
 @app.route('/api/upload-image/<int:article_id>', methods=['POST'])
 def upload_image(article_id):
-    """上传图片到文章对应的images文件夹(normalized_articles表)"""
+    """上传图片到图片库并记录文章引用(normalized_articles表)"""
     try:
         # 检查文章是否存在
         article = NormalizedArticle.query.get_or_404(article_id)
@@ -250,44 +395,36 @@ def upload_image(article_id):
                 'message': f'不支持的文件格式，仅支持: {", ".join(ALLOWED_EXTENSIONS)}'
             }), 400
         
-        # 获取文件扩展名
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        
-        # 从文章链接中提取文件夹名（/s/ 后面的部分）
-        folder_name = None
-        if article.source_url:
-            # 示例: https://mp.weixin.qq.com/s/SHgnw6-sgzUoB_AaV8OflQ
-            # 提取 SHgnw6-sgzUoB_AaV8OflQ
-            parts = article.source_url.split('/s/')
-            if len(parts) > 1:
-                # 去除可能的查询参数
-                folder_name = parts[1].split('?')[0].split('#')[0]
-        
-        # 如果无法从链接提取，使用默认命名
-        if not folder_name:
-            folder_name = f"article_{article_id}"
-        
-        # 创建文章专属的图片文件夹
-        article_image_folder = os.path.join(app.config['UPLOAD_FOLDER'], folder_name)
-        os.makedirs(article_image_folder, exist_ok=True)
-        
-        # 生成唯一文件名（使用UUID避免重复）
-        unique_filename = f"{uuid.uuid4().hex}.{ext}"
-        filepath = os.path.join(article_image_folder, unique_filename)
-        
-        # 保存文件
-        file.save(filepath)
+        # 按内容哈希保存到图片库（同一张图片在所有文章间只保存一次），大图生成展示版本，并记录文章引用
+        saved = store_image(
+            file.stream,
+            article.nid,
+            max_bytes=app.config['MAX_CONTENT_LENGTH'],
+            display_widths=app.config['UPLOAD_DISPLAY_WIDTHS']
+        )
         
-        # 生成URL（使用相对路径）
-        image_url = url_for('static', filename=f'images/{folder_name}/{unique_filename}')
+        # 生成URL（使用相对路径），文章中引用展示版本
+        original_url = url_for('static', filename=saved['path'])
+        image_url = original_url
+        if saved['display_path']:
+            image_url = url_for('static', filename=saved['display_path'])
         
         return jsonify({
             'status': 'success',
-            'message': '图片上传成功',
+            'message': '图片已存在，已复用' if saved['deduplicated'] else '图片上传成功',
             'url': image_url,
-            'filename': unique_filename,
-            'folder': folder_name
+            'original_url': original_url,
+            'filename': os.path.basename(saved['path']),
+            'sha256': saved['sha256'],
+            'width': saved['width'],
+            'height': saved['height'],
+            'deduplicated': saved['deduplicated']
         })
+    except UploadError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -307,11 +444,8 @@ def markdown_to_html():
                 'message': 'Markdown 内容为空'
             }), 400
         
-        # 使用 markdown 库转换
-        html_content = markdown.markdown(
-            markdown_content,
-            extensions=['extra', 'codehilite', 'tables', 'fenced_code', 'nl2br']
-        )
+        # 使用当前线程复用的转换器
+        html_content = render_markdown(markdown_content)
         
         return jsonify({
             'status': 'success',
@@ -323,39 +457,208 @@ def markdown_to_html():
             'message': str(e)
         }), 500
 
+@app.route('/api/markdown-preview', methods=['POST'])
+def markdown_preview():
+    """编辑器增量预览：只重新渲染发生变化的块，返回HTML补丁
+    
+    请求体:
+        doc_id: 文档标识（如 article-12）
+        version: 客户端文档版本号，递增
+        markdown: 全文（首次预览或需要重新同步时提交）
+        changes: [{start, end, blocks}]，相对 base_version 的块级修改
+        base_version: changes 所基于的版本号
+    """
+    try:
+        data = request.get_json()
+        doc_id = data.get('doc_id')
+        version = data.get('version')
+        
+        if not doc_id or not isinstance(version, int):
+            return jsonify({
+                'status': 'error',
+                'message': 'doc_id 和 version 不能为空'
+            }), 400
+        
+        if data.get('markdown') is None and data.get('changes') is None:
+            return jsonify({
+                'status': 'error',
+                'message': '需要提交 markdown 或 changes'
+            }), 400
+        
+        # 预览缓存按会话隔离
+        if 'preview_sid' not in session:
+            session['preview_sid'] = uuid.uuid4().hex
+        
+        result = preview_store.update(
+            session['preview_sid'],
+            str(doc_id),
+            version,
+            markdown_text=data.get('markdown'),
+            changes=data.get('changes'),
+            base_version=data.get('base_version')
+        )
+        
+        return jsonify({
+            'status': 'success',
+            **result
+        })
+    except PreviewConflict as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'need_full': True
+        }), 409
+    except InvalidChanges as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/render-cache/stats')
+def render_cache_stats():
+    """查询文章渲染缓存的命中统计"""
+    return jsonify({
+        'status': 'success',
+        'data': render_cache.stats()
+    })
+
+@app.route('/api/wechat-html-cache/stats')
+def wechat_html_cache_stats():
+    """查询微信HTML转换缓存的命中统计"""
+    return jsonify({
+        'status': 'success',
+        'data': wechat_html_cache.stats()
+    })
+
+@app.route('/api/pipelines/stats')
+def pipeline_stats():
+    """查询运行中和最近完成的同步流水线各阶段的吞吐量和队列深度"""
+    from services.pipeline import pipeline_registry
+    
+    return jsonify({
+        'status': 'success',
+        'data': pipeline_registry.snapshot()
+    })
+
 # 数据库测试接口
 @app.route('/api/test-db')
 def test_db():
     """测试数据库连接"""
     try:
-        # 尝试查询文章数量
-        normalized_count = NormalizedArticle.query.count()
-        source_count = SourceArticle.query.count()
-        wuhu_count = NormalizedArticle.query.filter_by(source_type='WUHU').count()
-        tejian_count = NormalizedArticle.query.filter_by(source_type='TEJIAN').count()
+        # 检查连接，文章数量使用缓存的统计结果
+        ping_db()
+        stats, _ = stats_cache.get()
         return jsonify({
             'status': 'success',
             'message': '数据库连接成功！',
-            'normalized_article_count': normalized_count,
-            'source_article_count': source_count,
-            'wuhu_count': wuhu_count,
-            'tejian_count': tejian_count
+            'normalized_article_count': stats['normalized_article_count'],
+            'source_article_count': stats['source_article_count'],
+            'wuhu_count': stats['wuhu_count'],
+            'tejian_count': stats['tejian_count']
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'数据库连接失败: {str(e)}'
+        }), 500
+
+@app.route('/api/ping')
+def ping():
+    """存活检查（只执行 SELECT 1）"""
+    try:
+        ping_db()
+        return jsonify({
+            'status': 'success',
+            'message': 'pong'
         })
     except Exception as e:
         return jsonify({
             'status': 'error',
             'message': f'数据库连接失败: {str(e)}'
+        }), 503
+
+@app.route('/api/stats')
+def get_stats():
+    """文章统计（各表数量及按状态分布），结果缓存 STATS_CACHE_TTL 秒，refresh=true 强制刷新"""
+    try:
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        stats, generated_at = stats_cache.get(refresh=refresh)
+        return jsonify({
+            'status': 'success',
+            'data': stats,
+            'generated_at': datetime.fromtimestamp(generated_at).strftime('%Y-%m-%d %H:%M:%S')
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
         }), 500
 
 @app.route('/api/articles')
 def get_articles():
     """获取最新N篇文章(WUHU类型，排除已舍弃的文章)"""
     try:
+        # 文章列表未变化时直接返回304
+        etag = latest_articles_etag('api-articles')
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+        
         articles = NormalizedArticle.query.filter_by(source_type='WUHU').filter(NormalizedArticle.process_status != 4).order_by(NormalizedArticle.created_at.desc()).limit(app.config['ARTICLES_PER_PAGE']).all()
-        return jsonify({
+        response = jsonify({
             'status': 'success',
             'data': [article.to_dict() for article in articles]
         })
+        return add_validators(response, etag)
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/crawler-articles')
+def get_crawler_articles():
+    """分页获取爬虫文章列表(TEJIAN类型，排除已舍弃的文章)，参数: cursor, limit"""
+    try:
+        cursor, limit = get_page_args()
+        articles, next_cursor = query_crawler_page(cursor, limit)
+        return jsonify({
+            'status': 'success',
+            'data': [serialize_columns(article, CRAWLER_LIST_COLUMNS) for article in articles],
+            'next_cursor': next_cursor
+        })
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': '无效的分页游标'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/publish-articles')
+def get_publish_articles():
+    """分页获取发布文章列表(publish_articles表)，参数: cursor, limit"""
+    try:
+        cursor, limit = get_page_args()
+        articles, next_cursor = query_publish_page(cursor, limit)
+        return jsonify({
+            'status': 'success',
+            'data': [serialize_columns(article, PUBLISH_LIST_COLUMNS) for article in articles],
+            'next_cursor': next_cursor
+        })
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': '无效的分页游标'
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -368,15 +671,22 @@ def check_cookie():
     try:
         from services.sync_wechat_articles import check_cookie_valid
         
-        # 检查是否需要自动刷新
+        # 检查是否需要自动刷新，force=true 跳过缓存重新检测
         auto_refresh = request.args.get('auto_refresh', 'false').lower() == 'true'
+        force = request.args.get('force', 'false').lower() == 'true'
         
-        is_valid, message = check_cookie_valid(auto_refresh=auto_refresh)
+        # 缓存有效时直接返回，并发的检测共用同一次请求
+        is_valid, message, cached = cookie_validity.check(
+            lambda: check_cookie_valid(auto_refresh=auto_refresh),
+            force=force,
+            flight_key='check:auto' if auto_refresh else 'check'
+        )
         
         return jsonify({
             'status': 'success' if is_valid else 'error',
             'is_valid': is_valid,
-            'message': message
+            'message': message,
+            'cached': cached
         })
     except Exception as e:
         return jsonify({
@@ -391,7 +701,8 @@ def refresh_cookie():
     try:
         from services.sync_wechat_articles import do_cookie_refresh
         
-        is_valid, message = do_cookie_refresh()
+        # 同时只执行一次刷新，重复点击等待同一次刷新的结果
+        is_valid, message = cookie_validity.refresh(do_cookie_refresh)
         
         if is_valid:
             return jsonify({
@@ -416,22 +727,20 @@ def refresh_cookie_headless():
         from services.cookie_picker import wait_for_login_and_capture, update_config_file
         import threading
         
-        # 全局变量存储状态
-        global _cookie_refresh_status
-        _cookie_refresh_status = {
-            'status': 'pending',  # pending, qr_ready, success, error
-            'message': '正在启动浏览器...',
-            'qr_path': None
-        }
+        # 已有刷新在进行时不再启动新的浏览器
+        generation = refresh_state.start()
+        if not generation:
+            return jsonify({
+                'status': 'success',
+                'message': '已有Cookie刷新任务正在进行，请等待二维码'
+            })
         
         def refresh_task():
             """后台任务：启动浏览器并等待登录"""
             try:
                 def qr_callback(qr_path):
                     """二维码生成后的回调"""
-                    _cookie_refresh_status['status'] = 'qr_ready'
-                    _cookie_refresh_status['message'] = '二维码已生成，请扫码登录'
-                    _cookie_refresh_status['qr_path'] = qr_path
+                    refresh_state.update('qr_ready', '二维码已生成，请扫码登录', qr_path=qr_path, generation=generation)
                     print(f"[Cookie刷新] 二维码已生成: {qr_path}")
                 
                 # 调用无头模式的cookie获取
@@ -450,21 +759,19 @@ def refresh_cookie_headless():
                         from services.sync_wechat_articles import reload_wechat_config
                         reload_wechat_config()
                         
-                        _cookie_refresh_status['status'] = 'success'
-                        _cookie_refresh_status['message'] = 'Cookie刷新成功！'
+                        # 新Cookie需要重新检测
+                        cookie_validity.invalidate()
+                        refresh_state.update('success', 'Cookie刷新成功！', generation=generation)
                         print("[Cookie刷新] 刷新成功")
                     else:
-                        _cookie_refresh_status['status'] = 'error'
-                        _cookie_refresh_status['message'] = '配置文件更新失败'
+                        refresh_state.update('error', '配置文件更新失败', generation=generation)
                         print("[Cookie刷新] 配置文件更新失败")
                 else:
-                    _cookie_refresh_status['status'] = 'error'
-                    _cookie_refresh_status['message'] = 'Cookie获取失败'
+                    refresh_state.update('error', 'Cookie获取失败', generation=generation)
                     print("[Cookie刷新] Cookie获取失败")
                     
             except Exception as e:
-                _cookie_refresh_status['status'] = 'error'
-                _cookie_refresh_status['message'] = f'刷新失败: {str(e)}'
+                refresh_state.update('error', f'刷新失败: {str(e)}', generation=generation)
                 print(f"[Cookie刷新] 异常: {str(e)}")
                 import traceback
                 traceback.print_exc()
@@ -488,24 +795,17 @@ def refresh_cookie_headless():
 def refresh_cookie_status():
     """查询Cookie刷新状态"""
     try:
-        global _cookie_refresh_status
-        
-        # 如果还没有初始化状态
-        if '_cookie_refresh_status' not in globals():
-            return jsonify({
-                'status': 'idle',
-                'message': '未启动刷新任务'
-            })
+        state = refresh_state.snapshot()
         
         response = {
-            'status': _cookie_refresh_status['status'],
-            'message': _cookie_refresh_status['message']
+            'status': state['status'],
+            'message': state['message']
         }
         
         # 如果二维码已就绪，返回二维码的URL
-        if _cookie_refresh_status['status'] == 'qr_ready' and _cookie_refresh_status['qr_path']:
+        if state['status'] == 'qr_ready' and state['qr_path']:
             # 转换为URL路径
-            qr_path = _cookie_refresh_status['qr_path']
+            qr_path = state['qr_path']
             # 提取 static/ 后面的部分
             if 'static' in qr_path:
                 relative_path = qr_path.split('static' + os.sep)[1].replace('\\', '/')
@@ -521,35 +821,141 @@ def refresh_cookie_status():
 
 @app.route('/api/sync', methods=['POST'])
 def sync_articles():
-    """同步微信文章"""
+    """同步微信文章（后台执行，返回任务ID）"""
     try:
         # 导入同步函数
         from services.sync_wechat_articles import sync_wechat_articles, check_cookie_valid
         from services.clean import clean_old_articles
         
-        # 先检测Cookie是否有效
-        is_valid, message = check_cookie_valid()
-        if not is_valid:
-            return jsonify({
-                'status': 'error',
-                'message': f'Cookie检测失败: {message}'
-            }), 400
-        
-        # 执行同步（使用配置的文章数量）
         articles_count = app.config['ARTICLES_PER_PAGE']
-        success_count = sync_wechat_articles(count=articles_count, skip_existing=False, target_success=articles_count)
+        # 默认按高水位增量同步，full=true 时全量重新采集最新的文章
+        data = request.get_json(silent=True) or {}
+        incremental = app.config['SYNC_INCREMENTAL'] and not data.get('full')
+        
+        if not incremental:
+            # 全量同步使用 wechat_cookies.json，先检测Cookie是否有效（最近检测过或同步过时使用缓存的结果）
+            is_valid, message, _ = cookie_validity.check(check_cookie_valid)
+            if not is_valid:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Cookie检测失败: {message}'
+                }), 400
+        
+        def sync_incremental_accounts(ctx):
+            """并发同步所有公众号，Cookie状态按公众号分别判断和记录"""
+            from services.wechat_sync import COOKIE_FILE, load_accounts, load_wechat_config, sync_accounts
+            
+            # wechat_accounts.json 中的所有公众号（没有该文件时为 wechat_cookies.json 中的公众号）
+            accounts = load_accounts()
+            # 使用 wechat_cookies.json 中Cookie的公众号与 /api/check-cookie 共用 DEFAULT_KEY
+            default_cookies = load_wechat_config().get('cookies') if os.path.exists(COOKIE_FILE) else None
+            keys = [DEFAULT_KEY if account.get('cookies') == default_cookies else cookie_key(account.get('cookies'))
+                    for account in accounts]
+            results = [None] * len(accounts)
+            pending = []
+            for index, (account, key) in enumerate(zip(accounts, keys)):
+                state = cookie_validity.cached(key)
+                if state is not None and not state[0]:
+                    # 最近已确认该Cookie失效，跳过这个公众号，不影响其他公众号
+                    results[index] = {
+                        'name': account['name'],
+                        'fakeid': (account.get('params') or {}).get('fakeid'),
+                        'status': 'skipped',
+                        'message': f'Cookie已失效: {state[1]}'
+                    }
+                else:
+                    pending.append(index)
+            
+            for index, result in zip(pending, sync_accounts(accounts=[accounts[i] for i in pending],
+                                                            first_limit=articles_count)):
+                results[index] = result
+                if result['status'] == 'success':
+                    # 列表请求成功即说明Cookie有效（没有新文章也是正常结果）
+                    cookie_validity.record(True, 'Cookie有效（同步成功）', source='sync', key=keys[index])
+                elif result.get('auth_error'):
+                    cookie_validity.record(False, f"同步失败: {result['message']}", source='sync', key=keys[index])
+            
+            ctx.update(accounts=len(results),
+                       failed_accounts=sum(1 for result in results if result['status'] != 'success'))
+            return results
+        
+        def sync_job(ctx):
+            # 执行同步（使用配置的文章数量），同步的结果同时说明Cookie是否仍然有效
+            sync_result = None
+            if incremental:
+                sync_result = sync_incremental_accounts(ctx)
+                success_count = sum(account.get('inserted', 0) + account.get('updated', 0) for account in sync_result)
+            else:
+                try:
+                    success_count = sync_wechat_articles(count=articles_count, skip_existing=False, target_success=articles_count)
+                except Exception:
+                    # 失败原因不一定是Cookie失效（网络、数据库等），下次同步前重新检测
+                    cookie_validity.invalidate(DEFAULT_KEY)
+                    raise
+                if success_count:
+                    cookie_validity.record(True, 'Cookie有效（同步成功）', source='sync')
+                else:
+                    # 没有采集到文章时不能确定原因，下次同步前重新检测
+                    cookie_validity.invalidate(DEFAULT_KEY)
+            ctx.update(message=f'已采集 {success_count} 篇文章，准备清理', success=success_count)
+            ctx.check_cancelled()
+            
+            # 同步完成后自动清理旧文章
+            print("[同步] 开始自动清理旧文章...")
+            clean_result = clean_old_articles(articles_per_page=articles_count)
+            ctx.check_cancelled()
+            
+            # 清理旧文章后回收不再被引用的图片
+            clean_result['image_gc'] = collect_garbage()
+            
+            return {
+                'message': f'同步完成，成功采集 {success_count} 篇文章',
+                'count': success_count,
+                'accounts': sync_result,
+                'clean_result': clean_result
+            }
         
-        # 同步完成后自动清理旧文章
-        print("[同步] 开始自动清理旧文章...")
-        clean_result = clean_old_articles(articles_per_page=articles_count)
+        job, created = job_manager.submit('sync', sync_job)
+        return job_submitted_response(job, created, '已提交同步任务')
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """查询后台任务状态、进度和结果"""
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': '任务不存在'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'job': job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消后台任务"""
+    try:
+        job = job_manager.cancel(job_id)
+        if job is None:
+            return jsonify({
+                'status': 'error',
+                'message': '任务不存在'
+            }), 404
         
         return jsonify({
             'status': 'success',
-            'message': f'同步完成，成功采集 {success_count} 篇文章',
-            'count': success_count,
-            'clean_result': clean_result
+            'message': '已请求取消任务',
+            'job': job.to_dict()
         })
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -559,15 +965,14 @@ def sync_articles():
 def get_last_update_time():
     """获取最后更新时间（第N篇文章的更新时间,WUHU类型，排除已舍弃的文章）"""
     try:
-        # 按更新时间降序排列，获取第N篇文章，排除已舍弃的
-        articles = NormalizedArticle.query.filter_by(source_type='WUHU').filter(NormalizedArticle.process_status != 4).order_by(NormalizedArticle.updated_at.desc()).limit(app.config['ARTICLES_PER_PAGE']).all()
+        # 按更新时间降序取前N篇的 updated_at，外层取最小值：
+        # 足N篇时即第N篇的更新时间，不足N篇时即最后一篇的更新时间，只返回一行
+        latest = db.session.query(NormalizedArticle.updated_at.label('updated_at')).filter(
+            NormalizedArticle.source_type == 'WUHU',
+            NormalizedArticle.process_status != 4
+        ).order_by(NormalizedArticle.updated_at.desc()).limit(app.config['ARTICLES_PER_PAGE']).subquery()
         
-        if len(articles) >= app.config['ARTICLES_PER_PAGE']:
-            last_update = articles[app.config['ARTICLES_PER_PAGE'] - 1].updated_at  # 第N篇（索引N-1）
-        elif articles:
-            last_update = articles[-1].updated_at  # 如果不足N篇，取最后一篇
-        else:
-            last_update = None
+        last_update = db.session.query(db.func.min(latest.c.updated_at)).scalar()
         
         return jsonify({
             'status': 'success',
@@ -589,6 +994,9 @@ def clean_old_articles_api():
         # 执行清理（使用配置的文章数量）
         result = clean_old_articles(articles_per_page=app.config['ARTICLES_PER_PAGE'])
         
+        # 回收已删除文章不再引用的图片
+        result['image_gc'] = collect_garbage()
+        
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -598,10 +1006,10 @@ def clean_old_articles_api():
 
 @app.route('/api/<article_type>/<int:article_id>/generate-summary', methods=['POST'])
 def generate_summary(article_type, article_id):
-    """生成文章摘要(normalized_articles表)"""
+    """生成文章摘要(normalized_articles表)，内容未变化时返回缓存的摘要，force=true 强制重新生成"""
     try:
-        # 导入AI处理函数
-        from services.ai_process import generate_article_summary
+        # 导入带缓存的摘要生成函数
+        from services.summary_cache import generate_summary_cached
         
         # 根据类型获取文章(都从normalized_articles表获取)
         if article_type in ['article', 'raw-article']:
@@ -619,14 +1027,17 @@ def generate_summary(article_type, article_id):
                 'message': '文章内容为空，无法生成摘要'
             }), 400
         
-        # 生成摘要
-        success, message, summary = generate_article_summary(article.content)
+        # 生成摘要（force 可通过查询参数或请求体传入）
+        data = request.get_json(silent=True) or {}
+        force = request.args.get('force', 'false').lower() == 'true' or data.get('force') is True
+        success, message, summary, cached = generate_summary_cached(article.content, force=force)
         
         if success:
             return jsonify({
                 'status': 'success',
                 'message': message,
-                'summary': summary
+                'summary': summary,
+                'cached': cached
             })
         else:
             return jsonify({
@@ -641,10 +1052,10 @@ def generate_summary(article_type, article_id):
 
 @app.route('/api/<article_type>/<int:article_id>/generate-cover', methods=['POST'])
 def generate_cover(article_type, article_id):
-    """生成文章封面，直接保存到固定路径 ai_images/{id}/cover.jpg (normalized_articles表)"""
+    """生成文章封面（后台执行，返回任务ID），保存到固定路径 ai_images/{id}/cover.jpg (normalized_articles表)"""
     try:
-        # 导入AI处理函数
-        from services.ai_process import generate_cover_image
+        # 导入封面生成函数
+        from services.covers import generate_article_cover, cover_variants
         
         # 根据类型获取文章(都从normalized_articles表获取)
         if article_type in ['article', 'raw-article']:
@@ -662,43 +1073,142 @@ def generate_cover(article_type, article_id):
                 'message': '文章标题为空，无法生成封面'
             }), 400
         
-        # 创建固定的保存路径: static/ai_images/{article_id}/cover.jpg
-        cover_folder = os.path.join('static', 'ai_images', str(article_id))
-        os.makedirs(cover_folder, exist_ok=True)
-        
-        # 固定文件名
-        cover_filename = 'cover.jpg'
-        save_path = os.path.join(cover_folder, cover_filename)
-        
-        print(f"[封面生成] 保存路径: {save_path}")
-        
-        # 生成封面（如果文件已存在会被覆盖）
-        success, message, path = generate_cover_image(article.title, save_path)
+        title = article.title
+        static_url_path = app.static_url_path
         
-        if success:
-            # 生成URL和相对路径
-            cover_relative_path = f'ai_images/{article_id}/{cover_filename}'
-            cover_url = url_for('static', filename=cover_relative_path)
+        def cover_job(ctx):
+            # 生成封面（如果文件已存在会被覆盖），并裁剪为微信封面规格
+            success, message, cover_relative_path = generate_article_cover(article_id, title)
+            if not success:
+                raise JobError(message)
             
+            # 工作线程没有请求上下文，直接拼接静态文件URL
+            cover_url = f'{static_url_path}/{cover_relative_path}'
             print(f"[封面生成] 成功生成封面: {cover_url}")
             
-            return jsonify({
-                'status': 'success',
+            return {
                 'message': message,
                 'cover_url': cover_url,
-                'cover_path': cover_relative_path
-            })
+                'cover_path': cover_relative_path,
+                'variants': {
+                    filename: f'{static_url_path}/{path}'
+                    for filename, path in cover_variants(article_id).items()
+                }
+            }
+        
+        job, created = job_manager.submit('cover', cover_job, dedupe_key=f'cover:{article_id}')
+        return job_submitted_response(job, created, '已提交封面生成任务')
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': f'生成封面失败: {str(e)}'
+        }), 500
+
+@app.route('/api/batch-generate', methods=['POST'])
+def batch_generate():
+    """批量生成摘要和封面，以SSE流式返回每篇文章每个任务的进度
+    
+    请求体:
+        nids: 文章ID列表；或 filter: {"source_type": "WUHU", "process_status": 0}
+        tasks: ["summary", "cover"]，默认两者都生成
+        force: 摘要是否跳过缓存
+    """
+    try:
+        from services.batch_generate import run_batch, ALL_TASKS
+        import json
+        
+        data = request.get_json() or {}
+        tasks = [task for task in data.get('tasks', ALL_TASKS) if task in ALL_TASKS]
+        if not tasks:
+            return jsonify({
+                'status': 'error',
+                'message': '无效的任务类型'
+            }), 400
+        
+        max_items = app.config['AI_BATCH_MAX_ITEMS']
+        query = db.session.query(NormalizedArticle.nid, NormalizedArticle.title, NormalizedArticle.content)
+        if data.get('nids'):
+            try:
+                nids = parse_id_list(data['nids'])[:max_items]
+            except ValueError:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'nids 必须是文章ID列表'
+                }), 400
+            rows = query.filter(NormalizedArticle.nid.in_(nids)).all()
+        elif data.get('filter'):
+            article_filter = data['filter']
+            # 默认选择待处理的文章
+            process_status = article_filter.get('process_status', 0) if isinstance(article_filter, dict) else None
+            if (not isinstance(process_status, int) or isinstance(process_status, bool)
+                    or not isinstance(article_filter.get('source_type') or '', str)):
+                return jsonify({
+                    'status': 'error',
+                    'message': 'filter 格式错误，应为 {"source_type": "WUHU", "process_status": 0}'
+                }), 400
+            query = query.filter(NormalizedArticle.process_status == process_status)
+            if article_filter.get('source_type'):
+                query = query.filter(NormalizedArticle.source_type == article_filter['source_type'])
+            rows = query.order_by(NormalizedArticle.created_at.desc()).limit(max_items).all()
         else:
             return jsonify({
                 'status': 'error',
-                'message': message
-            }), 500
+                'message': '请提供 nids 或 filter'
+            }), 400
+        
+        articles = [{'nid': nid, 'title': title, 'content': content} for nid, title, content in rows]
+        if not articles:
+            return jsonify({
+                'status': 'error',
+                'message': '没有符合条件的文章'
+            }), 404
+        
+        force = data.get('force') is True
+        
+        def generate():
+            total = len(articles) * len(tasks)
+            stats = {'total': total, 'success': 0, 'failed': 0}
+            yield f"data: {json.dumps({'type': 'start', 'total': total, 'nids': [a['nid'] for a in articles]}, ensure_ascii=False)}\n\n"
+            
+            events = run_batch(app, articles, tasks=tasks, force=force,
+                               max_workers=app.config['AI_BATCH_CONCURRENCY'])
+            try:
+                for event in events:
+                    if event['status'] == 'success':
+                        stats['success'] += 1
+                    else:
+                        stats['failed'] += 1
+                    if event.get('cover_path'):
+                        event['cover_url'] = url_for('static', filename=event['cover_path'])
+                    event.update(type='item', done=stats['success'] + stats['failed'], total=total)
+                    yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            except GeneratorExit:
+                print(f"[批量生成] 客户端已断开，取消剩余任务（已完成 {stats['success'] + stats['failed']}/{total} 项）")
+                raise
+            finally:
+                # 客户端断开时响应生成器被关闭，同时关闭 run_batch 以取消尚未开始的任务
+                events.close()
+            
+            print(f"[批量生成] 完成，成功 {stats['success']} 项，失败 {stats['failed']} 项")
+            yield f"data: {json.dumps({'type': 'done', **stats}, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({
             'status': 'error',
-            'message': f'生成封面失败: {str(e)}'
+            'message': f'批量生成失败: {str(e)}'
         }), 500
 
 @app.route('/api/<article_type>/<int:article_id>/publish-ai-content', methods=['POST'])
@@ -751,9 +1261,9 @@ def publish_ai_content(article_type, article_id):
         # 拼接内容：摘要在前，content在后，中间换行
         combined_markdown = f"{summary}\n\n{content}"
         
-        # 使用 mdtowechat.py 转换成HTML
-        from services.mdtowechat import markdown_to_wechat
-        content_html = markdown_to_wechat(combined_markdown)
+        # 使用 mdtowechat.py 转换成HTML（内容未变化时直接使用缓存的转换结果）
+        from services.wechat_html import markdown_to_wechat_cached
+        content_html = markdown_to_wechat_cached(combined_markdown)
         
         # 检查是否已存在该文章的发布记录
         existing_publish = PublishArticle.query.filter_by(
@@ -862,17 +1372,21 @@ def update_publish_article(pid):
 
 @app.route('/api/publish-to-wechat/<int:pid>', methods=['POST'])
 def publish_to_wechat_api(pid):
-    """发布文章到微信公众号草稿箱"""
+    """发布文章到微信公众号草稿箱（后台执行，返回任务ID）"""
     try:
-        from services.publish import publish_to_wechat
+        from services.wechat_publish import WechatPublisher, publish_dedupe_key
         
-        # 调用发布方法
-        result = publish_to_wechat(pid)
+        PublishArticle.query.get_or_404(pid)
         
-        if result['success']:
-            return jsonify(result)
-        else:
-            return jsonify(result), 500
+        def publish_job(ctx):
+            # 与批量发布共用 access_token 缓存和已上传图片记录
+            result = WechatPublisher().publish(pid)
+            if not result['success']:
+                raise JobError(result.get('message', '发布失败'), result)
+            return result
+        
+        job, created = job_manager.submit('publish_wechat', publish_job, dedupe_key=publish_dedupe_key(pid))
+        return job_submitted_response(job, created, '已提交发布任务')
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -881,12 +1395,59 @@ def publish_to_wechat_api(pid):
             'message': f'发布接口异常: {str(e)}'
         }), 500
 
+@app.route('/api/publish-to-wechat/batch', methods=['POST'])
+def batch_publish_to_wechat_api():
+    """批量发布文章到微信公众号草稿箱（后台执行，返回任务ID，结果中包含每篇文章的发布结果）"""
+    try:
+        data = request.get_json() or {}
+        try:
+            pids = list(dict.fromkeys(parse_id_list(data.get('pids') or [])))
+        except ValueError:
+            return jsonify({
+                'status': 'error',
+                'message': '文章ID格式错误'
+            }), 400
+        
+        if not pids:
+            return jsonify({
+                'status': 'error',
+                'message': '请选择要发布的文章'
+            }), 400
+        
+        max_items = app.config['WECHAT_BATCH_MAX_ITEMS']
+        if len(pids) > max_items:
+            return jsonify({
+                'status': 'error',
+                'message': f'单次最多发布 {max_items} 篇文章'
+            }), 400
+        
+        def batch_publish_job(ctx):
+            from services.wechat_publish import WechatPublisher
+            
+            result = WechatPublisher().publish_many(pids, ctx=ctx)
+            if not result['success']:
+                raise JobError('全部文章发布失败', result)
+            result['message'] = f"发布完成，成功 {result['success']} 篇，失败 {result['failed']} 篇"
+            return result
+        
+        # 相同的文章集合同时只允许一个任务（文章ID列表取哈希，避免超出去重键长度）；
+        # 与其他任务重叠的文章在执行时按 publish_wechat:{pid} 去重
+        pid_digest = hashlib.sha1(','.join(str(pid) for pid in sorted(pids)).encode('utf-8')).hexdigest()
+        job, created = job_manager.submit('publish_wechat_batch', batch_publish_job,
+                                          dedupe_key=f'publish_wechat_batch:{pid_digest}')
+        return job_submitted_response(job, created, f'已提交批量发布任务（{len(pids)} 篇）')
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'批量发布接口异常: {str(e)}'
+        }), 500
+
 @app.route('/api/publish-to-website/<int:pid>', methods=['POST'])
 def publish_to_website_api(pid):
-    """发布文章到远程网站数据库"""
+    """发布文章到远程网站数据库（已发布过的文章更新网站上的内容）"""
     try:
-        import pymysql
-        from pymysql.cursors import DictCursor
+        from sqlalchemy.exc import SQLAlchemyError
+        from services.website_publish import publish_article
         
         # 获取本地文章
         article = PublishArticle.query.get_or_404(pid)
@@ -898,77 +1459,81 @@ def publish_to_website_api(pid):
                 'message': '只能发布特检类型的文章到网站'
             }), 400
         
-        # 连接远程数据库
-        connection = pymysql.connect(
-            host=app.config['REMOTE_DB_HOST'],
-            port=int(app.config['REMOTE_DB_PORT']),
-            user=app.config['REMOTE_DB_USER'],
-            password=app.config['REMOTE_DB_PASSWORD'],
-            database=app.config['REMOTE_DB_NAME'],
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
         try:
-            with connection.cursor() as cursor:
-                # 检查是否已经发布过（根据 nid 查询）
-                check_sql = "SELECT wid FROM website_articles WHERE nid = %s"
-                cursor.execute(check_sql, (article.nid,))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    return jsonify({
-                        'success': False,
-                        'message': '该文章已经发布到网站'
-                    }), 400
-                
-                # 插入到远程数据库
-                insert_sql = """
-                    INSERT INTO website_articles 
-                    (nid, title, content, cover_url, source_url, target_platform, publish_status, platform_article_id, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(insert_sql, (
-                    article.nid,
-                    article.title,
-                    article.content_html,
-                    article.cover_url,
-                    article.source_url,
-                    article.target_platform,
-                    article.publish_status,
-                    article.platform_article_id,
-                    article.created_at,
-                    article.updated_at
-                ))
-                
-                connection.commit()
-                wid = cursor.lastrowid
-                
-            # 更新本地文章的发布状态
-            article.publish_status = 1  # 设置为已发布
-            article.platform_article_id = f'website_{wid}'  # 记录远程 wid
-            article.updated_at = datetime.now()
-            db.session.commit()
-                
+            # 按 nid 插入或更新，使用连接池中的远程连接
+            wid, created = publish_article(article)
+        except SQLAlchemyError as e:
+            db.session.rollback()
             return jsonify({
-                'success': True,
-                'message': '文章已成功发布到网站',
-                'wid': wid
-            })
-        finally:
-            connection.close()
-            
-    except pymysql.Error as e:
+                'success': False,
+                'message': f'数据库错误: {str(e)}'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'message': '文章已成功发布到网站' if created else '文章已更新到网站',
+            'wid': wid,
+            'created': created
+        })
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
         return jsonify({
             'success': False,
-            'message': f'数据库错误: {str(e)}'
+            'message': f'发布失败: {str(e)}'
         }), 500
+
+@app.route('/api/publish-to-website/batch', methods=['POST'])
+def batch_publish_to_website_api():
+    """批量发布特检文章到远程网站数据库（一个事务内完成）"""
+    try:
+        from sqlalchemy.exc import SQLAlchemyError
+        from services.website_publish import publish_articles
+        
+        data = request.get_json() or {}
+        try:
+            pids = list(dict.fromkeys(parse_id_list(data.get('pids') or [])))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '文章ID格式错误'
+            }), 400
+        
+        if not pids:
+            return jsonify({
+                'success': False,
+                'message': '请选择要发布的文章'
+            }), 400
+        
+        articles = PublishArticle.query.filter(PublishArticle.pid.in_(pids)).all()
+        found = {article.pid for article in articles}
+        skipped = [
+            {'pid': article.pid, 'message': '只能发布特检类型的文章到网站'}
+            for article in articles if article.target_platform != 'TEJIAN'
+        ] + [{'pid': pid, 'message': '文章不存在'} for pid in pids if pid not in found]
+        articles = [article for article in articles if article.target_platform == 'TEJIAN']
+        
+        try:
+            wids = publish_articles(articles)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'数据库错误: {str(e)}'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'message': f'已发布 {len(articles)} 篇文章到网站，跳过 {len(skipped)} 篇',
+            'published': [{'pid': article.pid, 'nid': article.nid, 'wid': wids[article.nid]} for article in articles],
+            'skipped': skipped
+        })
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({
             'success': False,
-            'message': f'发布失败: {str(e)}'
+            'message': f'批量发布失败: {str(e)}'
         }), 500
 
 @app.route('/api/raw-article/<int:article_id>/discard', methods=['POST'])
@@ -1057,8 +1622,8 @@ def publish_to_website(article_id):
         
         # 使用 mdtowechat 转换 Markdown 为微信HTML
         print(f"[微信发布] 开始转换文章: {article.title}")
-        from services.mdtowechat import markdown_to_wechat
-        content_html = markdown_to_wechat(article.content)
+        from services.wechat_html import markdown_to_wechat_cached
+        content_html = markdown_to_wechat_cached(article.content)
         print(f"[微信发布] HTML转换完成，长度: {len(content_html)} 字符")
         
         # 处理封面路径：转换为绝对路径
@@ -1138,7 +1703,7 @@ def publish_to_website(article_id):
 def ai_chat():
     """AI对话接口，支持流式输出"""
     try:
-        from openai import OpenAI
+        from services.llm_client import stream_chat
         import json
         
         data = request.get_json()
@@ -1151,12 +1716,6 @@ def ai_chat():
                 'message': '消息不能为空'
             }), 400
         
-        # 初始化OpenAI客户端
-        client = OpenAI(
-            base_url='https://api-inference.modelscope.cn/v1',
-            api_key='ms-3069d74f-5376-49c8-83f5-bc59ac46a9a4',
-        )
-        
         # 构建系统提示词
         system_prompt = f"""你是一位专业的文章润色助手。你的任务是帮助用户改进文章内容。
 
@@ -1183,19 +1742,10 @@ def ai_chat():
         # 定义流式生成函数
         def generate():
             try:
-                # 调用OpenAI API，启用流式输出
-                response = client.chat.completions.create(
-                    model='Qwen/Qwen3-235B-A22B-Instruct-2507',
-                    messages=full_messages,
-                    stream=True
-                )
-                
-                # 逐块发送数据
-                for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        # 使用SSE格式发送
-                        yield f"data: {json.dumps({'content': content}, ensure_ascii=False)}\n\n"
+                # 使用共享客户端调用API，启用流式输出，逐块发送数据
+                for content in stream_chat(full_messages):
+                    # 使用SSE格式发送
+                    yield f"data: {json.dumps({'content': content}, ensure_ascii=False)}\n\n"
                 
                 # 发送完成标记
                 yield "data: [DONE]\n\n"
@@ -1224,5 +1774,15 @@ def ai_chat():
             'message': f'对话失败: {str(e)}'
         }), 500
 
+@app.route('/api/ai-chat/stats')
+def ai_chat_stats():
+    """AI对话的首字延迟和输出速度统计（最近200次）"""
+    from services.llm_client import chat_metrics
+    
+    return jsonify({
+        'status': 'success',
+        'data': chat_metrics.stats()
+    })
+
 if __name__ == '__main__':
     app.run(debug=True)
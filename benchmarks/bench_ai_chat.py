@@ -0,0 +1,103 @@
+"""
+AI对话客户端基准测试
+
+在本地启动一个 OpenAI 兼容的流式桩服务，对比每次请求新建客户端（旧做法）
+与共享客户端（services.llm_client）的首字延迟和输出速度。
+
+用法:
+    python benchmarks/bench_ai_chat.py --requests 30 --tokens 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_handler(tokens, token_delay):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(tokens):
+                time.sleep(token_delay)
+                chunk = {
+                    'id': 'stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'stub',
+                    'choices': [{'index': 0, 'delta': {'content': f'字{i}'}, 'finish_reason': None}]
+                }
+                self._write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+            self._write("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write(self, text):
+            data = text.encode('utf-8')
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def run(name, get_client, requests, model):
+    ttfts, rates = [], []
+    messages = [{'role': 'user', 'content': '润色这段话'}]
+    for _ in range(requests):
+        start = time.perf_counter()
+        client = get_client()
+        first = None
+        chunks = 0
+        for chunk in client.chat.completions.create(model=model, messages=messages, stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                first = first or time.perf_counter()
+                chunks += 1
+        end = time.perf_counter()
+        ttfts.append(first - start)
+        rates.append(chunks / (end - first) if end > first else 0)
+    print(f"{name:<14} TTFT 平均 {statistics.mean(ttfts) * 1000:7.1f}ms  "
+          f"中位 {statistics.median(ttfts) * 1000:7.1f}ms  输出 {statistics.mean(rates):8.1f} tokens/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AI对话客户端基准测试')
+    parser.add_argument('--requests', type=int, default=30, help='请求次数')
+    parser.add_argument('--tokens', type=int, default=50, help='每次输出的token数')
+    parser.add_argument('--token-delay', type=float, default=0.002, help='桩服务每个token的间隔（秒）')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.tokens, args.token_delay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+    from flask import Flask
+    from openai import OpenAI
+
+    from config import Config
+    from services.llm_client import get_openai_client
+
+    # 共享客户端从应用配置中读取接口地址
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(MODELSCOPE_BASE_URL=base_url, MODELSCOPE_API_KEY='stub')
+
+    run('每次新建客户端', lambda: OpenAI(base_url=base_url, api_key='stub'), args.requests, 'stub')
+    with app.app_context():
+        run('共享客户端', get_openai_client, args.requests, 'stub')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
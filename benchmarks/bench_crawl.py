@@ -0,0 +1,78 @@
+"""
+并发抓取基准测试
+
+在本地启动一个带固定延迟的HTTP桩服务，对比不同并发数下
+services.http_client.ConcurrentFetcher 的抓取吞吐量。
+
+用法:
+    python benchmarks/bench_crawl.py
+    python benchmarks/bench_crawl.py --pages 200 --latency 0.1 --concurrency 1 4 16 --rate 0
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import ConcurrentFetcher, create_session
+
+PAGE_BODY = ('<html><body><div id="js_content">' + '<p>特种设备检验检测</p>' * 500 + '</div></body></html>').encode('utf-8')
+
+
+def make_handler(latency):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(PAGE_BODY)))
+            self.end_headers()
+            self.wfile.write(PAGE_BODY)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并发抓取基准测试')
+    parser.add_argument('--pages', type=int, default=100, help='抓取页面数')
+    parser.add_argument('--latency', type=float, default=0.05, help='桩服务每个请求的延迟（秒）')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='测试的并发数')
+    parser.add_argument('--rate', type=float, default=0, help='每主机每秒请求数，0 表示不限速')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    urls = [f'{base_url}/s/article{i}' for i in range(args.pages)]
+
+    print(f"页面数: {args.pages}，桩服务延迟: {args.latency}s，限速: {args.rate or '不限'}")
+    print(f"旧的顺序抓取(delay=1)预计耗时: {args.pages * (1 + args.latency):.1f}s")
+    baseline = None
+    for concurrency in args.concurrency:
+        fetcher = ConcurrentFetcher(
+            max_in_flight=concurrency,
+            rate_per_host=args.rate,
+            burst=concurrency,
+            session=create_session(pool_size=concurrency)
+        )
+        start = time.perf_counter()
+        ok = sum(1 for _, response, error in fetcher.fetch_all(urls) if error is None)
+        elapsed = time.perf_counter() - start
+        throughput = args.pages / elapsed
+        baseline = baseline or throughput
+        print(f"并发 {concurrency:>3}: {elapsed:7.2f}s  {throughput:8.1f} 页/秒  成功 {ok}  ({throughput / baseline:.1f}x)")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Markdown渲染基准测试
+
+对比每次调用 markdown.markdown()（旧做法）与复用线程转换器
+（services.render.render_markdown）的吞吐量，并校验两者输出一致。
+
+用法:
+    python benchmarks/bench_markdown.py                 # 使用内置样例语料
+    python benchmarks/bench_markdown.py --dir corpus/   # 使用目录下的 .md 文件
+    python benchmarks/bench_markdown.py --from-db 50    # 从 normalized_articles 读取最新50篇
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown
+
+from services.render import MARKDOWN_EXTENSIONS, render_markdown
+
+
+def build_sample_corpus(count=20):
+    """生成与 normalized_articles 内容结构相近的样例文章"""
+    corpus = []
+    for i in range(count):
+        sections = []
+        for j in range(8):
+            sections.append(f"## 第{j + 1}部分：特种设备检验要点\n")
+            sections.append(
+                "根据《特种设备安全法》的要求，使用单位应当建立岗位责任、隐患治理、应急救援等安全管理制度，\n"
+                "制定操作规程，保证特种设备安全运行。检验机构应当按照安全技术规范的要求进行检验。\n"
+            )
+            sections.append(f"![图片{j}](static/images/SHgnw6-sgzUoB_AaV8Of{i}/{j:02d}.jpg)\n")
+            sections.append(
+                "- 检查压力表、安全阀是否在有效期内\n"
+                "- 核对铭牌参数与使用登记证是否一致\n"
+                "- **重点**：记录异常情况并及时上报\n"
+            )
+            sections.append(
+                "| 项目 | 周期 | 责任人 |\n"
+                "| --- | --- | --- |\n"
+                "| 定期检验 | 1年 | 检验员 |\n"
+                "| 自行检查 | 1月 | 管理员 |\n"
+            )
+            sections.append(
+                "```python\n"
+                "def check(device):\n"
+                "    for item in device.items:\n"
+                "        if not item.ok:\n"
+                f"            report(item, level={j})\n"
+                "```\n"
+            )
+        corpus.append('\n'.join(sections))
+    return corpus
+
+
+def load_dir_corpus(path):
+    corpus = []
+    for filename in sorted(os.listdir(path)):
+        if filename.endswith('.md'):
+            with open(os.path.join(path, filename), 'r', encoding='utf-8') as f:
+                corpus.append(f.read())
+    return corpus
+
+
+def load_db_corpus(limit):
+    from app import app
+    from services.models import NormalizedArticle
+
+    with app.app_context():
+        articles = NormalizedArticle.query.order_by(NormalizedArticle.created_at.desc()).limit(limit).all()
+        return [article.content for article in articles if article.content]
+
+
+def per_call(text):
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def run(name, func, corpus, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            func(text)
+    elapsed = time.perf_counter() - start
+    total = rounds * len(corpus)
+    print(f"{name:<12} {total:>6} 次  {elapsed:8.3f}s  {total / elapsed:10.1f} 次/秒")
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown渲染基准测试')
+    parser.add_argument('--dir', help='包含 .md 文件的语料目录')
+    parser.add_argument('--from-db', type=int, metavar='N', help='从数据库读取最新N篇文章作为语料')
+    parser.add_argument('--rounds', type=int, default=5, help='语料重复轮数')
+    args = parser.parse_args()
+
+    if args.dir:
+        corpus = load_dir_corpus(args.dir)
+    elif args.from_db:
+        corpus = load_db_corpus(args.from_db)
+    else:
+        corpus = build_sample_corpus()
+
+    if not corpus:
+        print("语料为空")
+        return
+
+    print(f"语料: {len(corpus)} 篇，平均 {sum(len(t) for t in corpus) // len(corpus)} 字符")
+
+    for text in corpus:
+        if per_call(text) != render_markdown(text):
+            print("输出不一致！")
+            sys.exit(1)
+
+    old = run('per-call', per_call, corpus, args.rounds)
+    new = run('reused', render_markdown, corpus, args.rounds)
+    print(f"提升: {new / old:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+微信HTML转换回归与基准测试
+
+1. 校验缓存转换（services.wechat_html）与直接调用 markdown_to_wechat 的输出逐字节一致；
+2. 可保存转换结果作为基准（--record），之后修改 mdtowechat.py 时用 --check 对比，
+   确认优化后的转换器输出没有变化；
+3. 分别测量直接转换、缓存未命中（每次转换前清空缓存，即首次转换每篇文章的成本，
+   包含计算缓存键的开销）和缓存命中（同一篇重复转换）的吞吐量。
+   命中的吞吐量只说明重复转换同一篇时的上限，实际收益取决于线上的命中率（见缓存统计）。
+
+用法:
+    python benchmarks/bench_mdtowechat.py                          # 使用内置样例语料
+    python benchmarks/bench_mdtowechat.py --from-db 50             # 从 normalized_articles 读取最新50篇
+    python benchmarks/bench_mdtowechat.py --record golden/         # 保存当前转换结果
+    python benchmarks/bench_mdtowechat.py --check golden/          # 与保存的结果逐字节对比
+"""
+import argparse
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_markdown import build_sample_corpus, load_dir_corpus, load_db_corpus, run
+
+from services.mdtowechat import markdown_to_wechat
+from services.wechat_html import markdown_to_wechat_cached, wechat_html_cache
+
+
+def golden_path(folder, text):
+    return os.path.join(folder, hashlib.sha256(text.encode('utf-8')).hexdigest()[:16] + '.html')
+
+
+def record(corpus, folder):
+    os.makedirs(folder, exist_ok=True)
+    for text in corpus:
+        with open(golden_path(folder, text), 'wb') as f:
+            f.write(markdown_to_wechat(text).encode('utf-8'))
+    print(f"已保存 {len(corpus)} 篇转换结果到 {folder}")
+
+
+def check(corpus, folder):
+    mismatched = missing = 0
+    for text in corpus:
+        path = golden_path(folder, text)
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        with open(path, 'rb') as f:
+            if f.read() != markdown_to_wechat(text).encode('utf-8'):
+                mismatched += 1
+                print(f"输出与基准不一致: {path}")
+    print(f"基准对比: {len(corpus) - missing} 篇，不一致 {mismatched} 篇，缺少基准 {missing} 篇")
+    return mismatched == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='微信HTML转换回归与基准测试')
+    parser.add_argument('--dir', help='包含 .md 文件的语料目录')
+    parser.add_argument('--from-db', type=int, metavar='N', help='从数据库读取最新N篇文章作为语料')
+    parser.add_argument('--rounds', type=int, default=5, help='语料重复轮数')
+    parser.add_argument('--record', metavar='DIR', help='保存当前转换结果作为基准')
+    parser.add_argument('--check', metavar='DIR', help='与保存的基准逐字节对比')
+    args = parser.parse_args()
+
+    if args.dir:
+        corpus = load_dir_corpus(args.dir)
+    elif args.from_db:
+        corpus = load_db_corpus(args.from_db)
+    else:
+        corpus = build_sample_corpus()
+
+    if not corpus:
+        print("语料为空")
+        return
+
+    print(f"语料: {len(corpus)} 篇，平均 {sum(len(t) for t in corpus) // len(corpus)} 字符")
+
+    if args.record:
+        record(corpus, args.record)
+        return
+    if args.check and not check(corpus, args.check):
+        sys.exit(1)
+
+    for text in corpus:
+        # 第一次未命中、第二次命中，两次都必须与直接转换一致
+        expected = markdown_to_wechat(text)
+        if markdown_to_wechat_cached(text) != expected or markdown_to_wechat_cached(text) != expected:
+            print("缓存输出不一致！")
+            sys.exit(1)
+
+    def convert_cold(text):
+        wechat_html_cache.clear()
+        return markdown_to_wechat_cached(text)
+
+    direct = run('direct', markdown_to_wechat, corpus, args.rounds)
+    cold = run('cached-miss', convert_cold, corpus, args.rounds)
+    wechat_html_cache.clear()
+    run('cached-hit', markdown_to_wechat_cached, corpus, args.rounds)
+    print(f"缓存未命中的吞吐量为直接转换的 {cold / direct:.2f} 倍（差值为计算缓存键和写缓存的开销）")
+    print(f"缓存统计: {wechat_html_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
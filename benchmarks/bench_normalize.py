@@ -0,0 +1,164 @@
+"""
+正文规范化（HTML → Markdown）回归与基准测试
+
+1. 校验 services.normalize 的输出与 normalize_corpus/ 中保存的基准 Markdown 逐字节一致
+   （基准由旧的 BeautifulSoup 转换生成；01_basic 中 <br/> 被 html.parser 当作容器、丢失后续文字，
+   该处基准为修正后的输出）；
+2. 对比旧的 BeautifulSoup 转换、lxml 转换和进程池批量转换的吞吐量（篇/秒）；
+3. 在独立子进程中分别测量两种转换的峰值内存（RSS 增量，包含 lxml 在C层分配的内存）。
+
+用法:
+    python benchmarks/bench_normalize.py                   # 使用 normalize_corpus/ 语料
+    python benchmarks/bench_normalize.py --from-db 50      # 从 source_articles 读取最新50篇（只对比新旧输出）
+    python benchmarks/bench_normalize.py --record          # 修改转换规则后重新生成基准
+    python benchmarks/bench_normalize.py --processes 4 --rounds 10
+    python benchmarks/bench_normalize.py --scale 20        # 每篇语料重复20次，模拟超长文章
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.legacy_bs4_markdown import html_to_markdown as legacy_html_to_markdown
+
+from services.normalize import html_to_markdown, normalize_many
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'normalize_corpus')
+ENGINES = {'bs4': legacy_html_to_markdown, 'lxml': html_to_markdown}
+
+
+def load_golden_corpus(path=CORPUS_DIR):
+    """返回 [(名称, HTML, 基准Markdown或None)]"""
+    corpus = []
+    for filename in sorted(os.listdir(path)):
+        if not filename.endswith('.html'):
+            continue
+        with open(os.path.join(path, filename), 'r', encoding='utf-8') as f:
+            content = f.read()
+        golden_path = os.path.join(path, filename[:-5] + '.md')
+        expected = None
+        if os.path.exists(golden_path):
+            with open(golden_path, 'r', encoding='utf-8', newline='') as f:
+                expected = f.read()
+        corpus.append((filename[:-5], content, expected))
+    return corpus
+
+
+def load_db_corpus(limit):
+    from app import app
+    from services.models import SourceArticle
+
+    with app.app_context():
+        articles = SourceArticle.query.order_by(SourceArticle.created_at.desc()).limit(limit).all()
+        return [(str(article.sid), article.content, None) for article in articles if article.content]
+
+
+def record(corpus, path=CORPUS_DIR):
+    for name, content, _ in corpus:
+        with open(os.path.join(path, name + '.md'), 'w', encoding='utf-8', newline='') as f:
+            f.write(html_to_markdown(content))
+    print(f"已重新生成 {len(corpus)} 篇基准到 {path}")
+
+
+def check(corpus):
+    """与基准对比；没有基准时（数据库语料）与旧转换对比"""
+    mismatched = 0
+    for name, content, expected in corpus:
+        expected = legacy_html_to_markdown(content) if expected is None else expected
+        if html_to_markdown(content) != expected:
+            mismatched += 1
+            print(f"输出与基准不一致: {name}")
+    print(f"基准对比: {len(corpus)} 篇，不一致 {mismatched} 篇")
+    return mismatched == 0
+
+
+def run(name, func, contents, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(contents)
+    elapsed = time.perf_counter() - start
+    total = rounds * len(contents)
+    print(f"{name:<12} {total:>6} 篇  {elapsed:8.3f}s  {total / elapsed:10.1f} 篇/秒")
+    return total / elapsed
+
+
+def measure_memory(engine, source, rounds, scale):
+    """在子进程中运行一种转换，返回峰值RSS增量（KB）"""
+    command = [sys.executable, os.path.abspath(__file__), '--measure', engine, '--rounds', str(rounds),
+               '--scale', str(scale)]
+    if source:
+        command += ['--from-db', str(source)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return int(output.strip().splitlines()[-1])
+
+
+def peak_rss():
+    """当前进程的峰值RSS（KB）
+
+    Linux 上 ru_maxrss 会从父进程继承，优先读取 exec 后重新计数的 VmHWM。
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_child(engine, contents, rounds):
+    func = ENGINES[engine]
+    # 先转换一篇，排除导入和首次初始化的内存
+    func(contents[0])
+    before = peak_rss()
+    for _ in range(rounds):
+        for content in contents:
+            func(content)
+    print(peak_rss() - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='正文规范化回归与基准测试')
+    parser.add_argument('--from-db', type=int, metavar='N', help='从数据库读取最新N篇 source_articles 作为语料')
+    parser.add_argument('--rounds', type=int, default=5, help='语料重复轮数')
+    parser.add_argument('--processes', type=int, default=2, help='批量转换的进程数')
+    parser.add_argument('--scale', type=int, default=1, help='每篇语料重复的次数（模拟超长文章）')
+    parser.add_argument('--record', action='store_true', help='用当前转换重新生成基准')
+    parser.add_argument('--measure', choices=sorted(ENGINES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    corpus = load_db_corpus(args.from_db) if args.from_db else load_golden_corpus()
+    if not corpus:
+        print("语料为空")
+        return
+    if args.record:
+        record(corpus)
+        return
+    contents = [content * args.scale for _, content, _ in corpus]
+    if args.measure:
+        measure_child(args.measure, contents, args.rounds)
+        return
+
+    if not check(corpus):
+        sys.exit(1)
+    print(f"语料: {len(corpus)} 篇，平均 {sum(len(c) for c in contents) // len(contents)} 字符")
+
+    old = run('bs4', lambda items: [legacy_html_to_markdown(c) for c in items], contents, args.rounds)
+    new = run('lxml', lambda items: [html_to_markdown(c) for c in items], contents, args.rounds)
+    # 预先启动进程池，不把子进程启动时间计入
+    normalize_many(contents[:args.processes * 2], processes=args.processes)
+    batch = run(f'lxml x{args.processes}进程', lambda items: normalize_many(items, processes=args.processes),
+                contents, args.rounds)
+    print(f"提升: lxml {new / old:.2f}x，批量 {batch / old:.2f}x")
+
+    for engine in sorted(ENGINES):
+        print(f"峰值内存增量 {engine:<5} {measure_memory(engine, args.from_db, args.rounds, args.scale) / 1024:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
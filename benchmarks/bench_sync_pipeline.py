@@ -0,0 +1,120 @@
+"""
+同步流水线基准测试
+
+在本地启动一个带固定延迟的文章页面桩服务，对比:
+1. 逐篇串行: 下载 → 解析/转换 Markdown（旧的同步方式）；
+2. 流水线: 多线程下载与进程池解析重叠执行（services.pipeline）。
+不写数据库，只比较网络和CPU阶段的重叠效果，并输出各阶段的统计。
+
+用法:
+    python benchmarks/bench_sync_pipeline.py
+    python benchmarks/bench_sync_pipeline.py --pages 200 --latency 0.1 --fetchers 8 --processes 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import ConcurrentFetcher, create_session
+from services.pipeline import Pipeline, get_process_pool
+from services.wechat_article import article_from_download
+
+PAGE_BODY = (
+    '<html><body><h1 id="activity-name">特种设备检验要点</h1><div id="js_content">'
+    + '<section><p>根据<strong>《特种设备安全法》</strong>的要求，使用单位应当建立安全管理制度。</p>'
+      '<ul><li>检查压力表</li><li>核对铭牌参数</li></ul>'
+      '<img data-src="https://mmbiz.qpic.cn/mmbiz_png/abc/640?wx_fmt=png"></section>' * 200
+    + '</div></body></html>'
+).encode('utf-8')
+
+
+def make_handler(latency):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(PAGE_BODY)))
+            self.end_headers()
+            self.wfile.write(PAGE_BODY)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def make_items(base_url, pages):
+    return [{'link': f'{base_url}/s/article{i}', 'title': '', 'author_name': None, 'cover_url': None}
+            for i in range(pages)]
+
+
+def run_sequential(items, session):
+    for item in items:
+        response = session.get(item['link'], timeout=15)
+        response.encoding = 'utf-8'
+        article_from_download({'item': item, 'html': response.text})
+    return len(items)
+
+
+def run_pipeline(items, fetcher, processes):
+    def download(item):
+        response = fetcher.fetch(item['link'])
+        response.encoding = 'utf-8'
+        return {'item': item, 'html': response.text}
+
+    pipeline = Pipeline('bench')
+    pipeline.add_stage('download', download, workers=fetcher.max_in_flight)
+    pipeline.add_stage('parse', article_from_download, workers=max(1, processes),
+                       executor=get_process_pool(processes) if processes > 0 else None)
+    pipeline.run(items)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description='同步流水线基准测试')
+    parser.add_argument('--pages', type=int, default=100, help='文章页面数')
+    parser.add_argument('--latency', type=float, default=0.05, help='桩服务每个请求的延迟（秒）')
+    parser.add_argument('--fetchers', type=int, default=8, help='下载线程数')
+    parser.add_argument('--processes', type=int, default=2, help='解析进程数，0 表示在线程中解析')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    items = make_items(base_url, args.pages)
+    session = create_session(pool_size=args.fetchers)
+
+    print(f"页面数: {args.pages}，页面大小: {len(PAGE_BODY) // 1024}KB，桩服务延迟: {args.latency}s")
+
+    start = time.perf_counter()
+    run_sequential(items, session)
+    sequential = time.perf_counter() - start
+    print(f"逐篇串行: {sequential:7.2f}s  {args.pages / sequential:8.1f} 篇/秒")
+
+    if args.processes > 0:
+        # 预先启动进程池，不把子进程启动时间计入
+        run_pipeline(make_items(base_url, args.processes * 2), ConcurrentFetcher(rate_per_host=0, session=session),
+                     args.processes)
+
+    fetcher = ConcurrentFetcher(max_in_flight=args.fetchers, rate_per_host=0, session=session)
+    start = time.perf_counter()
+    pipeline = run_pipeline(items, fetcher, args.processes)
+    pipelined = time.perf_counter() - start
+    print(f"流水线:   {pipelined:7.2f}s  {args.pages / pipelined:8.1f} 篇/秒  ({sequential / pipelined:.1f}x)")
+    for stage in pipeline.stats()['stages']:
+        print(f"  {stage['name']:<10} 处理 {stage['processed']:>5}  失败 {stage['failed']:>3}  "
+              f"忙碌 {stage['busy_seconds']:7.2f}s  {stage['per_second']:8.1f} 篇/秒")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
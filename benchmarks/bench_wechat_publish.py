@@ -0,0 +1,103 @@
+"""
+批量发布到微信基准测试
+
+对本地模拟服务（benchmarks/mock_wechat.py）批量发布文章，对比不同上传并发数的耗时，
+并统计 token 请求次数和图片上传次数（文章之间共用的图片只应上传一次）。
+使用临时 SQLite 数据库保存 token 和图片记录。
+
+用法:
+    python benchmarks/bench_wechat_publish.py
+    python benchmarks/bench_wechat_publish.py --articles 10 --images 8 --shared 3 --latency 0.05 --concurrency 1 4 8
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from PIL import Image
+
+from benchmarks.mock_wechat import start_mock_server
+
+
+def make_images(folder, count, prefix):
+    """生成 count 张内容不同的图片，返回相对 static 目录的URL列表"""
+    urls = []
+    for i in range(count):
+        filename = f'{prefix}{i}.png'
+        color = tuple(hashlib.md5(filename.encode('utf-8')).digest()[:3])
+        Image.new('RGB', (64, 64), color).save(os.path.join(folder, filename))
+        urls.append(f'/static/bench/{filename}')
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量发布到微信基准测试')
+    parser.add_argument('--articles', type=int, default=10, help='文章数')
+    parser.add_argument('--images', type=int, default=8, help='每篇文章的正文图片数')
+    parser.add_argument('--shared', type=int, default=3, help='其中所有文章共用的图片数（logo、二维码等）')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟服务每个请求的延迟（秒）')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8], help='测试的上传并发数')
+    args = parser.parse_args()
+
+    from config import Config
+    from services.jobs import job_manager
+    from services.models import db, NormalizedArticle, PublishArticle
+    from services.wechat_api import WechatClient
+    from services.wechat_publish import WechatPublisher
+
+    workdir = tempfile.mkdtemp(prefix='bench_wechat_')
+    static_folder = os.path.join(workdir, 'static', 'bench')
+    os.makedirs(static_folder)
+
+    # 客户端和发布器从应用配置中读取上传并发数、token 提前刷新时间等设置
+    app = Flask(__name__, root_path=workdir)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    app.config.pop('SQLALCHEMY_ENGINE_OPTIONS', None)
+    app.config.pop('SQLALCHEMY_BINDS', None)
+    db.init_app(app)
+    # 每篇文章作为 publish_wechat 任务执行
+    job_manager.init_app(app)
+
+    shared = make_images(static_folder, args.shared, 'shared')
+    server, base_url, state = start_mock_server(args.latency)
+    print(f"文章数: {args.articles}，每篇图片: {args.images}（共用 {args.shared}），接口延迟: {args.latency}s")
+
+    for round_no, concurrency in enumerate(args.concurrency):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            pids = []
+            for i in range(args.articles):
+                own = make_images(static_folder, args.images - args.shared, f'r{round_no}a{i}_')
+                content = ''.join(f'<p>段落</p><img src="{src}">' for src in shared + own)
+                cover_url = own[0] if own else shared[0]
+                if i % 2:
+                    # AI生成的封面保存为绝对文件路径
+                    cover_url = os.path.join(workdir, cover_url.lstrip('/'))
+                db.session.add(NormalizedArticle(nid=i + 1, title=f'文章{i}', content=content))
+                db.session.add(PublishArticle(pid=i + 1, nid=i + 1, title=f'文章{i}', content_html=content,
+                                              cover_url=cover_url, source_url='',
+                                              target_platform='WEIXIN'))
+                pids.append(i + 1)
+            db.session.commit()
+
+            state.calls.clear()
+            client = WechatClient(appid='bench', secret='bench', base_url=base_url)
+            publisher = WechatPublisher(client=client, max_workers=concurrency)
+            start = time.perf_counter()
+            result = publisher.publish_many(pids)
+            elapsed = time.perf_counter() - start
+            print(f"并发 {concurrency:>2}: {elapsed:6.2f}s  成功 {result['success']}/{result['total']}  "
+                  f"接口调用 {dict(state.calls)}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
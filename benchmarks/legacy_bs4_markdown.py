@@ -0,0 +1,119 @@
+"""
+旧的 BeautifulSoup 正文转换（html.parser），仅供基准测试对比
+
+services.normalize 的 lxml 转换引擎在 benchmarks/normalize_corpus 上的输出与它逐字节一致。
+"""
+import re
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+_BLOCK_TAGS = {'p', 'div', 'section', 'article', 'header', 'footer'}
+_HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# 包含这些标签的块需要递归处理
+_BLOCK_LEVEL_TAGS = _BLOCK_TAGS | _HEADING_TAGS | {'ul', 'ol', 'blockquote', 'pre', 'table', 'hr'}
+_SKIP_TAGS = {'script', 'style', 'noscript', 'svg', 'mpvoice', 'mpvideo', 'iframe'}
+
+
+def _inline(node):
+    """单个行内节点转换为 Markdown 文本"""
+    if isinstance(node, Comment):
+        return ''
+    if isinstance(node, NavigableString):
+        return re.sub(r'\s+', ' ', str(node))
+    if not isinstance(node, Tag) or node.name in _SKIP_TAGS:
+        return ''
+    if node.name == 'br':
+        return '  \n'
+    if node.name == 'img':
+        src = node.get('data-src') or node.get('src')
+        return f'![{node.get("alt", "")}]({src})' if src else ''
+    if node.name == 'code':
+        return f'`{node.get_text()}`'
+
+    text = _inline_text(node)
+    if node.name in ('strong', 'b'):
+        return f'**{text.strip()}**' if text.strip() else text
+    if node.name in ('em', 'i'):
+        return f'*{text.strip()}*' if text.strip() else text
+    if node.name == 'a' and node.get('href'):
+        return f'[{text.strip()}]({node["href"]})'
+    return text
+
+
+def _inline_text(node):
+    """节点的全部子节点转换为 Markdown 文本"""
+    return ''.join(_inline(child) for child in node.children)
+
+
+def _blocks(node, out):
+    """块级内容转换为 Markdown 段落，追加到 out"""
+    inline = []
+
+    def flush():
+        text = ''.join(inline).strip()
+        if text:
+            out.append(text)
+        inline.clear()
+
+    for child in node.children:
+        if not isinstance(child, Tag):
+            inline.append(_inline(child))
+            continue
+
+        name = child.name
+        if name in _HEADING_TAGS:
+            flush()
+            text = _inline_text(child).strip()
+            if text:
+                out.append(f"{'#' * int(name[1])} {text}")
+        elif name in ('ul', 'ol'):
+            flush()
+            items = []
+            for index, li in enumerate(child.find_all('li', recursive=False), 1):
+                marker = f'{index}.' if name == 'ol' else '-'
+                items.append(f'{marker} {_inline_text(li).strip()}')
+            if items:
+                out.append('\n'.join(items))
+        elif name == 'blockquote':
+            flush()
+            quoted = []
+            _blocks(child, quoted)
+            if quoted:
+                out.append('\n>\n'.join('> ' + block.replace('\n', '\n> ') for block in quoted))
+        elif name == 'pre':
+            flush()
+            out.append(f"```\n{child.get_text().rstrip()}\n```")
+        elif name == 'table':
+            flush()
+            rows = [[_inline_text(cell).strip().replace('|', '\\|') for cell in tr.find_all(['th', 'td'])]
+                    for tr in child.find_all('tr')]
+            rows = [row for row in rows if row]
+            if rows:
+                width = max(len(row) for row in rows)
+                rows = [row + [''] * (width - len(row)) for row in rows]
+                lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + ' --- |' * width]
+                lines += ['| ' + ' | '.join(row) + ' |' for row in rows[1:]]
+                out.append('\n'.join(lines))
+        elif name == 'hr':
+            flush()
+            out.append('---')
+        elif name in _BLOCK_TAGS:
+            flush()
+            # 只包含行内内容的块直接作为一个段落，否则递归处理
+            if child.find(list(_BLOCK_LEVEL_TAGS)):
+                _blocks(child, out)
+            else:
+                text = _inline_text(child).strip()
+                if text:
+                    out.append(text)
+        else:
+            inline.append(_inline(child))
+    flush()
+
+
+def html_to_markdown(html_content):
+    """正文HTML转换为 Markdown"""
+    soup = BeautifulSoup(html_content or '', 'html.parser')
+    blocks = []
+    _blocks(soup, blocks)
+    return '\n\n'.join(blocks).strip() + '\n'
@@ -0,0 +1,122 @@
+"""
+微信公众号接口模拟服务
+
+实现发布用到的接口（获取 token、上传正文图片、上传永久素材、新建草稿），每个请求带固定延迟，
+并统计各接口的调用次数。可以单独运行，把 WECHAT_API_BASE 指向它测试发布流程:
+
+    python benchmarks/mock_wechat.py --port 8900
+    WECHAT_API_BASE=http://127.0.0.1:8900 WECHAT_APPID=mock WECHAT_SECRET=mock python app.py
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class MockState:
+    """模拟服务状态：当前有效 token 和接口调用计数"""
+
+    def __init__(self, latency=0.05, expires_in=7200):
+        self.latency = latency
+        self.expires_in = expires_in
+        self.token = None
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def issue_token(self):
+        with self.lock:
+            self.token = uuid.uuid4().hex
+            self.calls['token'] += 1
+            return self.token
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+
+def make_handler(state):
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, data):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _check_token(self, query):
+            if query.get('access_token', [None])[0] != state.token:
+                self._reply({'errcode': 40001, 'errmsg': 'invalid credential'})
+                return False
+            return True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            time.sleep(state.latency)
+            if url.path == '/cgi-bin/token':
+                self._reply({'access_token': state.issue_token(), 'expires_in': state.expires_in})
+            else:
+                self._reply({'errcode': 404, 'errmsg': 'not found'})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(state.latency)
+            if not self._check_token(query):
+                return
+
+            digest = hashlib.sha256(body).hexdigest()[:16]
+            if url.path == '/cgi-bin/media/uploadimg':
+                state.count('uploadimg')
+                self._reply({'url': f'https://mmbiz.qpic.cn/mock/{digest}/0'})
+            elif url.path == '/cgi-bin/material/add_material':
+                state.count('add_material')
+                self._reply({'media_id': f'thumb_{digest}', 'url': f'https://mmbiz.qpic.cn/mock/{digest}/0'})
+            elif url.path == '/cgi-bin/draft/add':
+                state.count('draft_add')
+                articles = json.loads(body)['articles']
+                self._reply({'media_id': f'draft_{uuid.uuid4().hex[:12]}', 'item_count': len(articles)})
+            else:
+                self._reply({'errcode': 404, 'errmsg': 'not found'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockHandler
+
+
+def start_mock_server(latency=0.05, port=0):
+    """后台线程启动模拟服务，返回 (server, base_url, state)"""
+    state = MockState(latency)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}', state
+
+
+def main():
+    parser = argparse.ArgumentParser(description='微信公众号接口模拟服务')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.05, help='每个请求的延迟（秒）')
+    args = parser.parse_args()
+
+    server, base_url, state = start_mock_server(args.latency, args.port)
+    print(f"模拟服务已启动: {base_url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"调用次数: {dict(state.calls)}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
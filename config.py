@@ -13,7 +13,86 @@ class Config:
     
     # 文章显示配置
     ARTICLES_PER_PAGE = int(os.getenv('ARTICLES_PER_PAGE', '10'))  # 首页显示的文章数量
+    LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '20'))  # 爬虫/发布列表页每页显示的文章数量
     
+    # 文章渲染缓存配置
+    RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', '256'))  # 内存中缓存的文章数量
+    RENDER_CACHE_DIR = os.getenv('RENDER_CACHE_DIR', '')  # 磁盘缓存目录，留空则不启用
+
+    # 编辑器增量预览缓存配置
+    PREVIEW_CACHE_SIZE = int(os.getenv('PREVIEW_CACHE_SIZE', '200'))  # 最多缓存的文档数量
+    PREVIEW_CACHE_TTL = int(os.getenv('PREVIEW_CACHE_TTL', '1800'))  # 文档缓存过期时间（秒）
+
+    # 微信HTML转换缓存（按内容哈希）
+    WECHAT_HTML_CACHE_SIZE = int(os.getenv('WECHAT_HTML_CACHE_SIZE', '128'))  # 最多缓存的转换结果数量
+
+    # 统计接口缓存时间（秒）
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', '30'))
+
+    # Cookie有效性缓存（秒），同步请求成功/失败时也会更新
+    COOKIE_VALID_TTL = int(os.getenv('COOKIE_VALID_TTL', '300'))  # 有效结果的缓存时间
+    COOKIE_INVALID_TTL = int(os.getenv('COOKIE_INVALID_TTL', '30'))  # 无效结果的缓存时间
+    COOKIE_REFRESH_TIMEOUT = int(os.getenv('COOKIE_REFRESH_TIMEOUT', '300'))  # 无头刷新超过该时间未结束时允许重新开始（秒）
+
+    # 后台任务配置
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))  # 后台任务线程数
+    JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '7200'))  # 超过该时间无进度更新的任务视为失败
+    JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', '30'))  # 已结束任务记录的保留天数，0 表示不清理
+
+    # 微信文章同步配置
+    SYNC_INCREMENTAL = os.getenv('SYNC_INCREMENTAL', 'True').lower() == 'true'  # 按高水位增量同步
+    SYNC_LIST_PAGE_SIZE = int(os.getenv('SYNC_LIST_PAGE_SIZE', '5'))  # 每次列表请求的发布条数
+    SYNC_MAX_LIST_PAGES = int(os.getenv('SYNC_MAX_LIST_PAGES', '10'))  # 单次同步最多翻页数
+    SYNC_ACCOUNT_CONCURRENCY = int(os.getenv('SYNC_ACCOUNT_CONCURRENCY', '3'))  # 同时同步的公众号数
+    SYNC_ACCOUNT_RATE = float(os.getenv('SYNC_ACCOUNT_RATE', '0.5'))  # 每个公众号每秒列表请求数
+    PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '32'))  # 同步流水线各阶段之间的队列容量
+    PIPELINE_PARSE_PROCESSES = int(os.getenv('PIPELINE_PARSE_PROCESSES', '2'))  # 解析正文的进程数，0 表示在线程中解析
+    PIPELINE_BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', '20'))  # 图片本地化和入库每批文章数
+
+    # 并发抓取配置
+    CRAWL_MAX_IN_FLIGHT = int(os.getenv('CRAWL_MAX_IN_FLIGHT', '4'))  # 同时进行的最大请求数
+    CRAWL_RATE_PER_HOST = float(os.getenv('CRAWL_RATE_PER_HOST', '2'))  # 每个主机每秒请求数，0 表示不限速
+    CRAWL_BURST = int(os.getenv('CRAWL_BURST', '2'))  # 每个主机允许的突发请求数
+
+    # 大模型接口配置（魔搭社区）
+    MODELSCOPE_BASE_URL = os.getenv('MODELSCOPE_BASE_URL', 'https://api-inference.modelscope.cn/v1')
+    MODELSCOPE_API_KEY = os.getenv('MODELSCOPE_API_KEY', 'ms-3069d74f-5376-49c8-83f5-bc59ac46a9a4')
+    AI_CHAT_MODEL = os.getenv('AI_CHAT_MODEL', 'Qwen/Qwen3-235B-A22B-Instruct-2507')
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '120'))  # 请求总超时（秒）
+    LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))  # 连接超时（秒）
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))  # 失败重试次数（指数退避）
+    LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))  # 连接池大小
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))  # 空闲连接保留时间（秒）
+
+    # 摘要缓存配置
+    SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'Qwen/Qwen3-235B-A22B-Instruct-2507')  # 摘要使用的模型（缓存键的一部分）
+    SUMMARY_PROMPT_VERSION = os.getenv('SUMMARY_PROMPT_VERSION', '1')  # 修改摘要提示词后递增，使旧缓存失效
+    SUMMARY_CACHE_TTL_DAYS = int(os.getenv('SUMMARY_CACHE_TTL_DAYS', '30'))  # 缓存有效天数
+    SUMMARY_CACHE_MAX_ROWS = int(os.getenv('SUMMARY_CACHE_MAX_ROWS', '5000'))  # 最多缓存条数
+
+    # 批量AI生成配置
+    AI_BATCH_CONCURRENCY = int(os.getenv('AI_BATCH_CONCURRENCY', '3'))  # 同时进行的AI调用数
+    AI_BATCH_MAX_ITEMS = int(os.getenv('AI_BATCH_MAX_ITEMS', '50'))  # 单次批量最多处理的文章数
+
+    # 封面后处理配置
+    COVER_POSTPROCESS = os.getenv('COVER_POSTPROCESS', 'True').lower() == 'true'  # 是否裁剪为微信封面规格
+    COVER_JPEG_QUALITY = int(os.getenv('COVER_JPEG_QUALITY', '85'))
+    COVER_WEBP_QUALITY = int(os.getenv('COVER_WEBP_QUALITY', '80'))
+
+    # 图片库配置
+    IMAGE_GC_GRACE_HOURS = int(os.getenv('IMAGE_GC_GRACE_HOURS', '24'))  # 未被引用的图片保留时间（小时），保护刚上传尚未保存的图片
+    SYNC_LOCALIZE_IMAGES = os.getenv('SYNC_LOCALIZE_IMAGES', 'True').lower() == 'true'  # 同步时把文章图片下载到图片库
+    IMAGE_LOCALIZE_CONCURRENCY = int(os.getenv('IMAGE_LOCALIZE_CONCURRENCY', '8'))  # 同时下载的图片数
+    IMAGE_LOCALIZE_MAX_BYTES = int(os.getenv('IMAGE_LOCALIZE_MAX_BYTES', str(20 * 1024 * 1024)))  # 单张图片最大字节数
+
+    # 微信公众号接口配置
+    WECHAT_APPID = os.getenv('WECHAT_APPID', '')
+    WECHAT_SECRET = os.getenv('WECHAT_SECRET', '')
+    WECHAT_API_BASE = os.getenv('WECHAT_API_BASE', 'https://api.weixin.qq.com')  # 测试时可指向本地模拟服务
+    WECHAT_TOKEN_MARGIN = int(os.getenv('WECHAT_TOKEN_MARGIN', '300'))  # access_token 过期前多少秒刷新
+    WECHAT_UPLOAD_CONCURRENCY = int(os.getenv('WECHAT_UPLOAD_CONCURRENCY', '4'))  # 同时上传的图片数
+    WECHAT_BATCH_MAX_ITEMS = int(os.getenv('WECHAT_BATCH_MAX_ITEMS', '20'))  # 单次批量发布最多文章数
+
     # 本地数据库配置
     DB_HOST = os.getenv('DB_HOST', 'localhost')
     DB_PORT = os.getenv('DB_PORT', '3306')
@@ -35,6 +114,17 @@ class Config:
     # 远程数据库连接URI
     REMOTE_DATABASE_URI = f'mysql+pymysql://{REMOTE_DB_USER}:{REMOTE_DB_PASSWORD}@{REMOTE_DB_HOST}:{REMOTE_DB_PORT}/{REMOTE_DB_NAME}?charset=utf8mb4'
     
+    # 远程网站数据库作为 remote 绑定，使用连接池（经VPN连接，建立连接的开销大）
+    REMOTE_DB_POOL_SIZE = int(os.getenv('REMOTE_DB_POOL_SIZE', '3'))
+    SQLALCHEMY_BINDS = {
+        'remote': {
+            'url': REMOTE_DATABASE_URI,
+            'pool_size': REMOTE_DB_POOL_SIZE,
+            'pool_recycle': 1800,   # 早于VPN/服务器的空闲断开时间回收连接
+            'pool_pre_ping': True,  # 取出连接前检查是否有效
+        }
+    }
+    
     # 禁用SQLAlchemy的事件系统（可选，减少内存消耗）
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
@@ -53,9 +143,18 @@ class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
 
+class TestingConfig(Config):
+    """测试环境配置（tests/ 使用，数据库为 TEST_DB_DIR 目录下的 SQLite 文件）"""
+    TESTING = True
+    TEST_DB_DIR = os.getenv('TEST_DB_DIR', '.')
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+    SQLALCHEMY_BINDS = {'remote': f"sqlite:///{os.path.join(TEST_DB_DIR, 'remote.db')}"}
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
 # 配置字典
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
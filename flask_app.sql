@@ -76,4 +76,109 @@ CREATE TABLE `website_articles` (
   `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`wid`)
-) ENGINE=InnoDB AUTO_INCREMENT=14 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='网站发布表'
\ No newline at end of file
+) ENGINE=InnoDB AUTO_INCREMENT=14 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='网站发布表';
+
+-- 迁移: 列表页游标分页索引
+-- 爬虫列表按 source_type + process_status 过滤、按 (created_at, nid) 降序分页
+ALTER TABLE `normalized_articles`
+  ADD KEY `idx_type_status_created` (`source_type`, `process_status`, `created_at`, `nid`);
+
+-- 发布列表按 (created_at, pid) 降序分页
+ALTER TABLE `publish_articles`
+  ADD KEY `idx_created_at` (`created_at`, `pid`);
+
+-- 4. 后台任务表
+CREATE TABLE `jobs` (
+  `job_id` char(32) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `job_type` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '任务类型：crawl, sync, publish_wechat',
+  `dedupe_key` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '去重键',
+  `active_key` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '未结束时等于去重键，结束后为NULL',
+  `status` varchar(20) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT 'pending' COMMENT '状态：pending, running, success, error, cancelled',
+  `progress` text CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci COMMENT '进度计数器(JSON)',
+  `result` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci COMMENT '执行结果(JSON)',
+  `message` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `cancel_requested` tinyint(1) NOT NULL DEFAULT 0,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `started_at` datetime DEFAULT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`job_id`),
+  UNIQUE KEY `uk_active_key` (`active_key`),
+  KEY `idx_job_type_created` (`job_type`, `created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='后台任务表';
+
+-- 5. AI摘要缓存表
+CREATE TABLE `summary_cache` (
+  `cache_key` char(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT 'sha256(模型+提示词版本+内容)',
+  `summary` text CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `model` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `prompt_version` varchar(20) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `hit_count` int(11) NOT NULL DEFAULT 0,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `expires_at` datetime NOT NULL,
+  PRIMARY KEY (`cache_key`),
+  KEY `idx_created_at` (`created_at`),
+  KEY `idx_expires_at` (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='AI摘要缓存表';
+
+-- 6. 文章图片引用表（图片按内容哈希保存在 static/images/cas）
+CREATE TABLE `image_refs` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `nid` bigint(20) NOT NULL COMMENT '文章ID(normalized_articles.nid)',
+  `image_hash` char(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT '图片sha256',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_nid_hash` (`nid`, `image_hash`),
+  KEY `ix_image_refs_image_hash` (`image_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='文章图片引用表';
+
+-- 7. 微信 access_token 缓存表（多进程共享，过期前才刷新）
+CREATE TABLE `wechat_tokens` (
+  `appid` varchar(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  `access_token` varchar(512) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  `expires_at` datetime NOT NULL,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`appid`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='微信access_token缓存表';
+
+-- 8. 已上传到微信的图片（按内容哈希去重）
+CREATE TABLE `wechat_media` (
+  `appid` varchar(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  `image_hash` char(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT '图片sha256',
+  `kind` varchar(10) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT 'image: 正文图片, thumb: 封面素材',
+  `media_id` varchar(128) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '永久素材ID',
+  `url` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '微信图片URL',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`appid`, `image_hash`, `kind`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='微信图片素材表';
+
+-- 迁移（远程网站数据库）: website_articles 按 nid 唯一，发布使用 INSERT ... ON DUPLICATE KEY UPDATE
+-- 执行前先确认没有重复的 nid: SELECT nid, COUNT(*) FROM website_articles GROUP BY nid HAVING COUNT(*) > 1;
+ALTER TABLE `website_articles`
+  ADD UNIQUE KEY `uk_nid` (`nid`);
+
+-- 9. 公众号增量同步高水位表
+CREATE TABLE `sync_cursors` (
+  `fakeid` varchar(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT '公众号fakeid',
+  `last_publish_time` int(11) NOT NULL DEFAULT 0 COMMENT '已同步的最新发布时间（时间戳）',
+  `last_msgid` bigint(20) NOT NULL DEFAULT 0 COMMENT '已同步的最新发布msgid',
+  `last_synced_at` int(11) NOT NULL DEFAULT 0 COMMENT '上次同步完成时间（时间戳）',
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`fakeid`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='公众号增量同步高水位表';
+
+-- 10. 已本地化的远程图片（同步时下载的文章图片，再次下载时发送条件请求）
+CREATE TABLE `remote_images` (
+  `url_hash` char(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT '图片URL的sha256',
+  `url` text CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `image_hash` char(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL COMMENT '图片内容sha256（图片库文件名）',
+  `ext` varchar(10) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  `etag` varchar(200) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `last_modified` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `fetched_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`url_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='已本地化的远程图片表';
+
+-- 11. 后台任务按结束时间清理过期记录
+ALTER TABLE `jobs`
+  ADD KEY `idx_finished_at` (`finished_at`);
@@ -0,0 +1,83 @@
+"""
+批量AI生成模块
+
+对多篇 normalized_articles 并发生成摘要和封面，按完成顺序逐条返回进度。
+摘要写入摘要缓存（之后单篇生成摘要直接命中），封面保存到固定路径。
+每篇的封面作为 cover 任务执行，与单篇生成封面接口共用去重键 cover:{nid}，同一篇不会同时生成两次。
+调用方提前关闭结果生成器（如客户端断开）时，尚未开始的任务被取消。
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+TASK_SUMMARY = 'summary'
+TASK_COVER = 'cover'
+ALL_TASKS = (TASK_SUMMARY, TASK_COVER)
+
+
+def _run_task(app, task, article, force):
+    """在工作线程中执行单个任务，返回进度事件"""
+    event = {'nid': article['nid'], 'title': article['title'], 'task': task}
+    try:
+        with app.app_context():
+            if task == TASK_SUMMARY:
+                from services.summary_cache import generate_summary_cached
+
+                if not article['content']:
+                    return {**event, 'status': 'error', 'message': '文章内容为空，无法生成摘要'}
+                success, message, summary, cached = generate_summary_cached(article['content'], force=force)
+                event.update(summary=summary, cached=cached)
+            else:
+                from services.covers import generate_article_cover
+                from services.jobs import job_manager, JobError, JOB_SUCCESS
+
+                if not article['title']:
+                    return {**event, 'status': 'error', 'message': '文章标题为空，无法生成封面'}
+
+                def cover_job(ctx):
+                    success, message, cover_path = generate_article_cover(article['nid'], article['title'])
+                    if not success:
+                        raise JobError(message)
+                    return {'message': message, 'cover_path': cover_path}
+
+                job, created = job_manager.run('cover', cover_job, dedupe_key=f"cover:{article['nid']}")
+                if not created:
+                    return {**event, 'status': 'error', 'job_id': job.job_id,
+                            'message': '该文章已有封面生成任务正在进行'}
+                result = job.to_dict()
+                success, message = job.status == JOB_SUCCESS, result['message']
+                event.update(cover_path=(result['result'] or {}).get('cover_path'), job_id=job.job_id)
+
+        event.update(status='success' if success else 'error', message=message)
+    except Exception as e:
+        print(f"[批量生成] NID {article['nid']} {task} 失败: {str(e)}")
+        event.update(status='error', message=str(e))
+    return event
+
+
+def run_batch(app, articles, tasks=ALL_TASKS, force=False, max_workers=3):
+    """并发执行批量生成，按完成顺序产出进度事件
+
+    Args:
+        app: Flask应用（工作线程中需要应用上下文访问摘要缓存）
+        articles: [{'nid', 'title', 'content'}]，在请求线程中预先查询好
+        tasks: 要执行的任务（summary / cover）
+        force: 摘要是否跳过缓存
+        max_workers: 同时进行的AI调用数
+
+    Yields:
+        dict: 单个任务的结果 {nid, title, task, status, message, ...}
+    """
+    jobs = [(task, article) for article in articles for task in tasks]
+    if not jobs:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix='ai-batch')
+    futures = [executor.submit(_run_task, app, task, article, force) for task, article in jobs]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # 正常结束时所有任务都已完成；生成器被提前关闭时取消尚未开始的任务，进行中的AI调用完成后结束
+        cancelled = sum(1 for future in futures if future.cancel())
+        if cancelled:
+            print(f"[批量生成] 已取消 {cancelled} 项未开始的任务")
+        executor.shutdown(wait=False)
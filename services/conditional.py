@@ -0,0 +1,60 @@
+"""
+条件请求模块
+
+根据页面涉及记录的 (主键, updated_at) 计算 ETag / Last-Modified，
+在渲染模板或序列化数据之前判断客户端缓存是否仍然有效，有效时直接返回 304。
+"""
+import hashlib
+import os
+from datetime import timezone
+
+from flask import Response, current_app, request
+
+_template_version = None
+
+
+def get_template_version():
+    """模板文件的最新修改时间，模板更新后旧的 ETag 自动失效"""
+    global _template_version
+    if _template_version is None:
+        latest = 0
+        template_folder = os.path.join(current_app.root_path, current_app.template_folder or 'templates')
+        for root, _, filenames in os.walk(template_folder):
+            for filename in filenames:
+                latest = max(latest, os.path.getmtime(os.path.join(root, filename)))
+        _template_version = str(int(latest))
+    return _template_version
+
+
+def make_etag(*parts):
+    """由页面标识和记录版本信息生成 ETag"""
+    raw = '|'.join(str(part) for part in (get_template_version(),) + parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _to_utc(value):
+    # 数据库中的时间为本地时间（naive），转换为UTC后与请求头比较
+    return value.replace(microsecond=0).astimezone(timezone.utc)
+
+
+def not_modified_response(etag, last_modified=None):
+    """客户端缓存仍然有效时返回 304 响应，否则返回 None"""
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified:
+        matched = _to_utc(last_modified) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    return add_validators(Response(status=304), etag, last_modified)
+
+
+def add_validators(response, etag, last_modified=None):
+    """给响应加上 ETag / Last-Modified，并要求浏览器每次使用前重新验证"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _to_utc(last_modified)
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,178 @@
+"""
+微信Cookie状态模块
+
+- CookieValidity: 缓存 Cookie 有效性检测结果（有效/无效分别有各自的TTL），
+  同步请求成功或失败时被动更新，/api/sync 和前端轮询 /api/check-cookie 不再每次请求 mp.weixin.qq.com；
+  结果按 Cookie 分别保存（wechat_cookies.json 为 DEFAULT_KEY，其他公众号按 cookie_key()），
+  一个公众号的Cookie失效不影响使用其他Cookie的公众号；
+- SingleFlight: 同一时间相同的检测/刷新只执行一次，并发调用方等待并共用结果；
+- RefreshState: 无头刷新Cookie的进度（替代原来的模块级 _cookie_refresh_status 字典），读写加锁；
+  刷新超时未结束（浏览器卡住、线程异常退出）时允许重新开始，旧刷新之后的状态更新被忽略。
+"""
+import hashlib
+import json
+import threading
+import time
+
+DEFAULT_KEY = 'default'
+
+
+def cookie_key(cookies):
+    """按Cookie内容生成有效性缓存的键，使用同一登录Cookie的公众号共用一个键"""
+    if not cookies:
+        return DEFAULT_KEY
+    digest = hashlib.sha256(json.dumps(cookies, sort_keys=True).encode('utf-8')).hexdigest()
+    return f'cookie:{digest[:16]}'
+
+
+class SingleFlight:
+    """同一 key 同时只执行一次 func，其余调用方等待并得到相同结果（或相同异常）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """返回 (结果, 是否与其他调用方共用)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'event': threading.Event(), 'result': None, 'error': None}
+
+        if not leader:
+            call['event'].wait()
+        else:
+            try:
+                call['result'] = func()
+            except BaseException as e:
+                call['error'] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call['event'].set()
+
+        if call['error'] is not None:
+            raise call['error']
+        return call['result'], not leader
+
+
+class CookieValidity:
+    """Cookie有效性缓存，按键（DEFAULT_KEY 或 cookie_key()）分别保存"""
+
+    def __init__(self, valid_ttl=300, invalid_ttl=30):
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self._lock = threading.Lock()
+        self._states = {}  # key -> (is_valid, message, checked_at, source)
+        self._flight = SingleFlight()
+
+    def init_app(self, app):
+        """从Flask配置中读取TTL"""
+        self.valid_ttl = app.config.get('COOKIE_VALID_TTL', self.valid_ttl)
+        self.invalid_ttl = app.config.get('COOKIE_INVALID_TTL', self.invalid_ttl)
+
+    def record(self, is_valid, message, source='check', key=DEFAULT_KEY):
+        """记录一次结果（实时检测、同步请求成功/失败、刷新完成后调用）"""
+        with self._lock:
+            self._states[key] = (bool(is_valid), message, time.time(), source)
+
+    def invalidate(self, key=None):
+        """清除缓存，下次检测时重新请求；不指定 key 时清除全部（如刷新Cookie后）"""
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+
+    def cached(self, key=DEFAULT_KEY):
+        """未过期的缓存结果，没有时返回 None"""
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return None
+            is_valid, _, checked_at, _ = state
+            ttl = self.valid_ttl if is_valid else self.invalid_ttl
+            if time.time() - checked_at >= ttl:
+                del self._states[key]
+                return None
+            return state
+
+    def check(self, check_func, force=False, flight_key='check', key=DEFAULT_KEY):
+        """返回 (is_valid, message, 是否复用了已有结果)
+
+        缓存有效时直接返回；否则通过 SingleFlight 执行 check_func（返回 (is_valid, message)），
+        并发请求共用同一次检测。
+        """
+        if not force:
+            state = self.cached(key)
+            if state is not None:
+                return state[0], state[1], True
+
+        def live_check():
+            is_valid, message = check_func()
+            self.record(is_valid, message, source=flight_key, key=key)
+            return is_valid, message
+
+        (is_valid, message), shared = self._flight.do(f'{key}:{flight_key}', live_check)
+        return is_valid, message, shared
+
+    def refresh(self, refresh_func):
+        """执行 Cookie 刷新（同一时间只执行一次），返回 refresh_func 的结果 (is_valid, message)"""
+        def do_refresh():
+            is_valid, message = refresh_func()
+            self.record(is_valid, message, source='refresh')
+            return is_valid, message
+
+        result, _ = self._flight.do('refresh', do_refresh)
+        return result
+
+
+class RefreshState:
+    """无头刷新Cookie的状态: idle -> pending -> qr_ready -> success / error"""
+
+    ACTIVE = ('pending', 'qr_ready')
+
+    def __init__(self, timeout=300):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._status = 'idle'
+        self._message = '未启动刷新任务'
+        self._qr_path = None
+        self._started_at = 0.0
+        self._generation = 0
+
+    def init_app(self, app):
+        """从Flask配置中读取超时时间"""
+        self.timeout = app.config.get('COOKIE_REFRESH_TIMEOUT', self.timeout)
+
+    def start(self):
+        """开始新的刷新，返回本次刷新的编号（传给 update）；已有未超时的刷新在进行时返回 0"""
+        with self._lock:
+            if self._status in self.ACTIVE and time.time() - self._started_at < self.timeout:
+                return 0
+            if self._status in self.ACTIVE:
+                print(f"[Cookie刷新] 上一次刷新超过 {self.timeout} 秒未结束，重新开始")
+            self._generation += 1
+            self._status, self._message, self._qr_path = 'pending', '正在启动浏览器...', None
+            self._started_at = time.time()
+            return self._generation
+
+    def update(self, status, message, qr_path=None, generation=None):
+        """更新状态；generation 不是最新一次刷新的编号时（已超时被取代）忽略"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._status = status
+            self._message = message
+            if qr_path is not None:
+                self._qr_path = qr_path
+
+    def snapshot(self):
+        """返回 {'status', 'message', 'qr_path'} 的一致副本"""
+        with self._lock:
+            return {'status': self._status, 'message': self._message, 'qr_path': self._qr_path}
+
+
+cookie_validity = CookieValidity()
+refresh_state = RefreshState()
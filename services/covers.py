@@ -0,0 +1,62 @@
+"""
+封面生成模块
+
+AI封面固定保存到 static/ai_images/{nid}/cover.jpg，单篇生成接口和批量生成共用。
+生成后按微信封面比例裁剪并输出 JPEG/WebP 版本（见 services.image_process）。
+"""
+import os
+
+from flask import current_app
+
+COVER_FILENAME = 'cover.jpg'
+
+
+def cover_relative_path(article_id, filename=COVER_FILENAME):
+    """封面相对 static 目录的路径"""
+    return f'ai_images/{article_id}/{filename}'
+
+
+def generate_article_cover(article_id, title):
+    """生成文章封面（如果文件已存在会被覆盖）
+
+    Returns:
+        tuple: (success, message, 相对 static 目录的路径)
+    """
+    from services.ai_process import generate_cover_image
+
+    # 创建固定的保存路径: static/ai_images/{article_id}/cover.jpg
+    cover_folder = os.path.join('static', 'ai_images', str(article_id))
+    os.makedirs(cover_folder, exist_ok=True)
+    save_path = os.path.join(cover_folder, COVER_FILENAME)
+
+    print(f"[封面生成] 保存路径: {save_path}")
+
+    success, message, _ = generate_cover_image(title, save_path)
+    if not success:
+        return success, message, None
+
+    config = current_app.config
+    if config['COVER_POSTPROCESS']:
+        from services.image_process import process_cover
+
+        try:
+            original_size = os.path.getsize(save_path)
+            outputs = process_cover(save_path, config['COVER_JPEG_QUALITY'], config['COVER_WEBP_QUALITY'])
+            print(f"[封面生成] 后处理完成: {original_size} -> {outputs}")
+        except Exception as e:
+            # 后处理失败时保留模型返回的原图
+            print(f"[封面生成] 后处理失败，使用原图: {str(e)}")
+
+    return success, message, cover_relative_path(article_id)
+
+
+def cover_variants(article_id):
+    """列出已生成的封面文件（相对 static 目录的路径）"""
+    cover_folder = os.path.join('static', 'ai_images', str(article_id))
+    if not os.path.isdir(cover_folder):
+        return {}
+    return {
+        filename: cover_relative_path(article_id, filename)
+        for filename in sorted(os.listdir(cover_folder))
+        if filename.startswith('cover') and filename.endswith(('.jpg', '.webp'))
+    }
@@ -0,0 +1,170 @@
+"""
+HTTP抓取模块
+
+提供进程内共享的连接池会话、按主机的令牌桶限速，以及有并发上限的批量抓取，
+供爬虫和同步模块并发下载文章使用。
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36')
+}
+
+
+class TokenBucket:
+    """令牌桶：平均每秒 rate 个请求，允许 burst 个突发请求；rate<=0 表示不限速"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，必要时阻塞等待"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """按主机名分别限速"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def create_session(pool_size=10, retries=2):
+    """创建带连接池和重试的会话"""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET', 'HEAD')
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def get_shared_session(pool_size=10):
+    """获取进程内共享的会话，按连接池大小区分（不同并发数的调用方各自共用一个）"""
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(pool_size)
+        if session is None:
+            session = _shared_sessions[pool_size] = create_session(pool_size=pool_size)
+        return session
+
+
+class ConcurrentFetcher:
+    """并发抓取多个URL
+
+    Args:
+        max_in_flight: 同时进行的最大请求数
+        rate_per_host: 每个主机每秒请求数，<=0 不限速
+        burst: 每个主机允许的突发请求数
+        timeout: 单个请求超时（秒）
+        session: 使用的会话，默认使用共享会话
+    """
+
+    def __init__(self, max_in_flight=4, rate_per_host=2.0, burst=2, timeout=15, session=None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.limiter = HostRateLimiter(rate_per_host, burst)
+        self.timeout = timeout
+        self.session = session or get_shared_session(pool_size=self.max_in_flight)
+
+    @classmethod
+    def from_config(cls, config, session=None):
+        """根据Flask配置创建（CRAWL_MAX_IN_FLIGHT / CRAWL_RATE_PER_HOST / CRAWL_BURST）"""
+        return cls(
+            max_in_flight=config.get('CRAWL_MAX_IN_FLIGHT', 4),
+            rate_per_host=config.get('CRAWL_RATE_PER_HOST', 2.0),
+            burst=config.get('CRAWL_BURST', 2),
+            session=session
+        )
+
+    def fetch(self, url, **kwargs):
+        """限速后抓取单个URL"""
+        self.limiter.acquire(url)
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def fetch_all(self, urls, skip=None, **kwargs):
+        """并发抓取，按完成顺序逐个返回 (url, response, error)
+
+        skip 为可选的判断函数，返回 True 的URL不抓取（对应爬虫的 skip_existing）。
+        结果在调用方线程中逐个产出，调用方可以直接在当前线程写数据库。
+        同时提交的请求不超过 max_in_flight，完成一个再提交下一个；调用方提前停止迭代时
+        不再发起新的请求，也不等待进行中的请求完成。
+        """
+        pending = []
+        seen = set()
+        for url in urls:
+            if url in seen or (skip and skip(url)):
+                continue
+            seen.add(url)
+            pending.append(url)
+
+        if not pending:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(pending)), thread_name_prefix='fetch')
+        remaining = iter(pending)
+        in_flight = {}
+        try:
+            for url in remaining:
+                in_flight[executor.submit(self.fetch, url, **kwargs)] = url
+                if len(in_flight) >= self.max_in_flight:
+                    break
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    next_url = next(remaining, None)
+                    if next_url is not None:
+                        in_flight[executor.submit(self.fetch, next_url, **kwargs)] = next_url
+                    try:
+                        result = url, future.result(), None
+                    except Exception as e:
+                        result = url, None, e
+                    yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
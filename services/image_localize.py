@@ -0,0 +1,180 @@
+"""
+文章图片本地化
+
+同步时把正文中引用的微信图片（mmbiz.qpic.cn）下载到图片库（static/images/cas，见 services.image_store），
+并把 Markdown 中的图片地址替换为本地路径。
+
+- 一批文章中的所有图片统一去重后并发下载（有上限的线程池），不是逐篇文章串行下载；
+- remote_images 表记录每个URL对应的图片哈希和 ETag/Last-Modified，再次遇到时发送条件请求，
+  304 时直接复用本地文件；
+- 不同URL内容相同的图片在图片库中只保存一份。
+"""
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from flask import current_app
+from sqlalchemy.dialects.mysql import insert
+
+from services.http_client import create_session
+from services.image_store import CAS_ROOT, CAS_STATIC_DIR, sync_refs
+from services.models import db
+from services.uploads import blob_folder, save_upload
+
+# 需要本地化的图片域名
+LOCALIZE_HOSTS = ('mmbiz.qpic.cn', 'mmbiz.qlogo.cn')
+# Markdown 图片: ![alt](url)
+_MD_IMAGE_PATTERN = re.compile(r'(!\[[^\]]*\]\()(\S+?)(\s+"[^"]*")?(\))')
+
+
+class RemoteImage(db.Model):
+    """已下载的远程图片"""
+    __tablename__ = 'remote_images'
+
+    url_hash = db.Column(db.String(64), primary_key=True)
+    url = db.Column(db.Text, nullable=False)
+    image_hash = db.Column(db.String(64), nullable=False)
+    ext = db.Column(db.String(10), nullable=False)
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(100))
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+def _url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _static_path(image_hash, ext):
+    """图片库文件相对 static 目录的路径"""
+    return f'{CAS_STATIC_DIR}/{image_hash[:2]}/{image_hash[2:4]}/{image_hash}.{ext}'
+
+
+def _blob_exists(image_hash, ext):
+    return os.path.exists(os.path.join(blob_folder(CAS_ROOT, image_hash), f'{image_hash}.{ext}'))
+
+
+def find_image_urls(markdown_text):
+    """Markdown 中需要本地化的图片URL"""
+    urls = []
+    for _, url, _, _ in _MD_IMAGE_PATTERN.findall(markdown_text or ''):
+        if url.startswith(('http://', 'https://', '//')) and urlsplit(url).hostname in LOCALIZE_HOSTS:
+            urls.append(url)
+    return urls
+
+
+def _download(session, url, known, max_bytes):
+    """下载单张图片，返回 (image_hash, ext, etag, last_modified, 是否304)"""
+    headers = {}
+    if known is not None and _blob_exists(known['image_hash'], known['ext']):
+        if known['etag']:
+            headers['If-None-Match'] = known['etag']
+        if known['last_modified']:
+            headers['If-Modified-Since'] = known['last_modified']
+
+    fetch_url = f'https:{url}' if url.startswith('//') else url
+    with session.get(fetch_url, headers=headers, timeout=30, stream=True) as response:
+        if response.status_code == 304:
+            return known['image_hash'], known['ext'], known['etag'], known['last_modified'], True
+        response.raise_for_status()
+        response.raw.decode_content = True
+        saved = save_upload(response.raw, CAS_ROOT, max_bytes=max_bytes, display_widths=())
+        return (saved['sha256'], saved['ext'], response.headers.get('ETag'),
+                response.headers.get('Last-Modified'), False)
+
+
+def _save_remote_images(rows):
+    """写入下载记录；多个公众号并发同步同一张图片时按 url_hash 覆盖，不会主键冲突"""
+    if not rows:
+        return
+    stmt = insert(RemoteImage.__table__).values(rows)
+    updates = {name: stmt.inserted[name] for name in ('image_hash', 'ext', 'etag', 'last_modified', 'fetched_at')}
+    db.session.execute(stmt.on_duplicate_key_update(**updates))
+    db.session.commit()
+
+
+def localize_articles(articles, session=None, executor=None):
+    """下载一批文章中的图片并替换 Markdown 中的地址（原地修改 article['markdown']）
+
+    Args:
+        articles: 入库前的文章字典列表（含 markdown）
+        session: 下载使用的会话（共用连接池）
+        executor: 下载线程池，多个公众号同时同步时共用一个以限制总并发；
+                  不传时按 IMAGE_LOCALIZE_CONCURRENCY 临时创建
+
+    Returns:
+        dict: {'images', 'downloaded', 'not_modified', 'failed'}
+    """
+    urls = list(dict.fromkeys(url for article in articles for url in find_image_urls(article.get('markdown'))))
+    stats = {'images': len(urls), 'downloaded': 0, 'not_modified': 0, 'failed': 0}
+    if not urls:
+        return stats
+
+    # 一次查询已下载过的URL（用于条件请求）
+    url_hashes = {url: _url_hash(url) for url in urls}
+    known = {
+        row.url_hash: {'image_hash': row.image_hash, 'ext': row.ext, 'etag': row.etag, 'last_modified': row.last_modified}
+        for row in RemoteImage.query.filter(RemoteImage.url_hash.in_(list(url_hashes.values())))
+    }
+
+    concurrency = current_app.config['IMAGE_LOCALIZE_CONCURRENCY']
+    max_bytes = current_app.config['IMAGE_LOCALIZE_MAX_BYTES']
+    session = session or create_session(pool_size=concurrency)
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls))),
+                                      thread_name_prefix='image-localize')
+
+    local_paths = {}
+    rows = []
+    try:
+        futures = {
+            url: executor.submit(_download, session, url, known.get(url_hashes[url]), max_bytes)
+            for url in urls
+        }
+        for url, future in futures.items():
+            try:
+                image_hash, ext, etag, last_modified, not_modified = future.result()
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"[图片本地化] 下载失败，保留原地址: {url} {str(e)}")
+                continue
+
+            stats['not_modified' if not_modified else 'downloaded'] += 1
+            local_paths[url] = '/static/' + _static_path(image_hash, ext)
+            rows.append({'url_hash': url_hashes[url], 'url': url, 'image_hash': image_hash, 'ext': ext,
+                         'etag': etag, 'last_modified': last_modified, 'fetched_at': datetime.now()})
+    finally:
+        if own_executor:
+            executor.shutdown()
+    _save_remote_images(rows)
+
+    def replace(match):
+        local_path = local_paths.get(match.group(2))
+        if local_path is None:
+            return match.group(0)
+        return match.group(1) + local_path + (match.group(3) or '') + match.group(4)
+
+    for article in articles:
+        if article.get('markdown'):
+            article['markdown'] = _MD_IMAGE_PATTERN.sub(replace, article['markdown'])
+
+    print(f"[图片本地化] 图片 {stats['images']} 张，下载 {stats['downloaded']}，"
+          f"未修改 {stats['not_modified']}，失败 {stats['failed']}")
+    return stats
+
+
+def record_article_refs(articles, nids):
+    """文章入库后记录图片引用，避免本地化的图片被图片库回收
+
+    Args:
+        articles: localize_articles 处理过的文章字典列表
+        nids: ingest_articles 返回的 {source_url: nid}
+    """
+    for article in articles:
+        nid = nids.get(article['source_url'])
+        if nid is not None:
+            sync_refs(nid, article.get('markdown'))
+    db.session.commit()
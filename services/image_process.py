@@ -0,0 +1,60 @@
+"""
+图片后处理模块
+
+AI生成的封面按微信公众号封面比例裁剪缩放，输出 JPEG 和 WebP 两种格式，
+并去除EXIF等元数据，减小上传到微信和编辑页面加载的图片体积。
+"""
+import os
+
+from PIL import Image, ImageOps
+
+# 封面规格: 名称后缀 -> (宽, 高)
+# 2.35:1 为图文消息头图，1:1 用于分享卡片和次条封面
+COVER_SIZES = {
+    '': (900, 383),
+    '_square': (500, 500),
+}
+
+
+def _open_rgb(path):
+    """打开图片，按EXIF方向旋转并转换为RGB（透明背景填充白色）"""
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+
+
+def save_variants(image, base_path, jpeg_quality=85, webp_quality=80):
+    """保存 JPEG 和 WebP 两种格式（不写入任何元数据），返回生成的文件路径列表"""
+    jpeg_path = f'{base_path}.jpg'
+    webp_path = f'{base_path}.webp'
+    tmp_path = f'{jpeg_path}.tmp'
+    # 先写临时文件再替换，避免覆盖原图时读写同一个文件
+    image.save(tmp_path, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+    os.replace(tmp_path, jpeg_path)
+    image.save(webp_path, 'WEBP', quality=webp_quality, method=6)
+    return [jpeg_path, webp_path]
+
+
+def process_cover(path, jpeg_quality=85, webp_quality=80):
+    """将封面裁剪为各规格并输出 JPEG/WebP
+
+    path 为 .../cover.jpg，处理后 cover.jpg 被替换为 2.35:1 版本，
+    同目录下另外生成 cover.webp、cover_square.jpg、cover_square.webp。
+
+    Returns:
+        dict: {文件名: 字节数}
+    """
+    source = _open_rgb(path)
+    base = os.path.splitext(path)[0]
+
+    outputs = {}
+    for suffix, size in COVER_SIZES.items():
+        fitted = ImageOps.fit(source, size, method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+        for output_path in save_variants(fitted, f'{base}{suffix}', jpeg_quality, webp_quality):
+            outputs[os.path.basename(output_path)] = os.path.getsize(output_path)
+    return outputs
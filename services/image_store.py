@@ -0,0 +1,127 @@
+"""
+图片库模块
+
+文章图片按内容哈希保存在 static/images/cas 下（见 services.uploads），
+image_refs 表记录文章(nid)引用了哪些图片。垃圾回收删除没有任何文章引用的图片，
+与 clean_old_articles 一起执行，使图片目录的大小随文章数量而不是上传次数增长。
+"""
+import os
+import re
+import time
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert
+
+from services.models import db, NormalizedArticle
+from services.uploads import save_upload
+
+# 图片库相对 static 目录的路径
+CAS_STATIC_DIR = 'images/cas'
+CAS_ROOT = os.path.join('static', 'images', 'cas')
+
+# 文章内容中引用的图片库路径
+_CAS_REF_PATTERN = re.compile(r'images/cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})')
+# 图片库中的文件名: <sha256>.<ext> 或 <sha256>_<宽度>.<ext>
+_BLOB_NAME_PATTERN = re.compile(r'^([0-9a-f]{64})(?:_\d+)?\.\w+$')
+
+
+class ImageRef(db.Model):
+    """文章图片引用表"""
+    __tablename__ = 'image_refs'
+    __table_args__ = (db.UniqueConstraint('nid', 'image_hash', name='uk_nid_hash'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    nid = db.Column(db.BigInteger, nullable=False)
+    image_hash = db.Column(db.String(64), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=db.func.now())
+
+
+def add_refs(nid, image_hashes):
+    """记录文章引用的图片（已存在的引用忽略）"""
+    rows = [{'nid': nid, 'image_hash': image_hash} for image_hash in set(image_hashes)]
+    if not rows:
+        return
+    stmt = insert(ImageRef.__table__).values(rows)
+    db.session.execute(stmt.on_duplicate_key_update(nid=stmt.inserted.nid))
+
+
+def store_image(stream, nid, max_bytes=None, display_widths=(1080,)):
+    """保存上传的图片并记录文章引用
+
+    Returns:
+        dict: save_upload 的结果，路径转换为相对 static 目录
+    """
+    saved = save_upload(stream, CAS_ROOT, max_bytes=max_bytes, display_widths=display_widths)
+    add_refs(nid, [saved['sha256']])
+    db.session.commit()
+
+    saved['path'] = f"{CAS_STATIC_DIR}/{saved['path']}"
+    if saved['display_path']:
+        saved['display_path'] = f"{CAS_STATIC_DIR}/{saved['display_path']}"
+    return saved
+
+
+def sync_refs(nid, content):
+    """按文章当前内容更新引用：删除内容中已不存在的图片引用，补充新引用"""
+    hashes = set(_CAS_REF_PATTERN.findall(content or ''))
+    query = ImageRef.query.filter(ImageRef.nid == nid)
+    if hashes:
+        query = query.filter(ImageRef.image_hash.notin_(hashes))
+    query.delete(synchronize_session=False)
+    add_refs(nid, hashes)
+
+
+def collect_garbage(grace_seconds=None):
+    """删除无人引用的图片
+
+    1. 删除已不存在的文章的引用；
+    2. 删除图片库中没有引用、且修改时间超过宽限期的文件（包括展示版本），
+       宽限期保护刚上传但文章尚未保存的图片。
+
+    Returns:
+        dict: {'pruned_refs', 'deleted_files', 'freed_bytes'}
+    """
+    if grace_seconds is None:
+        grace_seconds = current_app.config['IMAGE_GC_GRACE_HOURS'] * 3600
+
+    existing_nids = select(NormalizedArticle.nid)
+    pruned_refs = ImageRef.query.filter(ImageRef.nid.notin_(existing_nids)).delete(synchronize_session=False)
+    db.session.commit()
+
+    referenced = {row[0] for row in db.session.execute(select(ImageRef.image_hash).distinct())}
+
+    deadline = time.time() - grace_seconds
+    deleted_files = 0
+    freed_bytes = 0
+    if os.path.isdir(CAS_ROOT):
+        for folder, _, filenames in os.walk(CAS_ROOT, topdown=False):
+            for filename in filenames:
+                match = _BLOB_NAME_PATTERN.match(filename)
+                path = os.path.join(folder, filename)
+                # 中断上传留下的临时文件同样按宽限期清理
+                if match and match.group(1) in referenced:
+                    continue
+                if not match and not filename.endswith('.part'):
+                    continue
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime > deadline:
+                        continue
+                    os.remove(path)
+                    deleted_files += 1
+                    freed_bytes += stat.st_size
+                except OSError:
+                    pass
+            if folder != CAS_ROOT:
+                try:
+                    os.rmdir(folder)  # 只会删除空目录
+                except OSError:
+                    pass
+
+    print(f"[图片回收] 清理引用 {pruned_refs} 条，删除文件 {deleted_files} 个，释放 {freed_bytes} 字节")
+    return {
+        'pruned_refs': pruned_refs,
+        'deleted_files': deleted_files,
+        'freed_bytes': freed_bytes
+    }
@@ -0,0 +1,140 @@
+"""
+批量入库模块
+
+爬虫和同步得到的文章按批写入 source_articles 和 normalized_articles：
+每批用一次 IN 查询判断 source_url 是否已存在，用多行 INSERT ... ON DUPLICATE KEY UPDATE
+写入两张表，每批只提交一次。
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert
+
+from services.models import db, SourceArticle, NormalizedArticle
+
+# 单条 IN 查询包含的最大URL数量
+IN_CHUNK_SIZE = 500
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def find_existing_source_urls(urls):
+    """查询已入库的 source_url，返回集合"""
+    existing = set()
+    urls = list(dict.fromkeys(urls))
+    for chunk in _chunks(urls, IN_CHUNK_SIZE):
+        rows = db.session.execute(
+            select(SourceArticle.source_url).where(SourceArticle.source_url.in_(chunk))
+        )
+        existing.update(row[0] for row in rows)
+    return existing
+
+
+def _sid_map(urls):
+    """查询 source_url -> sid 映射"""
+    sid_map = {}
+    for chunk in _chunks(urls, IN_CHUNK_SIZE):
+        rows = db.session.execute(
+            select(SourceArticle.source_url, SourceArticle.sid).where(SourceArticle.source_url.in_(chunk))
+        )
+        sid_map.update({url: sid for url, sid in rows})
+    return sid_map
+
+
+def _upsert(table, rows, update_columns, key_column):
+    """多行插入；唯一键冲突时更新 update_columns，为空时保持原记录不变"""
+    stmt = insert(table).values(rows)
+    if update_columns:
+        updates = {name: stmt.inserted[name] for name in update_columns}
+    else:
+        updates = {key_column: table.c[key_column]}
+    db.session.execute(stmt.on_duplicate_key_update(**updates))
+
+
+def ingest_articles(items, source_type, skip_existing=True, batch_size=100):
+    """批量写入文章
+
+    Args:
+        items: 文章字典列表，字段: title, content(HTML), markdown, source_url，
+               可选 author_name, cover_url, process_status, distribution_mark
+        source_type: 来源类型（WECHAT/TEJIAN/WUHU）
+        skip_existing: True 时跳过已存在的 source_url；False 时覆盖更新已有文章
+        batch_size: 每批文章数，每批提交一次
+
+    Returns:
+        dict: {'total', 'inserted', 'updated', 'skipped', 'nids': {source_url: nid}}
+    """
+    stats = {'total': len(items), 'inserted': 0, 'updated': 0, 'skipped': 0, 'nids': {}}
+
+    # 同一批里重复的URL只保留最后一条
+    unique = list({item['source_url']: item for item in items}.values())
+    stats['skipped'] += len(items) - len(unique)
+
+    source_table = SourceArticle.__table__
+    normalized_table = NormalizedArticle.__table__
+    update_columns = [] if skip_existing else ['title', 'content', 'author_name', 'cover_url', 'updated_at']
+
+    for batch in _chunks(unique, batch_size):
+        try:
+            existing = find_existing_source_urls([item['source_url'] for item in batch])
+            if skip_existing:
+                stats['skipped'] += sum(1 for item in batch if item['source_url'] in existing)
+                batch = [item for item in batch if item['source_url'] not in existing]
+            if not batch:
+                continue
+
+            now = datetime.now()
+            _upsert(source_table, [{
+                'title': item['title'],
+                'content': item['content'],
+                'author_name': item.get('author_name'),
+                'cover_url': item.get('cover_url'),
+                'source_url': item['source_url'],
+                'source_type': source_type,
+                'process_status': item.get('process_status', 0),
+                'created_at': now,
+                'updated_at': now
+            } for item in batch], update_columns, 'sid')
+
+            urls = [item['source_url'] for item in batch]
+            sid_map = _sid_map(urls)
+
+            normalized_rows = []
+            for item in batch:
+                sid = sid_map.get(item['source_url'])
+                if sid is None:
+                    continue
+                normalized_rows.append({
+                    'sid': sid,
+                    'title': item['title'],
+                    'content': item['markdown'],
+                    'author_name': item.get('author_name'),
+                    'cover_url': item.get('cover_url'),
+                    'source_url': item['source_url'],
+                    'source_type': source_type,
+                    'distribution_mark': item.get('distribution_mark', 'W'),
+                    'process_status': item.get('process_status', 0),
+                    'created_at': now,
+                    'updated_at': now
+                })
+            if normalized_rows:
+                _upsert(normalized_table, normalized_rows, update_columns, 'nid')
+
+            db.session.commit()
+
+            url_by_sid = {sid: url for url, sid in sid_map.items()}
+            rows = db.session.execute(
+                select(NormalizedArticle.sid, NormalizedArticle.nid).where(NormalizedArticle.sid.in_(list(url_by_sid)))
+            )
+            stats['nids'].update({url_by_sid[sid]: nid for sid, nid in rows})
+            stats['updated'] += sum(1 for url in urls if url in existing)
+            stats['inserted'] += sum(1 for url in urls if url not in existing)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[入库] 批量写入失败: {str(e)}")
+            raise
+
+    return stats
@@ -0,0 +1,295 @@
+"""
+后台任务模块
+
+耗时操作（爬取、同步、发布到微信）提交到线程池后台执行，接口立即返回任务ID，
+前端通过 /api/jobs/<job_id> 查询进度。任务状态保存在 jobs 表中，多个进程共享。
+
+同一 dedupe_key 同时只允许一个未结束的任务：活动任务的 active_key 等于 dedupe_key，
+结束后置空，依靠唯一索引保证多进程下也不会重复提交。
+状态只通过带原状态条件的 UPDATE 迁移（pending → running/cancelled），取消与开始执行并发时只有一方生效。
+
+已结束超过 JOB_RETENTION_DAYS 天的任务在提交新任务时清理（每小时最多一次）。
+"""
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from services.models import db
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_SUCCESS = 'success'
+JOB_ERROR = 'error'
+JOB_CANCELLED = 'cancelled'
+
+ACTIVE_STATUSES = (JOB_PENDING, JOB_RUNNING)
+
+
+class Job(db.Model):
+    """后台任务表"""
+    __tablename__ = 'jobs'
+
+    job_id = db.Column(db.String(32), primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    dedupe_key = db.Column(db.String(100), nullable=False)
+    active_key = db.Column(db.String(100), unique=True)
+    status = db.Column(db.String(20), nullable=False, default=JOB_PENDING)
+    progress = db.Column(db.Text)
+    result = db.Column(db.Text)
+    message = db.Column(db.String(500))
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress': json.loads(self.progress) if self.progress else {},
+            'result': json.loads(self.result) if self.result else None,
+            'message': self.message,
+            'cancel_requested': bool(self.cancel_requested),
+            'created_at': _format_time(self.created_at),
+            'started_at': _format_time(self.started_at),
+            'finished_at': _format_time(self.finished_at)
+        }
+
+
+def _format_time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+class JobCancelled(Exception):
+    """任务被取消"""
+
+
+class JobError(Exception):
+    """任务执行失败，可附带结果数据"""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class JobContext:
+    """传给任务函数的上下文，用于上报进度和检查取消"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._progress = {}
+
+    def update(self, message=None, **counters):
+        """合并更新进度计数器（如 total/success/failed）"""
+        self._progress.update(counters)
+        values = {
+            'progress': json.dumps(self._progress, ensure_ascii=False),
+            'updated_at': datetime.now()
+        }
+        if message:
+            values['message'] = message[:500]
+        Job.query.filter_by(job_id=self.job_id).update(values)
+        db.session.commit()
+
+    def is_cancelled(self):
+        cancel_requested = db.session.query(Job.cancel_requested).filter_by(job_id=self.job_id).scalar()
+        db.session.commit()
+        return bool(cancel_requested)
+
+    def check_cancelled(self):
+        """已请求取消时抛出 JobCancelled，任务函数在各步骤之间调用"""
+        if self.is_cancelled():
+            raise JobCancelled()
+
+
+class JobManager:
+    """任务提交与执行"""
+
+    def __init__(self):
+        self.app = None
+        self.stale_after = 7200
+        self.retention_days = 30
+        self.prune_interval = 3600
+        self._pruned_at = 0.0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.stale_after = app.config.get('JOB_STALE_SECONDS', self.stale_after)
+        self.retention_days = app.config.get('JOB_RETENTION_DAYS', self.retention_days)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('JOB_WORKERS', 2),
+            thread_name_prefix='job'
+        )
+
+    def submit(self, job_type, func, dedupe_key=None):
+        """提交任务
+
+        Args:
+            job_type: 任务类型（crawl、sync、publish_wechat 等）
+            func: 任务函数，接收 JobContext，返回可JSON序列化的结果
+            dedupe_key: 去重键，默认等于 job_type
+
+        Returns:
+            tuple: (Job, 是否新建)。已有同键任务未结束时返回该任务
+        """
+        job, created = self._create(job_type, dedupe_key or job_type)
+        if created:
+            self._executor.submit(self._run, job.job_id, func)
+        return job, created
+
+    def run(self, job_type, func, dedupe_key=None):
+        """在当前线程中执行任务（如批量生成的单项），与 submit() 提交的任务共用去重键
+
+        Returns:
+            tuple: (Job, 是否新建)。新建时返回执行结束后的任务；已有同键任务未结束时返回该任务，不执行 func
+        """
+        job, created = self._create(job_type, dedupe_key or job_type)
+        if not created:
+            return job, False
+        job_id = job.job_id
+        self._run(job_id, func)
+        # 任务在 _run 的应用上下文（另一个会话）中更新，这里重新读取
+        return db.session.get(Job, job_id, populate_existing=True), True
+
+    def _create(self, job_type, dedupe_key):
+        """新建 pending 状态的任务，已有同键任务未结束时返回 (该任务, False)"""
+        with self._lock:
+            self._expire_stale(dedupe_key)
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                self._pruned_at = time.monotonic()
+                self.prune()
+
+            existing = Job.query.filter_by(active_key=dedupe_key).first()
+            if existing:
+                return existing, False
+
+            job = Job(
+                job_id=uuid.uuid4().hex,
+                job_type=job_type,
+                dedupe_key=dedupe_key,
+                active_key=dedupe_key,
+                status=JOB_PENDING
+            )
+            db.session.add(job)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # 其他进程刚提交了同键任务
+                db.session.rollback()
+                return Job.query.filter_by(active_key=dedupe_key).first(), False
+        return job, True
+
+    def _expire_stale(self, dedupe_key):
+        """长时间无进度更新的活动任务（如进程已退出）视为失败，释放去重键"""
+        deadline = datetime.now() - timedelta(seconds=self.stale_after)
+        stale = Job.query.filter(Job.active_key == dedupe_key, Job.updated_at < deadline).all()
+        for job in stale:
+            job.status = JOB_ERROR
+            job.message = '任务超时未完成'
+            job.active_key = None
+            job.finished_at = datetime.now()
+        if stale:
+            db.session.commit()
+
+    def prune(self):
+        """删除已结束超过保留天数的任务，返回删除条数"""
+        if self.retention_days <= 0:
+            return 0
+        deadline = datetime.now() - timedelta(days=self.retention_days)
+        deleted = Job.query.filter(
+            Job.active_key.is_(None),
+            Job.finished_at < deadline
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        if deleted:
+            print(f"[任务] 清理 {deleted} 条过期任务记录")
+        return deleted
+
+    def _finish(self, job_id, status, message=None, result=None):
+        values = {
+            'status': status,
+            'active_key': None,
+            'finished_at': datetime.now(),
+            'updated_at': datetime.now()
+        }
+        if message is not None:
+            values['message'] = message[:500]
+        if result is not None:
+            values['result'] = json.dumps(result, ensure_ascii=False, default=str)
+        Job.query.filter_by(job_id=job_id).update(values)
+        db.session.commit()
+
+    def _run(self, job_id, func):
+        with self.app.app_context():
+            try:
+                # 只有仍为 pending 且未请求取消的任务才能开始，与 cancel() 并发时只有一方生效
+                started = Job.query.filter_by(job_id=job_id, status=JOB_PENDING, cancel_requested=False).update({
+                    'status': JOB_RUNNING,
+                    'started_at': datetime.now(),
+                    'updated_at': datetime.now()
+                }, synchronize_session=False)
+                db.session.commit()
+                if not started:
+                    # 已被取消（或已过期）；仍为 pending 的说明取消请求未完成状态迁移，这里补上
+                    self._cancel_pending(job_id)
+                    return
+                job_type = db.session.query(Job.job_type).filter_by(job_id=job_id).scalar()
+                print(f"[任务] 开始执行 {job_type} ({job_id})")
+
+                result = func(JobContext(job_id))
+                message = result.get('message') if isinstance(result, dict) else None
+                self._finish(job_id, JOB_SUCCESS, message or '任务完成', result)
+                print(f"[任务] 执行完成 ({job_id})")
+            except JobCancelled:
+                db.session.rollback()
+                self._finish(job_id, JOB_CANCELLED, '任务已取消')
+                print(f"[任务] 已取消 ({job_id})")
+            except JobError as e:
+                db.session.rollback()
+                self._finish(job_id, JOB_ERROR, str(e), e.result)
+                print(f"[任务] 执行失败 ({job_id}): {str(e)}")
+            except Exception as e:
+                db.session.rollback()
+                self._finish(job_id, JOB_ERROR, str(e))
+                print(f"[任务] 执行失败 ({job_id}): {str(e)}")
+                import traceback
+                traceback.print_exc()
+            finally:
+                db.session.remove()
+
+    def _cancel_pending(self, job_id):
+        """未开始的任务直接置为已取消并释放去重键；已开始执行的不受影响"""
+        cancelled = Job.query.filter_by(job_id=job_id, status=JOB_PENDING).update({
+            'status': JOB_CANCELLED,
+            'message': '任务已取消',
+            'active_key': None,
+            'cancel_requested': True,
+            'finished_at': datetime.now(),
+            'updated_at': datetime.now()
+        }, synchronize_session=False)
+        db.session.commit()
+        return cancelled
+
+    def cancel(self, job_id):
+        """请求取消任务；未开始的任务直接取消，运行中的任务在下一个检查点停止"""
+        requested = Job.query.filter(Job.job_id == job_id, Job.status.in_(ACTIVE_STATUSES)).update({
+            'cancel_requested': True,
+            'updated_at': datetime.now()
+        }, synchronize_session=False)
+        db.session.commit()
+        if requested:
+            self._cancel_pending(job_id)
+        return db.session.get(Job, job_id)
+
+
+job_manager = JobManager()
@@ -0,0 +1,128 @@
+"""
+大模型客户端模块
+
+进程内共享一个 OpenAI 兼容客户端（魔搭社区推理接口），复用HTTP连接池，
+避免每次对话都重新创建客户端和建立TLS连接。同时记录流式输出的
+首字延迟（TTFT）和输出速度，便于观察效果。
+"""
+import threading
+import time
+
+from flask import current_app
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """获取共享的 OpenAI 客户端，首次调用时按当前应用的配置创建（需要应用上下文）"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import OpenAI, DefaultHttpxClient
+
+                config = current_app.config
+
+                http_client = DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=config['LLM_MAX_CONNECTIONS'],
+                        max_keepalive_connections=config['LLM_MAX_CONNECTIONS'],
+                        keepalive_expiry=config['LLM_KEEPALIVE_EXPIRY']
+                    )
+                )
+                _client = OpenAI(
+                    base_url=config['MODELSCOPE_BASE_URL'],
+                    api_key=config['MODELSCOPE_API_KEY'],
+                    timeout=httpx.Timeout(config['LLM_TIMEOUT'], connect=config['LLM_CONNECT_TIMEOUT']),
+                    max_retries=config['LLM_MAX_RETRIES'],
+                    http_client=http_client
+                )
+    return _client
+
+
+class StreamMetrics:
+    """流式输出统计：首字延迟、每秒输出token数（未返回usage时按输出块数估算）和中断次数"""
+
+    def __init__(self, max_samples=200):
+        self.max_samples = max_samples
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def record(self, ttft, tokens, duration, aborted=False):
+        with self._lock:
+            self._samples.append((ttft, tokens, duration, aborted))
+            if len(self._samples) > self.max_samples:
+                self._samples.pop(0)
+
+    def stats(self):
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return {'count': 0}
+
+        ttfts = sorted(sample[0] for sample in samples if sample[0] is not None)
+        rates = [tokens / duration for _, tokens, duration, aborted in samples if duration > 0 and not aborted]
+
+        def percentile(values, pct):
+            return round(values[min(len(values) - 1, int(len(values) * pct))], 3) if values else None
+
+        return {
+            'count': len(samples),
+            'ttft_avg': round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+            'ttft_p50': percentile(ttfts, 0.5),
+            'ttft_p95': percentile(ttfts, 0.95),
+            'tokens_per_second_avg': round(sum(rates) / len(rates), 1) if rates else None,
+            'aborted': sum(1 for sample in samples if sample[3])
+        }
+
+
+chat_metrics = StreamMetrics()
+
+
+def stream_chat(messages, model=None, metrics=chat_metrics, **kwargs):
+    """流式对话，逐个返回输出的文本片段，并记录首字延迟和输出速度
+
+    调用方提前关闭生成器（如客户端断开）或读取出错时，关闭响应释放连接，并记为中断。
+    """
+    client = get_openai_client()
+    start = time.perf_counter()
+    first_token_at = None
+    chunks = 0
+    usage_tokens = None
+
+    response = client.chat.completions.create(
+        model=model or current_app.config['AI_CHAT_MODEL'],
+        messages=messages,
+        stream=True,
+        **kwargs
+    )
+
+    completed = False
+    try:
+        for chunk in response:
+            if getattr(chunk, 'usage', None) and chunk.usage.completion_tokens:
+                usage_tokens = chunk.usage.completion_tokens
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks += 1
+                yield content
+        completed = True
+    finally:
+        response.close()
+
+        end = time.perf_counter()
+        ttft = first_token_at - start if first_token_at else None
+        tokens = usage_tokens or chunks
+        generate_time = end - first_token_at if first_token_at else 0
+        metrics.record(ttft, tokens, generate_time, aborted=not completed)
+        if not completed:
+            print(f"[AI对话] 输出中断，已输出 {tokens} tokens")
+        elif ttft is not None:
+            print(f"[AI对话] 首字延迟 {ttft:.2f}s，输出 {tokens} tokens，"
+                  f"{tokens / generate_time if generate_time > 0 else 0:.1f} tokens/s")
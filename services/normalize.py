@@ -0,0 +1,176 @@
+"""
+正文规范化引擎: HTML → Markdown（lxml）
+
+source_articles.content 保存文章正文HTML，normalized_articles.content 保存转换后的 Markdown。
+微信正文通常是多层带样式的 <section>/<span> 包装，转换时：
+- 先遍历一次树，标记包含块级元素的节点（之后判断是否需要递归不再搜索子树）；
+- 再遍历一次输出 Markdown，样式包装直接展开，不修改原树。
+两次遍历都是线性的，不随嵌套层数变成平方复杂度。
+
+normalize_many() 在进程池中批量转换，同步流水线和补录大量文章时使用。
+"""
+import html
+import re
+
+from lxml import etree
+from lxml import html as lxml_html
+
+_BLOCK_TAGS = {'p', 'div', 'section', 'article', 'header', 'footer'}
+_HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# 包含这些标签的块需要递归处理
+_BLOCK_LEVEL_TAGS = _BLOCK_TAGS | _HEADING_TAGS | {'ul', 'ol', 'blockquote', 'pre', 'table', 'hr'}
+_SKIP_TAGS = {'script', 'style', 'noscript', 'svg', 'mpvoice', 'mpvideo', 'iframe'}
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _text(value):
+    return _WHITESPACE.sub(' ', value) if value else ''
+
+
+class _Converter:
+    """单篇正文的转换状态"""
+
+    def __init__(self, root):
+        # 包含块级后代的元素
+        self.has_block = set()
+        for element in root.iter(*_BLOCK_LEVEL_TAGS):
+            parent = element.getparent()
+            while parent is not None and parent not in self.has_block:
+                self.has_block.add(parent)
+                parent = parent.getparent()
+
+    def inline(self, element):
+        """单个行内元素（不含 tail）转换为 Markdown 文本"""
+        tag = element.tag
+        if not isinstance(tag, str) or tag in _SKIP_TAGS:
+            # 注释、处理指令
+            return ''
+        if tag == 'br':
+            return '  \n'
+        if tag == 'img':
+            src = element.get('data-src') or element.get('src')
+            return f'![{element.get("alt", "")}]({src})' if src else ''
+        if tag == 'code':
+            return f'`{element.text_content()}`'
+
+        text = self.inline_text(element)
+        if tag in ('strong', 'b'):
+            return f'**{text.strip()}**' if text.strip() else text
+        if tag in ('em', 'i'):
+            return f'*{text.strip()}*' if text.strip() else text
+        if tag == 'a' and element.get('href'):
+            return f'[{text.strip()}]({element.get("href")})'
+        return text
+
+    def inline_text(self, element):
+        """元素的全部内容转换为 Markdown 文本"""
+        parts = [_text(element.text)]
+        for child in element:
+            parts.append(self.inline(child))
+            parts.append(_text(child.tail))
+        return ''.join(parts)
+
+    def blocks(self, element, out):
+        """块级内容转换为 Markdown 段落，追加到 out"""
+        inline = [_text(element.text)]
+
+        def flush():
+            text = ''.join(inline).strip()
+            if text:
+                out.append(text)
+            inline.clear()
+
+        for child in element:
+            tag = child.tag
+            if not isinstance(tag, str):
+                pass
+            elif tag in _HEADING_TAGS:
+                flush()
+                text = self.inline_text(child).strip()
+                if text:
+                    out.append(f"{'#' * int(tag[1])} {text}")
+            elif tag in ('ul', 'ol'):
+                flush()
+                items = []
+                for index, li in enumerate((li for li in child if li.tag == 'li'), 1):
+                    marker = f'{index}.' if tag == 'ol' else '-'
+                    items.append(f'{marker} {self.inline_text(li).strip()}')
+                if items:
+                    out.append('\n'.join(items))
+            elif tag == 'blockquote':
+                flush()
+                quoted = []
+                self.blocks(child, quoted)
+                if quoted:
+                    out.append('\n>\n'.join('> ' + block.replace('\n', '\n> ') for block in quoted))
+            elif tag == 'pre':
+                flush()
+                out.append(f"```\n{child.text_content().rstrip()}\n```")
+            elif tag == 'table':
+                flush()
+                rows = [[self.inline_text(cell).strip().replace('|', '\\|') for cell in tr.iter('th', 'td')]
+                        for tr in child.iter('tr')]
+                rows = [row for row in rows if row]
+                if rows:
+                    width = max(len(row) for row in rows)
+                    rows = [row + [''] * (width - len(row)) for row in rows]
+                    lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + ' --- |' * width]
+                    lines += ['| ' + ' | '.join(row) + ' |' for row in rows[1:]]
+                    out.append('\n'.join(lines))
+            elif tag == 'hr':
+                flush()
+                out.append('---')
+            elif tag in _BLOCK_TAGS:
+                flush()
+                # 只包含行内内容的块直接作为一个段落，否则展开包装递归处理
+                if child in self.has_block:
+                    self.blocks(child, out)
+                else:
+                    text = self.inline_text(child).strip()
+                    if text:
+                        out.append(text)
+            else:
+                inline.append(self.inline(child))
+            inline.append(_text(child.tail))
+        flush()
+
+
+def element_to_markdown(element):
+    """已解析的正文元素（如文章页面中的 #js_content）转换为 Markdown，不包含元素自身的 tail"""
+    blocks = []
+    _Converter(element).blocks(element, blocks)
+    return '\n\n'.join(blocks).strip() + '\n'
+
+
+def parse_fragment(html_content):
+    """解析正文HTML片段，返回包含全部内容的容器元素"""
+    return lxml_html.fragment_fromstring(html_content, create_parent='div')
+
+
+def html_to_markdown(html_content):
+    """正文HTML转换为 Markdown"""
+    if not html_content or not html_content.strip():
+        return '\n'
+    return element_to_markdown(parse_fragment(html_content))
+
+
+def inner_html(element):
+    """元素内部的HTML（不含元素自身的标签）"""
+    parts = [html.escape(element.text, quote=False)] if element.text else []
+    parts += [etree.tostring(child, encoding='unicode', method='html') for child in element]
+    return ''.join(parts)
+
+
+def normalize_many(contents, processes=2, chunksize=8):
+    """批量转换正文HTML，返回与输入顺序一致的 Markdown 列表
+
+    processes > 0 时在共享进程池中并行转换（见 services.pipeline.get_process_pool），
+    否则在当前进程中逐篇转换。
+    """
+    contents = list(contents)
+    if processes <= 0 or len(contents) <= 1:
+        return [html_to_markdown(content) for content in contents]
+
+    from services.pipeline import get_process_pool
+
+    return get_process_pool(processes).map(html_to_markdown, contents, chunksize=chunksize)
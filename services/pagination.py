@@ -0,0 +1,67 @@
+"""
+游标分页模块
+
+列表页按 (created_at, 主键) 降序做键集分页，避免 OFFSET 深翻页和一次性加载全表。
+游标格式: "<created_at:%Y%m%d%H%M%S%f>_<主键>"，由上一页最后一条记录生成。
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+_CURSOR_TIME_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def encode_cursor(created_at, pk):
+    """根据记录的创建时间和主键生成游标"""
+    return f'{created_at.strftime(_CURSOR_TIME_FORMAT)}_{pk}'
+
+
+def decode_cursor(cursor):
+    """解析游标，格式错误时抛出 ValueError"""
+    stamp, _, pk = cursor.partition('_')
+    return datetime.strptime(stamp, _CURSOR_TIME_FORMAT), int(pk)
+
+
+def keyset_page(query, created_col, pk_col, columns, cursor=None, limit=20):
+    """查询一页数据，只加载 columns 中的列
+
+    Args:
+        query: 已应用过滤条件的查询
+        created_col: 创建时间列
+        pk_col: 主键列
+        columns: 需要加载的列（其余列延迟加载）
+        cursor: 上一页返回的游标，None 表示第一页
+        limit: 每页数量
+
+    Returns:
+        tuple: (当前页记录列表, 下一页游标或None)
+    """
+    query = query.options(load_only(*columns))
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, pk_col < pk)
+        ))
+
+    items = query.order_by(created_col.desc(), pk_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, pk_col.key))
+    return items, next_cursor
+
+
+def serialize_columns(item, columns):
+    """将记录的列表列转换为字典（不会触发延迟列的加载）"""
+    data = {}
+    for column in columns:
+        value = getattr(item, column.key)
+        if isinstance(value, datetime):
+            value = value.strftime('%Y-%m-%d %H:%M:%S')
+        data[column.key] = value
+    return data
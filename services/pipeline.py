@@ -0,0 +1,326 @@
+"""
+分阶段流水线
+
+把 抓取 → 解析 → 入库 这样的串行步骤拆成独立阶段，阶段之间用有界队列连接：
+- 网络阶段由多个工作线程并发执行；
+- CPU密集的阶段（HTML解析、转换 Markdown）可以提交到进程池，不受GIL限制；
+- 入库阶段按批处理，单个线程写数据库；
+下游处理上一篇文章的同时上游已经在处理下一篇，网络等待和CPU计算互相重叠。
+队列有界，下游变慢时上游自动阻塞，内存占用不随文章数增长。
+
+每个阶段统计处理数、失败数、忙碌时间和输入队列深度，运行中和最近完成的流水线
+可通过 pipeline_registry 查询（/api/pipelines/stats）。
+"""
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_STOP = object()
+
+
+class SharedProcessPool:
+    """可自动重建的进程池
+
+    子进程异常退出（内存不足、解析库崩溃等）后 ProcessPoolExecutor 不能再提交任务，
+    这里丢弃损坏的进程池，下次调用时重新创建，当前任务重试一次。
+    使用 spawn 方式启动子进程，避免在多线程的Web进程中 fork。
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, call):
+        for attempt in range(2):
+            executor = self._get()
+            try:
+                return call(executor)
+            except BrokenProcessPool:
+                print("[流水线] 进程池子进程异常退出，重建进程池")
+                self._discard(executor)
+                if attempt:
+                    raise
+
+    def call(self, func, arg):
+        """在子进程中执行 func(arg) 并返回结果"""
+        return self._run(lambda executor: executor.submit(func, arg).result())
+
+    def map(self, func, items, chunksize=1):
+        """在子进程中批量执行，返回与输入顺序一致的结果列表"""
+        items = list(items)
+        return self._run(lambda executor: list(executor.map(func, items, chunksize=chunksize)))
+
+
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+
+
+def get_process_pool(max_workers=2):
+    """获取进程内共享的进程池，按进程数区分（不同进程数的调用方各自共用一个）"""
+    with _process_pools_lock:
+        pool = _process_pools.get(max_workers)
+        if pool is None:
+            pool = _process_pools[max_workers] = SharedProcessPool(max_workers)
+        return pool
+
+
+class Stage:
+    """流水线中的一个阶段
+
+    Args:
+        name: 阶段名称（用于统计）
+        func: 单条模式 func(item) -> 结果，返回 None 时丢弃；
+              批处理模式 func(items) -> 结果列表（None 表示没有输出）
+        workers: 工作线程数
+        batch_size: 设置时按批调用 func，凑满或上游暂时没有数据时提交
+        executor: 设置时在该执行器（如进程池）中执行 func，func 和参数必须可序列化
+        queue_size: 输入队列容量
+    """
+
+    def __init__(self, name, func, workers=1, batch_size=None, executor=None, queue_size=32):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.executor = executor
+        self.input = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._running = self.workers
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+
+    def call(self, payload):
+        if self.executor is None:
+            return self.func(payload)
+        if isinstance(self.executor, SharedProcessPool):
+            return self.executor.call(self.func, payload)
+        return self.executor.submit(self.func, payload).result()
+
+    def record(self, processed=0, failed=0, dropped=0, busy=0.0):
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+            self.dropped += dropped
+            self.busy_seconds += busy
+
+    def worker_done(self):
+        """工作线程退出，返回是否为最后一个"""
+        with self._lock:
+            self._running -= 1
+            return self._running == 0
+
+    def stats(self, elapsed):
+        with self._lock:
+            return {
+                'name': self.name,
+                'workers': self.workers,
+                'processed': self.processed,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'queue_depth': self.input.qsize(),
+                'busy_seconds': round(self.busy_seconds, 3),
+                'per_second': round(self.processed / elapsed, 2) if elapsed > 0 else 0.0
+            }
+
+
+class Pipeline:
+    """有界队列连接的多阶段流水线
+
+    Args:
+        name: 流水线名称
+        app: 传入Flask应用时，工作线程在应用上下文中运行（阶段可以访问数据库）
+        queue_size: 各阶段输入队列的默认容量
+        key: 可选，从条目中取出标识（如URL），失败的条目标识记录在 failed_keys 中
+    """
+
+    def __init__(self, name, app=None, queue_size=32, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.app = app
+        self.queue_size = queue_size
+        self.key = key
+        self.failed_keys = set()
+        self.stages = []
+        self.results = []
+        self.fed = 0
+        self.started_at = None
+        self.finished_at = None
+        self._results_lock = threading.Lock()
+
+    def add_stage(self, name, func, workers=1, batch_size=None, executor=None, queue_size=None):
+        self.stages.append(Stage(name, func, workers=workers, batch_size=batch_size, executor=executor,
+                                 queue_size=queue_size or self.queue_size))
+        return self
+
+    @property
+    def failed(self):
+        """各阶段失败的条目总数"""
+        return sum(stage.failed for stage in self.stages)
+
+    def _emit(self, index, result):
+        if index + 1 < len(self.stages):
+            self.stages[index + 1].input.put(result)
+        else:
+            with self._results_lock:
+                self.results.append(result)
+
+    def _process(self, index, payload, count):
+        """执行一次阶段函数，count 为 payload 包含的条目数"""
+        stage = self.stages[index]
+        started = time.monotonic()
+        try:
+            result = stage.call(payload)
+        except Exception as e:
+            stage.record(failed=count, busy=time.monotonic() - started)
+            print(f"[流水线] {self.name} 阶段 {stage.name} 处理失败: {str(e)}")
+            if self.key is not None:
+                keys = [self.key(item) for item in payload] if stage.batch_size else [self.key(payload)]
+                with self._results_lock:
+                    self.failed_keys.update(keys)
+            return
+
+        if stage.batch_size:
+            outputs = result or []
+            stage.record(processed=count, busy=time.monotonic() - started)
+        else:
+            outputs = [] if result is None else [result]
+            stage.record(processed=count if result is not None else 0,
+                         dropped=count if result is None else 0, busy=time.monotonic() - started)
+        for output in outputs:
+            self._emit(index, output)
+
+    def _work(self, index):
+        stage = self.stages[index]
+        batch = []
+        while True:
+            if stage.batch_size and batch:
+                # 上游暂时没有数据时先提交已有的批次，不等凑满
+                try:
+                    item = stage.input.get(timeout=0.2)
+                except queue.Empty:
+                    self._process(index, batch, len(batch))
+                    batch = []
+                    continue
+            else:
+                item = stage.input.get()
+
+            if item is _STOP:
+                break
+            if stage.batch_size:
+                batch.append(item)
+                if len(batch) >= stage.batch_size:
+                    self._process(index, batch, len(batch))
+                    batch = []
+            else:
+                self._process(index, item, 1)
+
+        if batch:
+            self._process(index, batch, len(batch))
+
+    def _worker(self, index):
+        try:
+            if self.app is None:
+                self._work(index)
+            else:
+                with self.app.app_context():
+                    self._work(index)
+        finally:
+            # 最后一个退出的工作线程通知下游阶段结束
+            if self.stages[index].worker_done() and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    self.stages[index + 1].input.put(_STOP)
+
+    def run(self, items):
+        """把 items 依次送入第一个阶段，等待所有阶段处理完成，返回最后一个阶段的输出列表"""
+        if not self.stages:
+            return list(items)
+
+        self.started_at = time.monotonic()
+        pipeline_registry.started(self)
+        threads = [
+            threading.Thread(target=self._worker, args=(index,), name=f'{self.name}-{stage.name}-{n}', daemon=True)
+            for index, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        first = self.stages[0]
+        try:
+            for item in items:
+                first.input.put(item)
+                self.fed += 1
+        finally:
+            for _ in range(first.workers):
+                first.input.put(_STOP)
+            for thread in threads:
+                thread.join()
+            self.finished_at = time.monotonic()
+            pipeline_registry.finished(self)
+        return self.results
+
+    def stats(self):
+        """各阶段的吞吐量和队列深度"""
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            'id': self.id,
+            'name': self.name,
+            'running': self.started_at is not None and self.finished_at is None,
+            'fed': self.fed,
+            'elapsed': round(elapsed, 3),
+            'stages': [stage.stats(elapsed) for stage in self.stages]
+        }
+
+
+class PipelineRegistry:
+    """记录运行中和最近完成的流水线"""
+
+    def __init__(self, keep=20):
+        self._lock = threading.Lock()
+        self._running = {}
+        self._finished = deque(maxlen=keep)
+
+    def started(self, pipeline):
+        with self._lock:
+            self._running[pipeline.id] = pipeline
+
+    def finished(self, pipeline):
+        with self._lock:
+            self._running.pop(pipeline.id, None)
+            self._finished.appendleft(pipeline)
+
+    def snapshot(self):
+        with self._lock:
+            running = list(self._running.values())
+            finished = list(self._finished)
+        return {
+            'running': [pipeline.stats() for pipeline in running],
+            'recent': [pipeline.stats() for pipeline in finished]
+        }
+
+
+pipeline_registry = PipelineRegistry()
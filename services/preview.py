@@ -0,0 +1,268 @@
+"""
+编辑器增量预览模块
+
+把 Markdown 文档按块（空行分隔，代码块/列表作为整体）切分，服务端按
+(会话, 文档) 缓存每个块的渲染结果。每次预览只重新渲染发生变化的块，
+并以补丁形式返回：[{start, end, html: [...]}]，表示用 html 列表替换
+上一版本中 [start, end) 范围内的块。
+
+客户端有两种提交方式：
+1. 提交全文 markdown，服务端切块并与上一版本比对，只渲染变化的部分；
+2. 提交相对 base_version 的块级修改 changes，服务端直接应用。
+
+版本号只增不减，较旧版本的请求（防抖后仍乱序到达的请求）会被忽略。
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from markdown.util import BLOCK_LEVEL_ELEMENTS
+
+from services.render import render_markdown
+
+# 围栏代码块起止标记
+_FENCE_PATTERN = re.compile(r'^\s*(`{3,}|~{3,})')
+# 列表项
+_LIST_ITEM_PATTERN = re.compile(r'^\s*([-*+]|\d+[.)])\s+')
+# 引用
+_QUOTE_PATTERN = re.compile(r'^\s{0,3}>')
+# 定义列表的定义行（def_list 扩展）
+_DEFINITION_PATTERN = re.compile(r'^\s{0,3}:[ \t]+')
+# 无法按块独立渲染的语法，出现时整篇作为一块：
+# 引用式链接定义、脚注、缩写依赖整篇文档；块级原始HTML内部可以有空行，按空行切开后标签不配对
+_DOCUMENT_LEVEL_PATTERN = re.compile(
+    r'^\s{0,3}(\[[^\]]+\]:\s|\[\^[^\]]+\]|\*\[[^\]]+\]:|<!--|</?(%s)[\s/>])' % '|'.join(BLOCK_LEVEL_ELEMENTS),
+    re.MULTILINE | re.IGNORECASE
+)
+
+
+class PreviewConflict(Exception):
+    """客户端的基准版本与服务端缓存不一致，需要重新提交全文"""
+
+
+class InvalidChanges(ValueError):
+    """提交的块级修改格式错误"""
+
+
+def _is_index(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _starts_definition(lines, index):
+    """lines[index] 起的段落是否为定义列表条目（段落内或紧随其后的段落有定义行）"""
+    in_paragraph = True
+    for line in lines[index + 1:]:
+        if not line.strip():
+            in_paragraph = False
+        elif _DEFINITION_PATTERN.match(line):
+            return True
+        elif not in_paragraph:
+            return False
+    return False
+
+
+def _continues_block(current, lines, index):
+    """空行之后的 lines[index] 是否仍属于 current 块
+
+    与整篇渲染保持一致：缩进行（列表内段落、缩进代码）、连续的列表项、
+    连续的引用段落，以及定义列表的定义行和后续条目都合并为一块。
+    """
+    line = lines[index]
+    if line.startswith((' ', '\t')) or _DEFINITION_PATTERN.match(line):
+        return True
+    if _LIST_ITEM_PATTERN.match(line) and _LIST_ITEM_PATTERN.match(current[0]):
+        return True
+    if _QUOTE_PATTERN.match(line) and _QUOTE_PATTERN.match(current[0]):
+        return True
+    return (any(_DEFINITION_PATTERN.match(previous) for previous in current)
+            and _starts_definition(lines, index))
+
+
+def split_blocks(text):
+    """将 Markdown 文档切分为可独立渲染的块
+
+    各块分别渲染后依次拼接，与整篇渲染的结果一致。
+    """
+    text = text.replace('\r\n', '\n')
+    if _DOCUMENT_LEVEL_PATTERN.search(text):
+        # 文档级语法需要整体渲染，退化为单块
+        return [text]
+
+    blocks = []
+    current = []
+    fence = None
+    blank_pending = False
+    lines = text.split('\n')
+
+    for index, line in enumerate(lines):
+        if fence:
+            current.append(line)
+            match = _FENCE_PATTERN.match(line)
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence):
+                fence = None
+            continue
+
+        if not line.strip():
+            if current:
+                blank_pending = True
+            continue
+
+        if blank_pending:
+            if _continues_block(current, lines, index):
+                current.append('')
+            else:
+                blocks.append('\n'.join(current))
+                current = []
+            blank_pending = False
+
+        match = _FENCE_PATTERN.match(line)
+        if match:
+            fence = match.group(1)
+        current.append(line)
+
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+
+class PreviewDocument:
+    """单个文档的块缓存"""
+
+    def __init__(self):
+        self.version = -1
+        self.blocks = []
+        self.html = []
+        self.touched_at = time.time()
+        # 同一文档的请求串行处理，避免并发写乱块列表
+        self.lock = threading.Lock()
+
+    def apply(self, start, end, new_blocks):
+        """替换 [start, end) 范围内的块，返回新块的HTML"""
+        new_html = [render_markdown(block) for block in new_blocks]
+        self.blocks[start:end] = new_blocks
+        self.html[start:end] = new_html
+        return new_html
+
+    def update_full(self, text):
+        """提交全文：与当前块列表比对出变化范围并重新渲染，返回补丁列表"""
+        new_blocks = split_blocks(text)
+        old_blocks = self.blocks
+
+        prefix = 0
+        limit = min(len(old_blocks), len(new_blocks))
+        while prefix < limit and old_blocks[prefix] == new_blocks[prefix]:
+            prefix += 1
+
+        suffix = 0
+        while (suffix < limit - prefix
+               and old_blocks[len(old_blocks) - 1 - suffix] == new_blocks[len(new_blocks) - 1 - suffix]):
+            suffix += 1
+
+        end = len(old_blocks) - suffix
+        changed = new_blocks[prefix:len(new_blocks) - suffix]
+        if prefix == end and not changed:
+            return []
+        html = self.apply(prefix, end, changed)
+        return [{'start': prefix, 'end': end, 'html': html}]
+
+    def update_changes(self, changes):
+        """应用客户端提交的块级修改，范围均相对于上一版本的块列表
+
+        changes 格式错误时抛出 InvalidChanges，范围超出上一版本或相互重叠时抛出 PreviewConflict
+        """
+        if not isinstance(changes, list):
+            raise InvalidChanges('changes 必须是列表')
+        for change in changes:
+            if (not isinstance(change, dict) or not _is_index(change.get('start'))
+                    or not _is_index(change.get('end'))
+                    or not isinstance(change.get('blocks', []), list)):
+                raise InvalidChanges('changes 格式错误，应为 [{start, end, blocks}]')
+
+        ordered = sorted(changes, key=lambda c: c['start'], reverse=True)
+        last_start = len(self.blocks)
+        for change in ordered:
+            start, end = change['start'], change['end']
+            if not 0 <= start <= end <= last_start:
+                raise PreviewConflict('块范围无效或相互重叠')
+            last_start = start
+
+        patches = []
+        # 从后往前应用，前面的下标不受影响
+        for change in ordered:
+            start, end = change['start'], change['end']
+            new_blocks = [str(block) for block in change.get('blocks', [])]
+            html = self.apply(start, end, new_blocks)
+            patches.append({'start': start, 'end': end, 'html': html})
+        patches.reverse()
+        return patches
+
+
+class PreviewStore:
+    """按 (会话ID, 文档ID) 保存预览文档，超过容量或过期时淘汰"""
+
+    def __init__(self, max_documents=200, ttl=1800):
+        self.max_documents = max_documents
+        self.ttl = ttl
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_documents = app.config.get('PREVIEW_CACHE_SIZE', self.max_documents)
+        self.ttl = app.config.get('PREVIEW_CACHE_TTL', self.ttl)
+
+    def _get_document(self, key):
+        now = time.time()
+        with self._lock:
+            for stale_key in [k for k, d in self._documents.items() if now - d.touched_at > self.ttl]:
+                del self._documents[stale_key]
+
+            document = self._documents.get(key)
+            if document is None:
+                document = PreviewDocument()
+                self._documents[key] = document
+            self._documents.move_to_end(key)
+            document.touched_at = now
+
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+            return document
+
+    def update(self, session_id, doc_id, version, markdown_text=None, changes=None, base_version=None):
+        """更新文档并返回渲染结果
+
+        返回 dict: version, block_count, patches, stale
+        """
+        document = self._get_document((session_id, doc_id))
+
+        with document.lock:
+            if version <= document.version:
+                return {
+                    'version': document.version,
+                    'block_count': len(document.blocks),
+                    'patches': [],
+                    'stale': True
+                }
+
+            if markdown_text is not None:
+                patches = document.update_full(markdown_text)
+            else:
+                if base_version != document.version:
+                    raise PreviewConflict('预览缓存已失效，请提交全文')
+                patches = document.update_changes([] if changes is None else changes)
+
+            document.version = version
+            return {
+                'version': version,
+                'block_count': len(document.blocks),
+                'patches': patches,
+                'stale': False
+            }
+
+    def discard(self, session_id, doc_id):
+        """丢弃文档缓存（关闭编辑器时调用）"""
+        with self._lock:
+            self._documents.pop((session_id, doc_id), None)
+
+
+preview_store = PreviewStore()
@@ -0,0 +1,184 @@
+"""
+Markdown渲染模块
+
+负责将 normalized_articles 的 Markdown 内容渲染为详情页使用的 HTML，
+并对渲染结果做缓存（内存LRU + 可选的磁盘缓存），缓存键为 (nid, updated_at)。
+
+Markdown 转换器按线程复用：每个线程只初始化一次扩展（包括 codehilite），
+之后每次转换前调用 reset() 清理上一次的状态。
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import markdown
+
+# 详情页和预览共用的扩展列表
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'tables', 'fenced_code', 'nl2br']
+
+# 文章内容为空时显示的占位HTML
+EMPTY_CONTENT_HTML = '<p class="text-gray-500">暂无内容</p>'
+
+# 修复图片路径：如果 src 以 static/ 开头但没有 /，则补全 /
+_IMG_SRC_PATTERN = re.compile(r'<img ([^>]*?)src="(static/[^"]+)"')
+
+
+# 每个线程持有一个预先初始化好的转换器
+_local = threading.local()
+
+
+def get_converter():
+    """获取当前线程的 Markdown 转换器，首次调用时创建"""
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.converter = converter
+    return converter
+
+
+def render_markdown(content):
+    """将 Markdown 转换为 HTML"""
+    return get_converter().reset().convert(content)
+
+
+def fix_image_paths(html_content):
+    """补全图片的相对路径，使其从站点根目录加载"""
+    return _IMG_SRC_PATTERN.sub(r'<img \1src="/\2"', html_content)
+
+
+class RenderCache:
+    """文章渲染结果缓存
+
+    内存中保存最近使用的 max_size 篇文章的HTML；配置了 cache_dir 时，
+    淘汰出内存的结果仍可从磁盘读取，进程重启后也能复用。
+    """
+
+    def __init__(self, max_size=256, cache_dir=None):
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        """从Flask配置中读取缓存大小和磁盘缓存目录"""
+        self.max_size = app.config.get('RENDER_CACHE_SIZE', self.max_size)
+        self.cache_dir = app.config.get('RENDER_CACHE_DIR') or None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _make_key(nid, updated_at):
+        stamp = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+        return f'{nid}_{stamp}'
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.html')
+
+    def get(self, nid, updated_at):
+        """读取缓存，未命中返回 None"""
+        key = self._make_key(nid, updated_at)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    html_content = f.read()
+            except OSError:
+                html_content = None
+            if html_content is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._put_memory(key, html_content)
+                return html_content
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, nid, updated_at, html_content):
+        """写入缓存"""
+        key = self._make_key(nid, updated_at)
+        with self._lock:
+            self._put_memory(key, html_content)
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[渲染缓存] 写入磁盘缓存失败: {str(e)}")
+
+    def _put_memory(self, key, html_content):
+        self._items[key] = html_content
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, nid):
+        """删除某篇文章的所有缓存版本（文章更新后调用）"""
+        prefix = f'{nid}_'
+        with self._lock:
+            for key in [k for k in self._items if k.startswith(prefix)]:
+                del self._items[key]
+            self.invalidations += 1
+
+        if self.cache_dir:
+            try:
+                filenames = os.listdir(self.cache_dir)
+            except OSError:
+                return
+            for filename in filenames:
+                if filename.startswith(prefix) and filename.endswith('.html'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+
+    def clear(self):
+        """清空内存缓存和计数器"""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.disk_hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'disk_cache_enabled': bool(self.cache_dir),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round((self.hits + self.disk_hits) / total, 4) if total else 0.0
+            }
+
+
+render_cache = RenderCache()
+
+
+def render_article_html(article):
+    """渲染文章详情HTML(normalized_articles表)，优先使用缓存"""
+    if not article.content:
+        return EMPTY_CONTENT_HTML
+
+    html_content = render_cache.get(article.nid, article.updated_at)
+    if html_content is None:
+        html_content = fix_image_paths(render_markdown(article.content))
+        render_cache.set(article.nid, article.updated_at, html_content)
+    return html_content
@@ -0,0 +1,89 @@
+"""
+数据库统计模块
+
+用一条 UNION ALL 分组查询统计三张文章表的数量及按状态的分布，
+结果在进程内缓存 STATS_CACHE_TTL 秒；存活检查使用单独的 SELECT 1。
+"""
+import threading
+import time
+
+from sqlalchemy import func, literal, select, text, union_all
+
+from services.models import db, NormalizedArticle, SourceArticle, PublishArticle
+
+
+def ping_db():
+    """轻量级存活检查"""
+    db.session.execute(text('SELECT 1'))
+
+
+def query_stats():
+    """一次往返查询所有统计数据"""
+    normalized = select(
+        literal('normalized').label('tbl'),
+        NormalizedArticle.source_type.label('grp'),
+        NormalizedArticle.process_status.label('status'),
+        func.count().label('cnt')
+    ).group_by(NormalizedArticle.source_type, NormalizedArticle.process_status)
+
+    source = select(
+        literal('source'),
+        SourceArticle.source_type,
+        SourceArticle.process_status,
+        func.count()
+    ).group_by(SourceArticle.source_type, SourceArticle.process_status)
+
+    publish = select(
+        literal('publish'),
+        PublishArticle.target_platform,
+        PublishArticle.publish_status,
+        func.count()
+    ).group_by(PublishArticle.target_platform, PublishArticle.publish_status)
+
+    rows = db.session.execute(union_all(normalized, source, publish)).all()
+
+    stats = {
+        'normalized_article_count': 0,
+        'source_article_count': 0,
+        'publish_article_count': 0,
+        'wuhu_count': 0,
+        'tejian_count': 0,
+        # {source_type: {process_status: 数量}}
+        'normalized_by_status': {},
+        'source_by_status': {},
+        # {target_platform: {publish_status: 数量}}
+        'publish_by_status': {}
+    }
+    for tbl, grp, status, cnt in rows:
+        stats[f'{tbl}_article_count'] += cnt
+        stats[f'{tbl}_by_status'].setdefault(grp, {})[str(status)] = cnt
+        if tbl == 'normalized' and grp == 'WUHU':
+            stats['wuhu_count'] += cnt
+        elif tbl == 'normalized' and grp == 'TEJIAN':
+            stats['tejian_count'] += cnt
+    return stats
+
+
+class StatsCache:
+    """统计结果缓存，过期后由第一个请求重新查询，其余请求等待结果"""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._stats = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('STATS_CACHE_TTL', self.ttl)
+
+    def get(self, refresh=False):
+        """返回 (统计数据, 生成时间戳)"""
+        with self._lock:
+            if refresh or self._stats is None or time.time() >= self._expires_at:
+                stats = query_stats()
+                self._stats = (stats, time.time())
+                self._expires_at = time.time() + self.ttl
+            return self._stats
+
+
+stats_cache = StatsCache()
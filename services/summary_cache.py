@@ -0,0 +1,98 @@
+"""
+摘要缓存模块
+
+AI摘要按 (模型, 提示词版本, 文章内容) 的哈希缓存在 summary_cache 表中，
+文章内容未变化时直接返回上次的摘要，不再调用大模型。
+缓存过期时间和最大条数由 SUMMARY_CACHE_TTL_DAYS / SUMMARY_CACHE_MAX_ROWS 控制。
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import text
+
+from services.models import db
+
+
+class SummaryCache(db.Model):
+    """摘要缓存表"""
+    __tablename__ = 'summary_cache'
+
+    cache_key = db.Column(db.String(64), primary_key=True)
+    summary = db.Column(db.Text, nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    prompt_version = db.Column(db.String(20), nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+def make_cache_key(content):
+    """由模型名、提示词版本和文章内容计算缓存键"""
+    config = current_app.config
+    raw = f"{config['SUMMARY_MODEL']}\n{config['SUMMARY_PROMPT_VERSION']}\n{content}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_cached_summary(content):
+    """读取缓存的摘要，未命中或已过期返回 None"""
+    entry = db.session.get(SummaryCache, make_cache_key(content))
+    if entry is None or entry.expires_at <= datetime.now():
+        return None
+
+    entry.hit_count += 1
+    db.session.commit()
+    return entry.summary
+
+
+def store_summary(content, summary):
+    """保存摘要，同时清理过期和超出数量上限的缓存"""
+    now = datetime.now()
+    entry = SummaryCache(
+        cache_key=make_cache_key(content),
+        summary=summary,
+        model=current_app.config['SUMMARY_MODEL'],
+        prompt_version=current_app.config['SUMMARY_PROMPT_VERSION'],
+        hit_count=0,
+        created_at=now,
+        expires_at=now + timedelta(days=current_app.config['SUMMARY_CACHE_TTL_DAYS'])
+    )
+    db.session.merge(entry)
+
+    SummaryCache.query.filter(SummaryCache.expires_at <= now).delete(synchronize_session=False)
+    overflow = SummaryCache.query.count() - current_app.config['SUMMARY_CACHE_MAX_ROWS']
+    if overflow > 0:
+        db.session.execute(
+            text('DELETE FROM summary_cache ORDER BY created_at ASC LIMIT :overflow'),
+            {'overflow': overflow}
+        )
+    db.session.commit()
+
+
+def generate_summary_cached(content, force=False):
+    """生成摘要（优先使用缓存）
+
+    Returns:
+        tuple: (success, message, summary, cached)
+    """
+    if not force:
+        try:
+            summary = get_cached_summary(content)
+        except Exception as e:
+            # 缓存不可用时直接调用大模型
+            db.session.rollback()
+            print(f"[摘要缓存] 读取失败: {str(e)}")
+            summary = None
+        if summary is not None:
+            return True, '摘要生成成功（缓存）', summary, True
+
+    from services.ai_process import generate_article_summary
+
+    success, message, summary = generate_article_summary(content)
+    if success and summary:
+        try:
+            store_summary(content, summary)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[摘要缓存] 保存失败: {str(e)}")
+    return success, message, summary, False
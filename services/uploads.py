@@ -0,0 +1,161 @@
+"""
+图片上传模块
+
+上传文件分块写入临时文件（边写边计算sha256，不把整个文件读入内存），
+按文件头魔数校验真实格式，并为大图生成缩小后的展示版本供文章引用。
+
+文件按内容寻址保存: <root>/<sha256[0:2]>/<sha256[2:4]>/<sha256>.<ext>，
+同一张图片无论被多少篇文章引用都只保存一份。
+"""
+import hashlib
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """上传文件无效"""
+
+
+def detect_image_type(head):
+    """根据文件头判断图片格式，返回扩展名，无法识别返回 None"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if (text.startswith(b'<?xml') or text.startswith(b'<svg') or text.startswith(b'<!doctype svg')) and b'<svg' in text:
+        return 'svg'
+    return None
+
+
+def _stream_to_temp(stream, folder, max_bytes):
+    """分块写入临时文件，返回 (临时文件路径, sha256, 大小, 文件头)"""
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadError(f'文件超过大小限制（{max_bytes // (1024 * 1024)}MB）')
+                if len(head) < 1024:
+                    head += chunk[:1024 - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size, head
+
+
+def make_display_variant(path, base_path, width, jpeg_quality=85):
+    """生成指定最大宽度的展示版本（去除元数据），原图不超过该宽度时返回 None"""
+    with Image.open(path) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+        # 按 EXIF 方向旋转后再比较宽度（手机竖拍的照片原始宽高是横向的）
+        image = ImageOps.exif_transpose(image)
+        if image.width <= width:
+            return None
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+    if resized.mode in ('RGBA', 'LA', 'P'):
+        # 带透明通道的图片保持PNG
+        variant_path = f'{base_path}_{width}.png'
+        resized.save(variant_path, 'PNG', optimize=True)
+    else:
+        variant_path = f'{base_path}_{width}.jpg'
+        resized.convert('RGB').save(variant_path, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+    return variant_path
+
+
+def blob_folder(root, sha256):
+    """内容哈希对应的保存目录"""
+    return os.path.join(root, sha256[:2], sha256[2:4])
+
+
+def save_upload(stream, root, max_bytes=None, display_widths=(1080,)):
+    """保存上传的图片
+
+    Args:
+        stream: 上传文件流（FileStorage.stream）
+        root: 图片库根目录
+        max_bytes: 最大字节数
+        display_widths: 需要生成的展示版本宽度
+
+    Returns:
+        dict: path（相对 root 的原图路径）, ext, sha256, size, width, height, deduplicated,
+              display_path（最大的展示版本，没有时为 None）
+    """
+    os.makedirs(root, exist_ok=True)
+    tmp_path, sha256, size, head = _stream_to_temp(stream, root, max_bytes)
+
+    try:
+        ext = detect_image_type(head)
+        if ext is None:
+            raise UploadError('文件内容不是有效的图片')
+
+        width = height = None
+        if ext != 'svg':
+            try:
+                with Image.open(tmp_path) as image:
+                    width, height = image.size
+                    image.verify()
+            except Exception:
+                raise UploadError('图片文件已损坏或格式不受支持')
+
+        # 以内容哈希命名：同一张图片只保存一次
+        folder = blob_folder(root, sha256)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'{sha256}.{ext}')
+        deduplicated = os.path.exists(path)
+        if deduplicated:
+            os.remove(tmp_path)
+            # 更新修改时间，避免被垃圾回收的宽限期误删
+            os.utime(path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    display_path = None
+    if ext != 'svg':
+        for display_width in sorted(display_widths, reverse=True):
+            base_path = os.path.join(folder, sha256)
+            existing = [f'{base_path}_{display_width}.jpg', f'{base_path}_{display_width}.png']
+            variant_path = next((p for p in existing if os.path.exists(p)), None)
+            if variant_path is None:
+                try:
+                    variant_path = make_display_variant(path, base_path, display_width)
+                except Exception as e:
+                    print(f"[图片上传] 生成展示版本失败: {str(e)}")
+                    variant_path = None
+            if variant_path and display_path is None:
+                display_path = os.path.relpath(variant_path, root).replace(os.sep, '/')
+
+    return {
+        'path': os.path.relpath(path, root).replace(os.sep, '/'),
+        'ext': ext,
+        'sha256': sha256,
+        'size': size,
+        'width': width,
+        'height': height,
+        'deduplicated': deduplicated,
+        'display_path': display_path
+    }
@@ -0,0 +1,109 @@
+"""
+网站发布模块
+
+远程网站数据库作为 SQLAlchemy 的 remote 绑定（SQLALCHEMY_BINDS），使用带 pre-ping 的连接池，
+不再每次发布都新建连接。website_articles 以 nid 为唯一键，发布使用
+INSERT ... ON DUPLICATE KEY UPDATE，一条语句完成插入或更新，重复发布不会产生重复记录。
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert
+
+from services.models import db
+
+REMOTE_BIND = 'remote'
+
+# 重复发布时更新的列
+_UPDATE_COLUMNS = ('title', 'content', 'cover_url', 'source_url', 'publish_status', 'platform_article_id')
+
+
+class WebsiteArticle(db.Model):
+    """远程网站发布表"""
+    __bind_key__ = REMOTE_BIND
+    __tablename__ = 'website_articles'
+
+    wid = db.Column(db.BigInteger, primary_key=True)
+    nid = db.Column(db.BigInteger, nullable=False, unique=True)
+    title = db.Column(db.String(200), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    cover_url = db.Column(db.String(500))
+    source_url = db.Column(db.String(500), nullable=False)
+    target_platform = db.Column(db.String(20), nullable=False)
+    publish_status = db.Column(db.SmallInteger, nullable=False, default=0)
+    platform_article_id = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+def _website_row(article):
+    """publish_articles 记录转换为 website_articles 行"""
+    return {
+        'nid': article.nid,
+        'title': article.title,
+        'content': article.content_html,
+        'cover_url': article.cover_url,
+        'source_url': article.source_url,
+        'target_platform': article.target_platform,
+        'publish_status': article.publish_status,
+        'platform_article_id': article.platform_article_id,
+        'created_at': article.created_at,
+        'updated_at': article.updated_at
+    }
+
+
+def _upsert_statement(rows):
+    """多行 upsert；wid=LAST_INSERT_ID(wid) 使单行发布时 lastrowid 在更新时也返回已有的 wid"""
+    table = WebsiteArticle.__table__
+    stmt = insert(table).values(rows)
+    updates = {name: stmt.inserted[name] for name in _UPDATE_COLUMNS}
+    updates['updated_at'] = datetime.now()
+    updates['wid'] = db.func.last_insert_id(table.c.wid)
+    return stmt.on_duplicate_key_update(**updates)
+
+
+def _mark_published(article, wid):
+    """更新本地文章的发布状态，返回是否为首次发布"""
+    platform_article_id = f'website_{wid}'  # 记录远程 wid
+    created = article.platform_article_id != platform_article_id
+    article.publish_status = 1  # 设置为已发布
+    article.platform_article_id = platform_article_id
+    article.updated_at = datetime.now()
+    return created
+
+
+def publish_article(article):
+    """发布单篇文章到网站（已发布过的文章更新内容）
+
+    Returns:
+        tuple: (wid, 是否首次发布)
+    """
+    with db.engines[REMOTE_BIND].begin() as connection:
+        wid = connection.execute(_upsert_statement([_website_row(article)])).lastrowid
+
+    created = _mark_published(article, wid)
+    db.session.commit()
+    return wid, created
+
+
+def publish_articles(articles):
+    """在一个远程事务中批量发布多篇文章
+
+    Returns:
+        dict: {nid: wid}
+    """
+    if not articles:
+        return {}
+
+    nids = [article.nid for article in articles]
+    with db.engines[REMOTE_BIND].begin() as connection:
+        connection.execute(_upsert_statement([_website_row(article) for article in articles]))
+        # 多行插入时 lastrowid 只对应第一行，同一事务内按 nid 查回 wid
+        wids = dict(connection.execute(
+            select(WebsiteArticle.nid, WebsiteArticle.wid).where(WebsiteArticle.nid.in_(nids))
+        ).all())
+
+    for article in articles:
+        _mark_published(article, wids[article.nid])
+    db.session.commit()
+    return wids
@@ -0,0 +1,148 @@
+"""
+微信公众号接口客户端
+
+access_token 缓存在进程内存和 wechat_tokens 表中，过期前 WECHAT_TOKEN_MARGIN 秒才刷新，
+多个工作线程/进程共用同一个 token；刷新时锁定数据库行，避免多个进程同时刷新互相使旧 token 失效。
+接口地址由 WECHAT_API_BASE 配置，可以指向本地的模拟服务进行测试。
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from services.http_client import create_session
+from services.models import db
+
+# access_token 失效相关的错误码，遇到时刷新 token 后重试一次
+TOKEN_ERROR_CODES = {40001, 40014, 42001}
+
+
+class WechatAPIError(Exception):
+    """微信接口返回错误"""
+
+    def __init__(self, errcode, errmsg):
+        super().__init__(f'微信接口错误 {errcode}: {errmsg}')
+        self.errcode = errcode
+        self.errmsg = errmsg
+
+
+class WechatToken(db.Model):
+    """access_token 缓存表"""
+    __tablename__ = 'wechat_tokens'
+
+    appid = db.Column(db.String(64), primary_key=True)
+    access_token = db.Column(db.String(512), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+class WechatClient:
+    """微信公众号接口客户端（线程安全，需要在应用上下文中使用）
+
+    Args:
+        appid / secret: 公众号凭证，默认读取配置
+        base_url: 接口地址，默认 WECHAT_API_BASE
+        session: 使用的会话，默认新建带连接池的会话
+    """
+
+    def __init__(self, appid=None, secret=None, base_url=None, session=None, timeout=30):
+        config = current_app.config
+        self.appid = appid or config['WECHAT_APPID']
+        self.secret = secret or config['WECHAT_SECRET']
+        self.base_url = (base_url or config['WECHAT_API_BASE']).rstrip('/')
+        self.session = session or create_session(pool_size=max(4, config['WECHAT_UPLOAD_CONCURRENCY']))
+        self.timeout = timeout
+        self.margin = config['WECHAT_TOKEN_MARGIN']
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self.token_requests = 0  # 实际向微信请求 token 的次数
+
+    def _fetch_token(self):
+        """向微信请求新的 access_token，返回 (token, 有效秒数)"""
+        self.token_requests += 1
+        response = self.session.get(
+            f'{self.base_url}/cgi-bin/token',
+            params={'grant_type': 'client_credential', 'appid': self.appid, 'secret': self.secret},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        if 'access_token' not in data:
+            raise WechatAPIError(data.get('errcode'), data.get('errmsg'))
+        print(f"[微信接口] 已获取新的 access_token，有效期 {data.get('expires_in')} 秒")
+        return data['access_token'], int(data.get('expires_in', 7200))
+
+    def _load_token(self, stale_token=None):
+        """从数据库读取有效 token，不存在、即将过期或等于 stale_token 时刷新并保存"""
+        now = datetime.now()
+        margin = timedelta(seconds=self.margin)
+        try:
+            # 锁定该行，同一时间只有一个进程刷新
+            row = db.session.query(WechatToken).filter_by(appid=self.appid).with_for_update().first()
+            if row and row.expires_at - margin > now and row.access_token != stale_token:
+                token, expires_at = row.access_token, row.expires_at
+            else:
+                token, expires_in = self._fetch_token()
+                expires_at = now + timedelta(seconds=expires_in)
+                if row is None:
+                    db.session.add(WechatToken(appid=self.appid, access_token=token,
+                                               expires_at=expires_at, updated_at=now))
+                else:
+                    row.access_token, row.expires_at, row.updated_at = token, expires_at, now
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程同时插入了第一条记录，重新读取
+            db.session.rollback()
+            return self._load_token(stale_token)
+        except Exception:
+            db.session.rollback()
+            raise
+        return token, time.time() + (expires_at - now).total_seconds()
+
+    def get_access_token(self, force_refresh=False):
+        """获取 access_token，内存中的 token 未临近过期时直接返回"""
+        with self._token_lock:
+            if force_refresh or not self._token or time.time() >= self._token_expires_at - self.margin:
+                stale_token = self._token if force_refresh else None
+                self._token, self._token_expires_at = self._load_token(stale_token)
+            return self._token
+
+    def _call(self, method, path, **kwargs):
+        """调用需要 access_token 的接口，token 失效时刷新后重试一次"""
+        kwargs.setdefault('timeout', self.timeout)
+        params = kwargs.pop('params', None) or {}
+        for attempt in range(2):
+            token = self.get_access_token(force_refresh=attempt > 0)
+            response = self.session.request(method, f'{self.base_url}{path}',
+                                            params={**params, 'access_token': token}, **kwargs)
+            response.raise_for_status()
+            data = response.json()
+            errcode = data.get('errcode', 0)
+            if errcode == 0:
+                return data
+            if errcode not in TOKEN_ERROR_CODES or attempt > 0:
+                raise WechatAPIError(errcode, data.get('errmsg'))
+            print(f"[微信接口] access_token 已失效({errcode})，刷新后重试")
+
+    def upload_image(self, data, filename):
+        """上传图文消息内的图片，返回微信图片URL"""
+        result = self._call('POST', '/cgi-bin/media/uploadimg', files={'media': (filename, data)})
+        return result['url']
+
+    def add_image_material(self, data, filename):
+        """上传永久图片素材（用作封面），返回 (media_id, url)"""
+        result = self._call('POST', '/cgi-bin/material/add_material', params={'type': 'image'},
+                            files={'media': (filename, data)})
+        return result['media_id'], result.get('url')
+
+    def add_draft(self, articles):
+        """新建草稿，返回草稿 media_id"""
+        # 直接发送UTF-8字符，避免中文被转义为 \\uXXXX
+        body = json.dumps({'articles': articles}, ensure_ascii=False).encode('utf-8')
+        result = self._call('POST', '/cgi-bin/draft/add', data=body,
+                            headers={'Content-Type': 'application/json; charset=utf-8'})
+        return result['media_id']
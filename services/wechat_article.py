@@ -0,0 +1,76 @@
+"""
+微信文章页面解析
+
+从 mp.weixin.qq.com 文章页面中提取标题、作者和正文（#js_content），
+并把正文HTML转换为 Markdown（normalized_articles.content 保存 Markdown，转换见 services.normalize）。
+页面只用 lxml 解析一次，正文元素直接转换，不再序列化后重新解析。
+图片使用 data-src 中的原图地址。
+"""
+from lxml import html as lxml_html
+
+from services.normalize import element_to_markdown, inner_html
+
+
+def parse_article_page(html_text):
+    """解析文章页面
+
+    Returns:
+        dict: {title, author_name, content(正文HTML), markdown}，没有正文时返回 None
+    """
+    if not html_text or not html_text.strip():
+        return None
+    document = lxml_html.document_fromstring(html_text)
+    body = document.get_element_by_id('js_content', None)
+    if body is None:
+        return None
+
+    # 正文默认隐藏（visibility: hidden），去掉样式后保存
+    body.attrib.pop('style', None)
+    for img in body.iter('img'):
+        if img.get('data-src'):
+            img.set('src', img.get('data-src'))
+
+    title_tag = document.get_element_by_id('activity-name', None)
+    if title_tag is not None:
+        title = title_tag.text_content()
+    else:
+        meta = document.find('.//meta[@property="og:title"]')
+        title = meta.get('content', '') if meta is not None else ''
+
+    author_tag = document.get_element_by_id('js_name', None)
+    if author_tag is not None:
+        author_name = author_tag.text_content().strip() or None
+    else:
+        meta = document.find('.//meta[@name="author"]')
+        author_name = meta.get('content') if meta is not None else None
+
+    return {
+        'title': title.strip(),
+        'author_name': author_name,
+        'content': inner_html(body),
+        'markdown': element_to_markdown(body)
+    }
+
+
+def article_from_download(download):
+    """解析下载的文章页面，合并发布列表中的信息，返回可直接入库的文章字典
+
+    在同步流水线的进程池中执行，参数和返回值都是可序列化的字典。
+    页面没有正文（文章已删除、违规被屏蔽等）时返回 None，重试也不会成功，流水线记为丢弃。
+
+    Args:
+        download: {'item': 发布列表中的文章, 'html': 文章页面HTML}
+    """
+    item = download['item']
+    parsed = parse_article_page(download['html'])
+    if parsed is None:
+        print(f"[增量同步] 页面没有正文，跳过: {item['link']}")
+        return None
+    return {
+        'title': parsed['title'] or item['title'],
+        'content': parsed['content'],
+        'markdown': parsed['markdown'],
+        'source_url': item['link'],
+        'author_name': parsed['author_name'] or item['author_name'],
+        'cover_url': item['cover_url']
+    }
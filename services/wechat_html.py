@@ -0,0 +1,91 @@
+"""
+微信HTML转换缓存
+
+services.mdtowechat.markdown_to_wechat 每次都要解析 Markdown 并逐个元素注入内联样式，
+同一篇文章反复发布（修改封面、重新生成摘要后再发布）时结果完全相同。
+这里按 (转换器版本, Markdown内容) 的哈希缓存转换结果，命中时直接返回上次的输出，
+与直接调用转换器逐字节一致。转换器源码变化后版本号改变，旧缓存自动失效。
+"""
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+
+_converter_version = None
+
+
+def get_converter_version():
+    """转换器源码的哈希，修改 mdtowechat.py 后旧的缓存不再命中"""
+    global _converter_version
+    if _converter_version is None:
+        from services import mdtowechat
+
+        source = inspect.getsource(mdtowechat)
+        _converter_version = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    return _converter_version
+
+
+class WechatHtmlCache:
+    """转换结果的 LRU 缓存（按内容哈希，与文章ID无关，相同内容的文章共用）"""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """从Flask配置中读取缓存大小"""
+        self.max_size = app.config.get('WECHAT_HTML_CACHE_SIZE', self.max_size)
+
+    @staticmethod
+    def make_key(markdown_text):
+        raw = f'{get_converter_version()}\n{markdown_text}'
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, html_content):
+        with self._lock:
+            self._items[key] = html_content
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0
+            }
+
+
+wechat_html_cache = WechatHtmlCache()
+
+
+def markdown_to_wechat_cached(markdown_text):
+    """Markdown 转微信HTML，内容未变化时返回缓存的结果"""
+    from services.mdtowechat import markdown_to_wechat
+
+    key = wechat_html_cache.make_key(markdown_text)
+    html_content = wechat_html_cache.get(key)
+    if html_content is None:
+        html_content = markdown_to_wechat(markdown_text)
+        wechat_html_cache.set(key, html_content)
+    return html_content
@@ -0,0 +1,271 @@
+"""
+发布到微信公众号草稿箱（单篇和批量发布共用）
+
+每篇文章: 读取封面和正文图片 -> 上传到微信（并发，已上传过的图片按内容哈希直接复用）
+-> 替换正文图片地址 -> 新建草稿。多篇文章共用一个客户端（共享 access_token）和一个上传线程池。
+批量发布时每篇作为 publish_wechat 任务执行，与单篇发布接口共用去重键 publish_wechat:{pid}，
+同一篇文章不会同时发布两次（已有发布任务进行中的文章跳过，结果中注明）。
+已上传图片记录在 wechat_media 表中，同一张图片（logo、二维码等）只上传一次。
+"""
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from flask import current_app
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from services.jobs import job_manager, JobError
+from services.models import db, PublishArticle
+from services.wechat_api import WechatClient
+
+# 正文图片: <img ... src="..."> 或 data-src
+_IMG_SRC_PATTERN = re.compile(r'(<img\b[^>]*?\b(?:data-src|src)\s*=\s*["\'])([^"\']+)(["\'])', re.IGNORECASE)
+# 已经在微信服务器上的图片不需要重新上传
+WECHAT_IMAGE_HOSTS = ('mmbiz.qpic.cn', 'mmbiz.qlogo.cn')
+
+MEDIA_KIND_IMAGE = 'image'  # 正文图片（uploadimg 返回的URL）
+MEDIA_KIND_THUMB = 'thumb'  # 封面（永久素材 media_id）
+
+
+class WechatMedia(db.Model):
+    """已上传到微信的图片"""
+    __tablename__ = 'wechat_media'
+
+    appid = db.Column(db.String(64), primary_key=True)
+    image_hash = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(10), primary_key=True)
+    media_id = db.Column(db.String(128))
+    url = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+def _save_media(rows):
+    """写入已上传图片记录，同一图片已有记录时覆盖为最新结果（并发发布可能刚上传过同一张图片）"""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # 基准测试（benchmarks/bench_wechat_publish.py）使用 SQLite
+        stmt = sqlite_insert(WechatMedia.__table__).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['appid', 'image_hash', 'kind'],
+            set_={name: stmt.excluded[name] for name in ('media_id', 'url', 'created_at')}
+        )
+    else:
+        stmt = insert(WechatMedia.__table__).values(rows)
+        stmt = stmt.on_duplicate_key_update(**{name: stmt.inserted[name] for name in ('media_id', 'url', 'created_at')})
+    db.session.execute(stmt)
+    db.session.commit()
+
+
+def publish_dedupe_key(pid):
+    """单篇发布任务的去重键（单篇和批量发布共用）"""
+    return f'publish_wechat:{pid}'
+
+
+def _is_wechat_image(src):
+    return urlsplit(src).hostname in WECHAT_IMAGE_HOSTS
+
+
+def load_image(src, session):
+    """读取图片内容
+
+    - http(s) 地址下载；
+    - 已存在的绝对文件路径直接读取（AI生成的封面 cover_url 保存的是绝对路径）；
+    - 其他（/static/... 等）按应用根目录解析。
+    """
+    if src.startswith(('http://', 'https://', '//')):
+        url = f'https:{src}' if src.startswith('//') else src
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    if os.path.isabs(src) and os.path.isfile(src):
+        path = src
+    else:
+        path = os.path.join(current_app.root_path, urlsplit(src).path.lstrip('/'))
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class WechatPublisher:
+    """微信草稿发布器（单篇和批量发布共用）
+
+    Args:
+        client: 微信接口客户端，默认按配置创建
+        max_workers: 同时进行的图片下载/上传数
+    """
+
+    def __init__(self, client=None, max_workers=None):
+        self.client = client or WechatClient()
+        self.max_workers = max(1, max_workers or current_app.config['WECHAT_UPLOAD_CONCURRENCY'])
+        self.app = current_app._get_current_object()
+
+    def _in_context(self, func, *args):
+        """在工作线程中执行（获取 token 时需要访问数据库）"""
+        with self.app.app_context():
+            return func(*args)
+
+    def _load(self, src):
+        data = load_image(src, self.client.session)
+        return data, hashlib.sha256(data).hexdigest()
+
+    def _upload(self, kind, data, filename):
+        if kind == MEDIA_KIND_THUMB:
+            return self.client.add_image_material(data, filename)
+        return None, self.client.upload_image(data, filename)
+
+    def _upload_images(self, executor, images):
+        """并发上传图片
+
+        Args:
+            images: {(src, kind)}
+
+        Returns:
+            tuple: ({(src, kind): WechatMedia}, 新上传数量, 复用数量)
+        """
+        # 1. 并发读取图片并计算哈希
+        loaded = {src: executor.submit(self._in_context, self._load, src) for src, _ in images}
+        contents = {src: future.result() for src, future in loaded.items()}
+
+        # 2. 一次查询已上传过的图片
+        hashes = {image_hash for _, image_hash in contents.values()}
+        existing = {
+            (media.image_hash, media.kind): media
+            for media in WechatMedia.query.filter(
+                WechatMedia.appid == self.client.appid,
+                WechatMedia.image_hash.in_(hashes)
+            )
+        } if hashes else {}
+
+        # 3. 并发上传未上传过的图片（同一内容只上传一次）
+        uploads = {}
+        for src, kind in images:
+            data, image_hash = contents[src]
+            key = (image_hash, kind)
+            if key not in existing and key not in uploads:
+                filename = os.path.basename(urlsplit(src).path) or f'{image_hash}.jpg'
+                uploads[key] = executor.submit(self._in_context, self._upload, kind, data, filename)
+
+        error = None
+        rows = []
+        for (image_hash, kind), future in uploads.items():
+            try:
+                media_id, url = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            # 部分图片上传失败时，已成功的也记录下来，重试时不再重复上传
+            row = {'appid': self.client.appid, 'image_hash': image_hash, 'kind': kind,
+                   'media_id': media_id, 'url': url, 'created_at': datetime.now()}
+            rows.append(row)
+            existing[(image_hash, kind)] = WechatMedia(**row)
+        if rows:
+            _save_media(rows)
+        if error:
+            raise error
+
+        media_map = {(src, kind): existing[(contents[src][1], kind)] for src, kind in images}
+        return media_map, len(uploads), len(images) - len(uploads)
+
+    def publish_article(self, executor, article):
+        """发布单篇文章到草稿箱，返回结果字典"""
+        result = {'pid': article.pid, 'title': article.title, 'success': False}
+        if not article.cover_url:
+            result['message'] = '文章没有封面，无法创建草稿'
+            return result
+
+        content = article.content_html or ''
+        images = {(src, MEDIA_KIND_IMAGE) for _, src, _ in _IMG_SRC_PATTERN.findall(content)
+                  if not _is_wechat_image(src)}
+        images.add((article.cover_url, MEDIA_KIND_THUMB))
+
+        try:
+            media_map, uploaded, reused = self._upload_images(executor, images)
+
+            def replace_src(match):
+                media = media_map.get((match.group(2), MEDIA_KIND_IMAGE))
+                return match.group(1) + (media.url if media else match.group(2)) + match.group(3)
+
+            media_id = self.client.add_draft([{
+                'title': article.title,
+                'content': _IMG_SRC_PATTERN.sub(replace_src, content),
+                'content_source_url': article.source_url or '',
+                'thumb_media_id': media_map[(article.cover_url, MEDIA_KIND_THUMB)].media_id,
+                'need_open_comment': 0,
+                'only_fans_can_comment': 0
+            }])
+
+            article.publish_status = 1  # 设置为已发布
+            article.platform_article_id = media_id
+            article.updated_at = datetime.now()
+            db.session.commit()
+
+            result.update(
+                success=True,
+                message='已发布到草稿箱',
+                media_id=media_id,
+                images_uploaded=uploaded,
+                images_reused=reused
+            )
+        except Exception as e:
+            db.session.rollback()
+            print(f"[微信发布] PID {article.pid} 发布失败: {str(e)}")
+            result['message'] = str(e)
+        return result
+
+    def publish_pid(self, executor, pid):
+        """按ID发布单篇文章，返回结果字典"""
+        article = db.session.get(PublishArticle, pid)
+        if article is None:
+            return {'pid': pid, 'success': False, 'message': '文章不存在'}
+        return self.publish_article(executor, article)
+
+    def publish(self, pid):
+        """发布单篇文章（单篇发布接口使用，与批量发布共用 token 和已上传图片记录）"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='wechat-upload') as executor:
+            return self.publish_pid(executor, pid)
+
+    def _publish_claimed(self, executor, pid):
+        """以 publish_wechat 任务在当前线程发布单篇；该文章已有发布任务未结束时跳过"""
+        def publish_job(ctx):
+            result = self.publish_pid(executor, pid)
+            if not result['success']:
+                raise JobError(result['message'], result)
+            return result
+
+        job, created = job_manager.run('publish_wechat', publish_job, dedupe_key=publish_dedupe_key(pid))
+        if not created:
+            return {'pid': pid, 'success': False, 'job_id': job.job_id,
+                    'message': '该文章已有发布任务正在进行，已跳过'}
+        result = job.to_dict()['result'] or {'pid': pid, 'success': False, 'message': job.message}
+        return {**result, 'job_id': job.job_id}
+
+    def publish_many(self, pids, ctx=None):
+        """按顺序发布多篇文章（每篇文章的图片并发上传）
+
+        Returns:
+            dict: {total, success, failed, results}
+        """
+        results = []
+        success = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='wechat-upload') as executor:
+            for pid in pids:
+                if ctx:
+                    ctx.check_cancelled()
+                result = self._publish_claimed(executor, pid)
+                results.append(result)
+                success += result['success']
+                if ctx:
+                    ctx.update(message=f"已处理 {len(results)}/{len(pids)} 篇",
+                               total=len(pids), done=len(results), success=success,
+                               failed=len(results) - success)
+
+        return {
+            'total': len(pids),
+            'success': success,
+            'failed': len(pids) - success,
+            'results': results
+        }
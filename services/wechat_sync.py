@@ -0,0 +1,399 @@
+"""
+微信文章增量同步
+
+按公众号(fakeid)在 sync_cursors 表中保存高水位：已同步的最新一条发布的 (发布时间, msgid)。
+增量同步从第一页开始翻 appmsgpublish 列表，遇到不晚于高水位的发布就停止翻页，
+只下载新发布的文章，以及列表中 update_time 晚于上次同步时间（发布后被修改过）的已入库文章。
+大多数时候只需要一次列表请求，降低被微信限频的风险。
+
+多个公众号在 wechat_accounts.json 中配置（没有该文件时只同步 wechat_cookies.json 中的公众号），
+各公众号并发同步：列表请求按公众号分别限速，所有请求共用一个连接池，
+正文下载共用一个按主机限速的抓取器。
+
+下载的文章经过 下载 → 解析 → 图片本地化 → 入库 的分阶段流水线（services.pipeline），
+网络下载、HTML解析和数据库写入互相重叠。文章中的微信图片在入库前下载到本地图片库
+（services.image_localize），每批文章的图片统一去重并发下载，多个公众号共用一个下载线程池。
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from flask import current_app
+
+from services.http_client import ConcurrentFetcher, HostRateLimiter, create_session
+from services.models import db
+
+PUBLISH_LIST_URL = 'https://mp.weixin.qq.com/cgi-bin/appmsgpublish'
+COOKIE_FILE = 'wechat_cookies.json'
+ACCOUNTS_FILE = 'wechat_accounts.json'
+
+
+# 列表接口表示登录失效的错误码：invalid session、invalid csrf token
+AUTH_ERROR_RETS = (200003, 200040)
+
+
+class SyncError(Exception):
+    """列表接口返回错误（Cookie失效、限频等）"""
+
+    def __init__(self, ret, message):
+        super().__init__(f'公众号文章列表请求失败({ret}): {message}')
+        self.ret = ret
+
+    @property
+    def is_auth_error(self):
+        """是否为Cookie/登录失效（限频等其他错误不代表Cookie失效）"""
+        return self.ret in AUTH_ERROR_RETS
+
+
+class SyncCursor(db.Model):
+    """增量同步高水位表"""
+    __tablename__ = 'sync_cursors'
+
+    fakeid = db.Column(db.String(64), primary_key=True)
+    last_publish_time = db.Column(db.Integer, nullable=False, default=0)
+    last_msgid = db.Column(db.BigInteger, nullable=False, default=0)
+    last_synced_at = db.Column(db.Integer, nullable=False, default=0)  # 上次同步完成的时间戳
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+def load_wechat_config(path=COOKIE_FILE):
+    """读取 wechat_cookies.json: {cookies, headers, params}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_accounts(path=ACCOUNTS_FILE, cookie_path=COOKIE_FILE):
+    """读取要同步的公众号列表
+
+    wechat_accounts.json 为列表，每项: {name, fakeid, source_type, cookies, headers, params}，
+    未填写的 cookies/headers/params 继承 wechat_cookies.json（同一个登录账号监控多个公众号时只需填 fakeid）。
+    没有该文件时返回 wechat_cookies.json 中的单个公众号。
+    """
+    base = load_wechat_config(cookie_path) if os.path.exists(cookie_path) else {}
+    if not os.path.exists(path):
+        return [{**base, 'name': 'default'}]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    accounts = []
+    for index, entry in enumerate(entries):
+        params = {**(base.get('params') or {}), **(entry.get('params') or {})}
+        if entry.get('fakeid'):
+            params['fakeid'] = entry['fakeid']
+        accounts.append({
+            'name': entry.get('name') or params.get('fakeid') or f'account{index}',
+            'source_type': entry.get('source_type', 'WUHU'),
+            'cookies': entry.get('cookies') or base.get('cookies') or {},
+            'headers': entry.get('headers') or base.get('headers') or {},
+            'params': params
+        })
+    return accounts
+
+
+def create_wechat_session(wechat_config, pool_session=None):
+    """带登录Cookie和请求头的会话
+
+    每个公众号单独一个会话（Cookie互不影响），传入 pool_session 时共用它的连接池。
+    """
+    session = requests.Session()
+    if pool_session is not None:
+        session.mount('https://', pool_session.get_adapter('https://'))
+        session.mount('http://', pool_session.get_adapter('http://'))
+    session.headers.update(wechat_config.get('headers') or {})
+    session.cookies.update(wechat_config.get('cookies') or {})
+    return session
+
+
+def parse_publish_page(data):
+    """解析 appmsgpublish 的响应，返回按发布时间倒序的文章列表
+
+    每篇文章: {msgid, publish_time, update_time, title, link, cover_url, author_name, digest}
+    """
+    base_resp = data.get('base_resp') or {}
+    if base_resp.get('ret', 0) != 0:
+        raise SyncError(base_resp.get('ret'), base_resp.get('err_msg') or '未知错误')
+
+    page = json.loads(data.get('publish_page') or '{}')
+    items = []
+    for publish in page.get('publish_list') or []:
+        info = json.loads(publish.get('publish_info') or '{}')
+        msgid = int(info.get('msgid') or 0)
+        publish_time = int((info.get('sent_info') or {}).get('time') or 0)
+        for appmsg in info.get('appmsgex') or []:
+            if appmsg.get('is_deleted'):
+                continue
+            items.append({
+                'msgid': msgid,
+                'publish_time': publish_time or int(appmsg.get('create_time') or 0),
+                'update_time': int(appmsg.get('update_time') or 0),
+                'title': appmsg.get('title') or '',
+                'link': (appmsg.get('link') or '').split('#')[0],
+                'cover_url': appmsg.get('cover'),
+                'author_name': appmsg.get('author_name') or None,
+                'digest': appmsg.get('digest')
+            })
+    return items
+
+
+class PublishLister:
+    """按页请求公众号的发布列表"""
+
+    def __init__(self, session, wechat_config, page_size=5, limiter=None):
+        self.session = session
+        self.params = dict(wechat_config.get('params') or {})
+        self.page_size = page_size
+        # 每个公众号单独限速
+        self.limiter = limiter or HostRateLimiter(current_app.config['SYNC_ACCOUNT_RATE'], 1)
+        self.requests = 0
+
+    @property
+    def fakeid(self):
+        return self.params.get('fakeid')
+
+    def page(self, begin):
+        self.limiter.acquire(PUBLISH_LIST_URL)
+        self.requests += 1
+        response = self.session.get(PUBLISH_LIST_URL, params={**self.params, 'begin': begin, 'count': self.page_size},
+                                    timeout=15)
+        response.raise_for_status()
+        return parse_publish_page(response.json())
+
+
+def collect_updates(lister, cursor, max_pages=10, first_limit=10):
+    """翻页收集需要下载的文章
+
+    Args:
+        lister: PublishLister
+        cursor: SyncCursor，首次同步时为 None
+        max_pages: 最多翻页数
+        first_limit: 首次同步（没有高水位）时最多收集的文章数
+
+    Returns:
+        tuple: (新发布的文章, 可能被修改过的已有文章, 是否完整)。
+               翻完 max_pages 页仍未到达上次同步的位置时不完整：更早的新文章没有收集到
+    """
+    mark = (cursor.last_publish_time, cursor.last_msgid) if cursor else None
+    last_synced_at = cursor.last_synced_at if cursor else 0
+    new_items, changed_items = [], []
+    complete = True
+
+    for page_no in range(max_pages):
+        items = lister.page(page_no * lister.page_size)
+        if not items:
+            break
+
+        reached = False
+        for item in items:
+            key = (item['publish_time'], item['msgid'])
+            if mark is None or key > mark:
+                new_items.append(item)
+            else:
+                # 已同步过的发布：只在发布后又修改过时重新下载
+                reached = True
+                if item['update_time'] > last_synced_at:
+                    changed_items.append(item)
+
+        if reached or (mark is None and len(new_items) >= first_limit):
+            break
+    else:
+        complete = mark is None
+
+    if mark is None:
+        new_items = new_items[:first_limit]
+    return new_items, changed_items, complete
+
+
+def _item_key(item):
+    return item['publish_time'], item['msgid']
+
+
+def _item_link(payload):
+    """流水线各阶段条目对应的文章链接（列表条目、下载结果或文章字典）"""
+    if 'item' in payload:
+        return payload['item']['link']
+    return payload.get('source_url') or payload.get('link')
+
+
+def advance_mark(mark, new_items, failed_links):
+    """高水位可以推进到的位置
+
+    按发布时间从旧到新推进，遇到第一篇失败（可重试）的文章为止，
+    失败的文章及更新的文章下次同步时重新收集。没有正文、404 等无法重试的文章记为丢弃，不阻止推进。
+    """
+    for item in sorted(new_items, key=_item_key):
+        if item['link'] in failed_links:
+            break
+        mark = max(mark, _item_key(item)) if mark else _item_key(item)
+    return mark
+
+
+def build_sync_pipeline(name, source_type, fetcher, pool_session=None, image_executor=None):
+    """文章同步流水线: 下载正文 → 解析/转换 Markdown → 图片本地化 → 入库
+
+    - download: 多线程并发下载（ConcurrentFetcher 按主机限速）；
+    - parse: 解析HTML并转换 Markdown，PIPELINE_PARSE_PROCESSES > 0 时在进程池中执行；
+    - localize: 按批下载图片（一批内的图片去重并发下载）；
+    - persist: 单线程按批入库。
+    文章页面是公开的，使用共享会话下载，不带公众号后台的登录Cookie。
+    """
+    from services.image_localize import localize_articles, record_article_refs
+    from services.ingest import ingest_articles
+    from services.pipeline import Pipeline, get_process_pool
+    from services.wechat_article import article_from_download
+
+    def download(item):
+        try:
+            response = fetcher.fetch(item['link'])
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and 400 <= status < 500 and status != 429:
+                # 文章不存在等永久错误，重试也不会成功
+                print(f"[增量同步] 文章无法访问({status})，跳过: {item['link']}")
+                return None
+            raise
+        response.encoding = 'utf-8'
+        return {'item': item, 'html': response.text}
+
+    def localize(articles):
+        localize_articles(articles, session=pool_session, executor=image_executor)
+        return articles
+
+    def persist(articles):
+        stats = ingest_articles(articles, source_type, skip_existing=False)
+        if current_app.config['SYNC_LOCALIZE_IMAGES']:
+            record_article_refs(articles, stats['nids'])
+        return [stats]
+
+    parse_processes = current_app.config['PIPELINE_PARSE_PROCESSES']
+    batch_size = current_app.config['PIPELINE_BATCH_SIZE']
+    pipeline = Pipeline(name, app=current_app._get_current_object(), queue_size=current_app.config['PIPELINE_QUEUE_SIZE'],
+                        key=_item_link)
+    pipeline.add_stage('download', download, workers=fetcher.max_in_flight)
+    pipeline.add_stage('parse', article_from_download, workers=max(1, parse_processes),
+                       executor=get_process_pool(parse_processes) if parse_processes > 0 else None)
+    if current_app.config['SYNC_LOCALIZE_IMAGES']:
+        pipeline.add_stage('localize', localize, batch_size=batch_size)
+    pipeline.add_stage('persist', persist, batch_size=batch_size)
+    return pipeline
+
+
+def sync_incremental(source_type='WUHU', wechat_config=None, page_size=None, max_pages=None, first_limit=None,
+                     fetcher=None, pool_session=None, image_executor=None):
+    """增量同步一个公众号（默认为 wechat_cookies.json 中的公众号）
+
+    Returns:
+        dict: {fakeid, list_requests, new, changed, inserted, updated, failed, complete, pipeline}
+    """
+    wechat_config = wechat_config or load_wechat_config()
+    session = create_wechat_session(wechat_config, pool_session)
+    lister = PublishLister(session, wechat_config, page_size=page_size or current_app.config['SYNC_LIST_PAGE_SIZE'])
+    fakeid = lister.fakeid
+    if not fakeid:
+        raise ValueError('公众号配置中缺少 fakeid')
+
+    started_at = int(time.time())
+    cursor = db.session.get(SyncCursor, fakeid)
+    new_items, changed_items, complete = collect_updates(
+        lister, cursor,
+        max_pages=max_pages or current_app.config['SYNC_MAX_LIST_PAGES'],
+        first_limit=first_limit or current_app.config['ARTICLES_PER_PAGE']
+    )
+    print(f"[增量同步] {fakeid}: 列表请求 {lister.requests} 次，新文章 {len(new_items)} 篇，"
+          f"可能修改 {len(changed_items)} 篇")
+    if not complete:
+        print(f"[增量同步] {fakeid}: 翻页已达上限仍未到达上次同步的位置，本次不推进同步位置"
+              f"（新文章较多时可调大 SYNC_MAX_LIST_PAGES）")
+
+    # 被修改的文章只更新仍在库中的（已被清理的旧文章不再重新入库）
+    if changed_items:
+        from services.ingest import find_existing_source_urls
+
+        existing = find_existing_source_urls([item['link'] for item in changed_items])
+        changed_items = [item for item in changed_items if item['link'] in existing]
+
+    items = list({item['link']: item for item in new_items + changed_items if item['link']}.values())
+    fetcher = fetcher or ConcurrentFetcher.from_config(current_app.config)
+    pipeline = build_sync_pipeline(f'sync-{fakeid}', source_type, fetcher, pool_session, image_executor)
+    results = pipeline.run(items)
+    failed = pipeline.failed
+
+    # 高水位推进到最早一篇失败文章之前，失败的文章下次同步时重试；
+    # 被修改的文章有失败时不更新 last_synced_at，下次继续检查；
+    # 收集不完整时（与上次同步的位置之间还有没收集到的文章）保持原位置，避免跳过这些文章
+    old_mark = (cursor.last_publish_time, cursor.last_msgid) if cursor else None
+    mark = advance_mark(old_mark, new_items, pipeline.failed_keys)
+    changed_failed = any(item['link'] in pipeline.failed_keys for item in changed_items)
+    if complete and mark and (mark != old_mark or not changed_failed):
+        cursor = cursor or SyncCursor(fakeid=fakeid)
+        cursor.last_publish_time, cursor.last_msgid = mark
+        if not changed_failed:
+            cursor.last_synced_at = started_at
+        cursor.updated_at = datetime.now()
+        db.session.add(cursor)
+        db.session.commit()
+
+    return {
+        'fakeid': fakeid,
+        'list_requests': lister.requests,
+        'new': len(new_items),
+        'changed': len(changed_items),
+        'inserted': sum(stats['inserted'] for stats in results),
+        'updated': sum(stats['updated'] for stats in results),
+        'failed': failed,
+        'complete': complete,
+        'pipeline': pipeline.stats()
+    }
+
+
+def sync_accounts(accounts=None, max_workers=None, first_limit=None):
+    """并发增量同步多个公众号，单个公众号失败不影响其他公众号
+
+    Returns:
+        list: 与 accounts 顺序一致的结果 {name, fakeid, status, message, ...sync_incremental 的统计}，
+              列表接口返回错误时包含 ret 和 auth_error（是否为登录失效）
+    """
+    app = current_app._get_current_object()
+    accounts = load_accounts() if accounts is None else accounts
+    if not accounts:
+        return []
+
+    max_workers = max(1, min(max_workers or current_app.config['SYNC_ACCOUNT_CONCURRENCY'], len(accounts)))
+    # 所有公众号共用连接池和正文抓取器（正文都在 mp.weixin.qq.com，按主机统一限速）
+    pool_session = create_session(pool_size=max(max_workers, app.config['CRAWL_MAX_IN_FLIGHT']))
+    fetcher = ConcurrentFetcher.from_config(app.config, session=pool_session)
+    image_executor = ThreadPoolExecutor(max_workers=app.config['IMAGE_LOCALIZE_CONCURRENCY'],
+                                        thread_name_prefix='image-localize')
+
+    def sync_one(account):
+        result = {'name': account['name'], 'fakeid': (account.get('params') or {}).get('fakeid')}
+        try:
+            with app.app_context():
+                stats = sync_incremental(
+                    source_type=account.get('source_type', 'WUHU'),
+                    wechat_config=account,
+                    first_limit=first_limit,
+                    fetcher=fetcher,
+                    pool_session=pool_session,
+                    image_executor=image_executor
+                )
+            message = f"新文章 {stats['new']} 篇，更新 {stats['changed']} 篇"
+            if not stats['complete']:
+                message += '（新文章超过翻页上限，同步位置未推进）'
+            result.update(stats, status='success', message=message)
+        except Exception as e:
+            print(f"[增量同步] 公众号 {account['name']} 同步失败: {str(e)}")
+            result.update(status='error', message=str(e))
+            if isinstance(e, SyncError):
+                # 列表接口返回的错误码，登录失效时调用方把该公众号的Cookie记为无效
+                result.update(ret=e.ret, auth_error=e.is_auth_error)
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wechat-sync') as executor:
+            return list(executor.map(sync_one, accounts))
+    finally:
+        image_executor.shutdown()
@@ -0,0 +1,39 @@
+"""
+测试夹具：应用使用 testing 配置（临时目录下的 SQLite 数据库）
+
+app.py 在导入时按 FLASK_CONFIG 加载配置并初始化数据库，需要在导入 app 之前设置环境变量。
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+TEST_DB_DIR = tempfile.mkdtemp(prefix='flask_app_test_')
+os.environ['FLASK_CONFIG'] = 'testing'
+os.environ['TEST_DB_DIR'] = TEST_DB_DIR
+
+
+@pytest.fixture(scope='session')
+def app():
+    pytest.importorskip('services.models', reason='需要 services.models')
+
+    from app import app as flask_app
+    from services.models import db
+
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
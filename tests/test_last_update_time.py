@@ -0,0 +1,86 @@
+"""
+/api/last-update-time：只执行一条查询，且只返回一行
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+pytest.importorskip('services.models', reason='需要 services.models')
+
+from services.models import db, NormalizedArticle  # noqa: E402
+
+
+@pytest.fixture
+def articles(app):
+    base = datetime(2025, 1, 1)
+    with app.app_context():
+        for nid in range(1, 31):
+            db.session.add(NormalizedArticle(
+                nid=nid, sid=nid, title=f'文章{nid}', content='正文' * 1000,
+                source_type='WUHU' if nid % 3 else 'TEJIAN',
+                process_status=4 if nid % 7 == 0 else 0,
+                created_at=base, updated_at=base + timedelta(hours=nid)
+            ))
+        db.session.commit()
+    yield
+    with app.app_context():
+        NormalizedArticle.query.delete()
+        db.session.commit()
+
+
+@pytest.fixture
+def query_log(app):
+    """记录执行的SQL语句和从游标读取的行数"""
+    log = {'statements': [], 'rows': 0}
+
+    def on_connect(dbapi_connection, connection_record):
+        def count_row(cursor, row):
+            log['rows'] += 1
+            return row
+        dbapi_connection.row_factory = count_row
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log['statements'].append(statement)
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'connect', on_connect)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+        # 丢弃已有连接，之后新建的连接才会统计行数
+        engine.dispose()
+    yield log
+    event.remove(engine, 'connect', on_connect)
+    event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+    engine.dispose()
+
+
+def test_last_update_time_single_row_query(app, client, articles, query_log):
+    response = client.get('/api/last-update-time')
+
+    assert response.status_code == 200
+    assert len(query_log['statements']) == 1
+    assert query_log['rows'] <= 1
+
+    per_page = app.config['ARTICLES_PER_PAGE']
+    candidates = sorted((nid for nid in range(1, 31) if nid % 3 and nid % 7), reverse=True)
+    expected = datetime(2025, 1, 1) + timedelta(hours=candidates[per_page - 1])
+    assert response.get_json()['last_update'] == expected.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_last_update_time_fewer_articles_than_page(app, client, query_log):
+    with app.app_context():
+        db.session.add(NormalizedArticle(nid=1, sid=1, title='唯一', source_type='WUHU', process_status=0,
+                                         created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 3, 1, 8)))
+        db.session.commit()
+    query_log['statements'].clear()
+    query_log['rows'] = 0
+    try:
+        response = client.get('/api/last-update-time')
+        assert response.get_json()['last_update'] == '2025-03-01 08:00:00'
+        assert len(query_log['statements']) == 1
+        assert query_log['rows'] <= 1
+    finally:
+        with app.app_context():
+            NormalizedArticle.query.delete()
+            db.session.commit()
@@ -0,0 +1,23 @@
+"""
+正文规范化回归测试：normalize_corpus/ 中每篇 HTML 的转换结果与基准 Markdown 逐字节一致
+
+基准修改方法见 benchmarks/bench_normalize.py --record。
+"""
+import os
+
+import pytest
+
+from services.normalize import html_to_markdown
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'normalize_corpus')
+CASES = sorted(filename[:-5] for filename in os.listdir(CORPUS_DIR) if filename.endswith('.html'))
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_html_to_markdown_matches_golden(name):
+    with open(os.path.join(CORPUS_DIR, f'{name}.html'), 'r', encoding='utf-8') as f:
+        content = f.read()
+    with open(os.path.join(CORPUS_DIR, f'{name}.md'), 'r', encoding='utf-8', newline='') as f:
+        expected = f.read()
+
+    assert html_to_markdown(content) == expected
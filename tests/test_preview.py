@@ -0,0 +1,74 @@
+"""
+增量预览切块测试：各块分别渲染后拼接，应与整篇渲染一致
+"""
+import re
+
+import pytest
+
+from services.preview import InvalidChanges, PreviewConflict, PreviewDocument, split_blocks
+from services.render import render_markdown
+
+CORPUS = {
+    'basic': "# 标题\n\n第一段\n第二行  \n换行\n\n---\n\n最后一段",
+    'lists': "- a\n- b\n\n- c\n\n1. x\n\n    缩进段落\n\n2. y\n\n正文",
+    'fenced_code': "```python\ndef f():\n\n    return 1\n```\n\n~~~\n```\n~~~\n\n段落",
+    'indented_code': "段落\n\n    code\n\n    more\n\n结尾",
+    'table': "| 项目 | 结果 |\n| --- | --- |\n| 压力表 | 合格 |\n\n说明",
+    'blockquote': "> 第一段引用\n\n> 第二段引用\n> 续行\n\n正文\n\n> 另一段引用",
+    'nested_blockquote': "> 引用\n>\n> > 嵌套\n\n> 继续\n\n正文",
+    'def_list': "术语1\n: 定义1\n\n术语2\n: 定义2\n\n正文",
+    'def_list_loose': "术语1\n\n: 定义1\n\n术语2\n: 定义2a\n: 定义2b\n\n正文",
+    'raw_html': "<div>\n\n内容\n\n</div>\n\n正文",
+    'html_comment': "<!--\n注释\n\n-->\n\n正文",
+    'reference_link': "[链接][1]\n\n段落\n\n[1]: https://example.com",
+    'footnote': "正文[^1]\n\n段落\n\n[^1]: 脚注",
+    'images': "![封面](/uploads/a.png)\n\n**加粗** *斜体* `代码`",
+}
+
+
+def _collapse_blank_lines(html):
+    # 整篇渲染在部分块（如代码高亮）之后多一个空行，不影响显示
+    return re.sub(r'\n{2,}', '\n', html)
+
+
+@pytest.mark.parametrize('name', sorted(CORPUS))
+def test_blocks_render_same_as_document(name):
+    text = CORPUS[name]
+    joined = '\n'.join(render_markdown(block) for block in split_blocks(text))
+    assert _collapse_blank_lines(joined) == _collapse_blank_lines(render_markdown(text))
+
+
+def test_blockquote_paragraphs_stay_in_one_block():
+    assert split_blocks("> a\n\n> b\n\nc") == ["> a\n\n> b", "c"]
+
+
+def test_definition_list_stays_in_one_block():
+    assert split_blocks("A\n: 1\n\nB\n: 2\n\nc") == ["A\n: 1\n\nB\n: 2", "c"]
+
+
+def test_raw_html_block_falls_back_to_single_block():
+    text = "<div>\n\nx\n\n</div>\n\ny"
+    assert split_blocks(text) == [text]
+
+
+@pytest.mark.parametrize('changes', [
+    {'start': 0, 'end': 1},
+    [{'end': 1, 'blocks': ['x']}],
+    [{'start': '0', 'end': 1, 'blocks': ['x']}],
+    [{'start': True, 'end': 1, 'blocks': ['x']}],
+    [{'start': 0, 'end': 1, 'blocks': 'x'}],
+    ['0:1'],
+])
+def test_malformed_changes_rejected(changes):
+    document = PreviewDocument()
+    document.update_full("a\n\nb")
+    with pytest.raises(InvalidChanges):
+        document.update_changes(changes)
+    assert document.blocks == ["a", "b"]
+
+
+def test_out_of_range_changes_conflict():
+    document = PreviewDocument()
+    document.update_full("a\n\nb")
+    with pytest.raises(PreviewConflict):
+        document.update_changes([{'start': 1, 'end': 5, 'blocks': ['x']}])